@@ -0,0 +1,88 @@
+"""Benchmark scalar against batched combat resolution."""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from pyphoria.mechanics.Combat import (
+    Combatants,
+    character_combatant,
+    fight,
+    fight_batch,
+    monster_combatant,
+)
+from pyphoria.models import CharacterStats, MonsterBase
+
+
+def population(size: int, rng: random.Random) -> tuple[list, list]:
+    """Return the combatants of ``size`` random character and monster pairs."""
+    characters = [
+        character_combatant(
+            CharacterStats(
+                stat_combat=rng.randint(1, 20),
+                stat_dodge_rating=rng.randint(1, 30),
+                stat_hit_rating=rng.randint(1, 30),
+                stat_intelligence=rng.randint(1, 20),
+                stat_luck=rng.randint(1, 50),
+                stat_vitality=rng.randint(1, 20),
+            ),
+        )
+        for _ in range(size)
+    ]
+    monsters = [
+        monster_combatant(
+            MonsterBase(
+                name="Goblin",
+                description="",
+                level=rng.randint(1, 10),
+                base_damage=rng.randint(1, 10),
+                icon="",
+            ),
+        )
+        for _ in range(size)
+    ]
+    return characters, monsters
+
+
+def run(sizes: list[int], seed: int) -> None:  # noqa: D103
+    rng = np.random.default_rng(seed)
+    print(f"{'fights':>10} {'scalar s':>10} {'batch s':>10} {'speedup':>8} {'won':>6}")
+    for size in sizes:
+        characters, monsters = population(size, random.Random(seed))
+
+        start = time.perf_counter()
+        for character, monster in zip(characters, monsters, strict=True):
+            fight(character, monster)
+        scalar = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = fight_batch(
+            Combatants.pack(characters),
+            Combatants.pack(monsters),
+            rng,
+        )
+        batch = time.perf_counter() - start
+
+        print(
+            f"{size:>10} {scalar:>10.4f} {batch:>10.4f} {scalar / batch:>7.1f}x"
+            f" {result.won.mean():>6.1%}",
+        )
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1_000, 10_000, 100_000],
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.sizes, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Shared helpers for the HTTP benchmarks."""
+
+import asyncio
+import time
+import uuid
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+
+import httpx
+from sqlalchemy import Engine, insert
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Return the q-th percentile (0-100) of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, round(q / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def summarize(latencies: Sequence[float], elapsed: float) -> dict:
+    """Summarize request latencies in seconds into throughput and percentiles in ms."""
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "throughput": len(ordered) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+    }
+
+
+async def drive(
+    target: Callable | str,
+    request: Callable[[int, int], tuple],
+    clients: int,
+    requests_per_client: int,
+    errors: dict[str, int] | None = None,
+) -> tuple[dict[str, list[float]], float]:
+    """
+    Run concurrent clients against an ASGI app in-process or a server at a base URL.
+
+    ``request(client, n)`` returns the (method, url, label) of the n-th request of a
+    client, optionally followed by a JSON body. Returns the latencies per label and
+    the elapsed wall time. Server errors raise, unless an ``errors`` dict is passed
+    to count them, and requests that failed to connect, per label.
+
+    The in-process transport runs the app inside the client tasks, so a route that
+    blocks the event loop also stops the clients from taking their timestamps. Use a
+    separate server process to measure event loop stalls.
+    """
+    latencies: dict[str, list[float]] = {}
+    if isinstance(target, str):
+        options = {
+            "base_url": target,
+            "limits": httpx.Limits(max_connections=clients),
+            "timeout": None,
+        }
+    else:
+        options = {
+            "base_url": "http://bench",
+            "transport": httpx.ASGITransport(app=target),
+        }
+
+    async with httpx.AsyncClient(**options) as client:
+
+        async def send(method: str, url: str, body: list) -> httpx.Response:
+            try:
+                return await client.request(method, url, json=body[0] if body else None)
+            except httpx.TransportError:
+                # uvicorn closes the connection after an unhandled exception, the
+                # next request on it fails without ever reaching the server
+                return await client.request(method, url, json=body[0] if body else None)
+
+        async def run_client(number: int) -> None:
+            for n in range(requests_per_client):
+                method, url, label, *body = request(number, n)
+                start = time.perf_counter()
+                try:
+                    response = await send(method, url, body)
+                    status_code = response.status_code
+                except httpx.TransportError:
+                    if errors is None:
+                        raise
+                    status_code = None
+                latencies.setdefault(label, []).append(time.perf_counter() - start)
+                if status_code is None or status_code >= 500:  # noqa: PLR2004
+                    if errors is not None:
+                        errors[label] = errors.get(label, 0) + 1
+                        continue
+                    msg = f"{method} {url} failed with {status_code}"
+                    raise RuntimeError(msg)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(run_client(number) for number in range(clients)))
+        elapsed = time.perf_counter() - start
+    return latencies, elapsed
+
+
+@dataclass
+class Seeded:
+    """
+    Ids of the seeded rows, for building requests.
+
+    Attributes
+        species (list[uuid.UUID]): The species ids.
+        characters (list[uuid.UUID]): A sample of the character ids.
+        inventories (list[uuid.UUID]): A sample of the inventory ids.
+        items (list[uuid.UUID]): A sample of the item ids.
+        spare_items (list[uuid.UUID]): Items no inventory holds, for deletes.
+        spare_inventories (list[uuid.UUID]): Inventories no character has, for deletes.
+
+    """
+
+    species: list[uuid.UUID] = field(default_factory=list)
+    characters: list[uuid.UUID] = field(default_factory=list)
+    inventories: list[uuid.UUID] = field(default_factory=list)
+    items: list[uuid.UUID] = field(default_factory=list)
+    spare_items: list[uuid.UUID] = field(default_factory=list)
+    spare_inventories: list[uuid.UUID] = field(default_factory=list)
+
+
+def seed_scale(  # noqa: PLR0913
+    engine: Engine,
+    characters: int,
+    items: int,
+    *,
+    spares: int = 0,
+    links_per_inventory: int = 2,
+    seed: int = 0,
+) -> Seeded:
+    """
+    Fill an empty database with generated characters, their inventories and items.
+
+    Every inventory holds ``links_per_inventory`` items on average, see
+    ``pyphoria.helper.generator``. ``spares`` extra items and inventories are left
+    unreferenced for the delete routes.
+    """
+    from pyphoria.helper.generator import Counts, generate
+    from pyphoria.helper.identifiers import new_id
+    from pyphoria.models import Inventory, Item
+
+    generated = generate(
+        engine,
+        Counts(
+            characters=characters,
+            items=items,
+            items_per_inventory=links_per_inventory,
+        ),
+        seed,
+    )
+    seeded = Seeded(
+        species=generated.species,
+        characters=generated.characters,
+        inventories=generated.inventories,
+        items=generated.items,
+        spare_items=[new_id() for _ in range(spares)],
+        spare_inventories=[new_id() for _ in range(spares)],
+    )
+    if spares:
+        with engine.begin() as connection:
+            connection.execute(
+                insert(Item.__table__),
+                [
+                    {
+                        "id": key,
+                        "name": f"Spare item {number}",
+                        "type": "weapon",
+                        "description": "Spare item.",
+                        "stackable": False,
+                        "max_stack": 1,
+                        "unique_store": False,
+                        "unique_equipped": False,
+                        "icon": "item.png",
+                        "damage_fire": 1,
+                        "damage_physical": 1,
+                        "requirement_dexterity": 1,
+                        "requirement_intelligence": 1,
+                        "requirement_level": 1,
+                        "requirement_strength": 1,
+                    }
+                    for number, key in enumerate(seeded.spare_items)
+                ],
+            )
+            connection.execute(
+                insert(Inventory.__table__),
+                [
+                    {"id": key, "slots": 10, "gold": 0}
+                    for key in seeded.spare_inventories
+                ],
+            )
+    return seeded
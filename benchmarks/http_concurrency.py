@@ -0,0 +1,121 @@
+"""
+Load test the API with many concurrent clients.
+
+The app runs in a uvicorn worker process and is driven over HTTP, so a route
+blocking the event loop shows up in the latency of every other route. A share of
+the clients list all characters while the rest look up single characters, so
+slow queries compete with fast ones. Run it on two commits to compare p99
+latency before and after a change.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from itertools import chain
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import drive, summarize
+
+REPOSITORY = Path(__file__).resolve().parent.parent
+
+
+def seed(engine, characters: int) -> list[uuid.UUID]:  # noqa: ANN001
+    """Create the characters with their species and inventories, return their ids."""
+    from pyphoria.helper.generator import Counts, generate
+
+    return generate(engine, Counts(characters=characters)).characters
+
+
+def start_server(directory: str) -> tuple[subprocess.Popen, str]:
+    """Start a single uvicorn worker serving the app from the directory."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = subprocess.Popen(  # noqa: S603
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "pyphoria.main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+            "--timeout-keep-alive",
+            "60",
+        ],
+        cwd=directory,
+        env={**os.environ, "PYTHONPATH": str(REPOSITORY)},
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base_url}/docs")
+            break
+        except httpx.TransportError:
+            time.sleep(0.1)
+    return server, base_url
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=10, help="per client")
+    parser.add_argument("--characters", type=int, default=500)
+    parser.add_argument(
+        "--list-every",
+        type=int,
+        default=10,
+        help="every n-th client lists all characters",
+    )
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    # the app opens database.db relative to the working directory
+    directory = tempfile.mkdtemp(prefix="pyphoria-bench-")
+    os.chdir(directory)
+    from pyphoria import main as api
+
+    api.create_db_and_tables()
+    character_ids = seed(api.engine, args.characters)
+    api.engine.dispose()
+
+    def request(client: int, n: int) -> tuple[str, str, str]:
+        if client % args.list_every == 0:
+            return "GET", "/character/", "GET /character/"
+        character_id = character_ids[(client * args.requests + n) % len(character_ids)]
+        return "GET", f"/character/{character_id}", "GET /character/{character_id}"
+
+    server, base_url = start_server(directory)
+    try:
+        latencies, elapsed = asyncio.run(
+            drive(base_url, request, args.clients, args.requests),
+        )
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{args.clients} clients, {args.characters} characters")
+    for label, values in [
+        *latencies.items(),
+        ("all", list(chain(*latencies.values()))),
+    ]:
+        stats = summarize(values, elapsed)
+        print(
+            f"{label:<32} {stats['throughput']:>8.1f} req/s"
+            f"  p50 {stats['p50_ms']:>8.1f} ms  p99 {stats['p99_ms']:>8.1f} ms",
+        )
+
+
+if __name__ == "__main__":
+    main()
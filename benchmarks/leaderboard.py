@@ -0,0 +1,115 @@
+"""
+Measure the leaderboard on a generated database.
+
+A database of ``--characters`` characters is generated, then the benchmark times
+loading the scores, rank lookups of random characters, rank lookups right after
+an experience change of another character, the top characters, and for
+comparison counting the characters ahead of one in SQL.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+
+from sqlalchemy import text
+
+from pyphoria.helper.database import create_engine
+from pyphoria.helper.generator import Counts, generate
+from pyphoria.helper.identifiers import from_db, to_db
+from pyphoria.helper.leaderboard import Leaderboard
+from pyphoria.helper.migrations import migrate
+
+_AHEAD = text(
+    "SELECT count(*) FROM character WHERE level > :level "
+    "OR (level = :level AND experience > :experience)",
+)
+
+
+def timed(function, repeat: int) -> float:  # noqa: ANN001
+    """Return the mean milliseconds of a call of the function."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--characters", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    parser.add_argument("--database", help="an existing generated database to use")
+    args = parser.parse_args()
+
+    path = args.database or f"{tempfile.mkdtemp(prefix='pyphoria-board-')}/board.db"
+    engine = create_engine(f"sqlite:///{path}")
+    if args.database is None:
+        migrate(engine)
+        start = time.perf_counter()
+        generate(engine, Counts(characters=args.characters))
+        print(
+            f"generated {args.characters:,} characters in "
+            f"{time.perf_counter() - start:.1f} s",
+        )
+    with engine.connect() as connection:
+        ids = (
+            connection.execute(
+                text("SELECT id FROM character ORDER BY random() LIMIT :count"),
+                {"count": args.lookups},
+            )
+            .scalars()
+            .all()
+        )
+    ids = [from_db(key) for key in ids]
+    board = Leaderboard(engine)
+    rng = random.Random(0)
+
+    start = time.perf_counter()
+    board.rank(ids[0])
+    print(f"load             {(time.perf_counter() - start) * 1000:10.1f} ms")
+
+    lookups = iter(ids)
+    rank_ms = timed(lambda: board.rank(next(lookups)), len(ids))
+    print(f"rank             {rank_ms:10.3f} ms")
+
+    # every rank after a write first applies the change to the scores
+    synced: list[float] = []
+
+    def update_and_rank() -> None:
+        changed = rng.choice(ids)
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    "UPDATE character SET experience = experience + :gain "
+                    "WHERE id = :id",
+                ),
+                {"gain": rng.randint(1, 10_000), "id": to_db(changed)},
+            )
+        start = time.perf_counter()
+        board.rank(rng.choice(ids))
+        synced.append(time.perf_counter() - start)
+
+    updates = min(len(ids), 1000)
+    update_ms = timed(update_and_rank, updates)
+    synced_ms = sum(synced) / len(synced) * 1000
+    print(f"update + rank    {update_ms:10.3f} ms")
+    print(f"rank after write {synced_ms:10.3f} ms")
+    print(f"top 100          {timed(lambda: board.top(100), 100):10.3f} ms")
+
+    def count_ahead() -> None:
+        with engine.connect() as connection:
+            level, experience = connection.execute(
+                text("SELECT level, experience FROM character WHERE id = :id"),
+                {"id": to_db(rng.choice(ids))},
+            ).one()
+            connection.execute(
+                _AHEAD,
+                {"level": level, "experience": experience},
+            ).scalar()
+
+    print(f"SQL count ahead  {timed(count_ahead, 20):10.3f} ms")
+    print(board.stats())
+
+
+if __name__ == "__main__":
+    main()
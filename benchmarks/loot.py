@@ -0,0 +1,55 @@
+"""Benchmark scalar against batched loot generation."""
+
+import argparse
+import time
+import uuid
+
+import numpy as np
+
+from pyphoria.mechanics.Loot import Loot
+
+
+def run(sizes: list[int], seed: int) -> None:  # noqa: D103
+    loot = Loot(uuid.uuid4(), uuid.uuid4())
+    characters = [uuid.uuid4() for _ in range(100)]
+    monsters = [uuid.uuid4() for _ in range(10)]
+    rng = np.random.default_rng(seed)
+
+    print(f"{'kills':>10} {'scalar s':>10} {'batch s':>10} {'speedup':>8}")
+    for size in sizes:
+        character_ids = [characters[i % len(characters)] for i in range(size)]
+        monster_ids = [monsters[i % len(monsters)] for i in range(size)]
+        monster_levels = [1] * size
+
+        start = time.perf_counter()
+        for character_id, monster_id, monster_level in zip(
+            character_ids,
+            monster_ids,
+            monster_levels,
+            strict=True,
+        ):
+            loot.generate(character_id, monster_id, monster_level)
+        scalar = time.perf_counter() - start
+
+        start = time.perf_counter()
+        loot.generate_batch(character_ids, monster_ids, monster_levels, rng)
+        batch = time.perf_counter() - start
+
+        print(f"{size:>10} {scalar:>10.4f} {batch:>10.4f} {scalar / batch:>7.1f}x")
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1_000, 100_000, 1_000_000],
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.sizes, args.seed)
+
+
+if __name__ == "__main__":
+    main()
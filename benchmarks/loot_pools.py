@@ -0,0 +1,58 @@
+"""Benchmark per-drop cost of merged loot pools against compiled alias samplers."""
+
+import argparse
+import random
+import time
+
+from pyphoria.mechanics.Sampler import LootPoolCache
+
+
+def run(pool_sizes: list[int], calls: int, drops: int) -> None:  # noqa: D103
+    cache = LootPoolCache()
+    print(f"{'pool':>8} {'merge+choices us':>17} {'alias us':>10}")
+    for pool_size in pool_sizes:
+        area_loot_pool = tuple(
+            (f"area-{i}", random.randint(1, 1000)) for i in range(pool_size)
+        )
+        monster_type_loot_pool = tuple(
+            (f"monster-{i}", random.randint(1, 1000)) for i in range(pool_size)
+        )
+
+        start = time.perf_counter()
+        for _ in range(calls):
+            loot_pool = list(area_loot_pool) + list(monster_type_loot_pool)
+            base_ids, base_weights = zip(*loot_pool, strict=True)
+            random.choices(base_ids, base_weights, k=drops)
+        merged = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(calls):
+            cache.get(
+                ("planet", "area", "type"),
+                area_loot_pool,
+                monster_type_loot_pool,
+            ).choices(drops)
+        alias = time.perf_counter() - start
+
+        per_drop = 1e6 / (calls * drops)
+        print(
+            f"{pool_size * 2:>8} {merged * per_drop:>17.3f} {alias * per_drop:>10.3f}",
+        )
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--pool-sizes",
+        type=int,
+        nargs="+",
+        default=[5, 50, 500, 5000],
+    )
+    parser.add_argument("--calls", type=int, default=2_000)
+    parser.add_argument("--drops", type=int, default=3)
+    args = parser.parse_args()
+    run(args.pool_sizes, args.calls, args.drops)
+
+
+if __name__ == "__main__":
+    main()
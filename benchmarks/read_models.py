@@ -0,0 +1,88 @@
+"""
+Profile the CPU spent per row of a large list response.
+
+Pages of characters are requested in-process, once with every row validated
+against the response model and once with trusted reads streaming the columns
+straight to JSON. The test client runs the app in another thread, so ``--profile``
+profiles the route and the response serialization FastAPI does after it directly.
+"""
+
+import argparse
+import cProfile
+import logging
+import os
+import pstats
+import tempfile
+import time
+
+
+def run(characters: int, limit: int, requests: int, *, profile: bool) -> None:  # noqa: D103
+    directory = tempfile.mkdtemp()
+    os.environ["PYPHORIA_SQLITE_DB"] = f"{directory}/benchmark.db"
+    from fastapi.testclient import TestClient
+
+    from benchmarks.http_concurrency import seed
+    from pyphoria.helper import readmodel
+    from pyphoria.main import app, create_db_and_tables, engine
+
+    logging.disable(logging.INFO)
+    create_db_and_tables()
+    seed(engine, characters)
+
+    print(f"{'mode':<12}{'ms/request':>12}{'us/row':>10}")
+    with TestClient(app) as client:
+        for mode, trusted in (("validated", False), ("trusted", True)):
+            readmodel.TRUSTED_READS = trusted
+            client.get(f"/character/?limit={limit}").raise_for_status()
+            start = time.perf_counter()
+            for _ in range(requests):
+                client.get(f"/character/?limit={limit}")
+            elapsed = (time.perf_counter() - start) / requests
+            print(f"{mode:<12}{elapsed * 1000:>12.2f}{elapsed * 1e6 / limit:>10.2f}")
+
+    if profile:
+        for mode, trusted in (("validated", False), ("trusted", True)):
+            readmodel.TRUSTED_READS = trusted
+            profiler = cProfile.Profile()
+            profiler.enable()
+            for _ in range(requests):
+                render_page(engine, limit)
+            profiler.disable()
+            print(f"\n{mode}")
+            pstats.Stats(profiler).sort_stats("tottime").print_stats(12)
+
+
+def render_page(engine, limit: int) -> bytes:  # noqa: ANN001
+    """Run the list route and serialize its result the way FastAPI does."""
+    from fastapi import Response
+    from fastapi.responses import JSONResponse
+    from pydantic import TypeAdapter
+    from sqlmodel import Session
+
+    from pyphoria.helper.pagination import Page, paginate
+    from pyphoria.models import Character, CharacterRead
+
+    with Session(engine) as session:
+        result = paginate(session, Character, Page(limit=limit), Response())
+    if isinstance(result, Response):
+        return result.body
+    adapter = TypeAdapter(list[CharacterRead])
+    content = adapter.dump_python(
+        adapter.validate_python(result, from_attributes=True),
+        mode="json",
+    )
+    return JSONResponse(content).body
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--characters", type=int, default=5_000)
+    parser.add_argument("--limit", type=int, default=1_000)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--profile", action="store_true")
+    args = parser.parse_args()
+    run(args.characters, args.limit, args.requests, profile=args.profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+Measure the throughput and latency of every route at several database sizes.
+
+For every scale the database is seeded with that many characters, inventories
+and items, then served by a uvicorn worker process and driven over HTTP by
+concurrent clients. Every client walks through all routes in turn, so each route
+sees the same load while competing with the others. The results are written as
+JSON, ``--compare`` prints the change against the results of an earlier run, for
+example
+
+    python -m benchmarks.routes --scales 1000 100000 --output after.json \
+        --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import time
+import uuid
+from collections.abc import Callable
+from itertools import chain
+
+from benchmarks.common import Seeded, drive, seed_scale, summarize
+from benchmarks.http_concurrency import REPOSITORY, start_server
+
+Request = tuple
+
+
+def routes(seeded: Seeded, scale: int) -> dict[str, Callable[[int], Request]]:
+    """Return the request builders of every route, by route template."""
+    species = str(seeded.species[0])
+
+    def pick(ids: list[uuid.UUID], number: int) -> str:
+        return str(ids[number % len(ids)])
+
+    def spare(ids: list[uuid.UUID], number: int) -> str:
+        # every delete removes a different row, once used up the deletes miss
+        return str(ids[number]) if number < len(ids) else str(uuid.uuid4())
+
+    def character(number: int) -> dict:
+        return {
+            "species": species,
+            "name": f"Bench{number}",
+            "surname": f"Route{number}",
+            "level": 1,
+            "experience": 1,
+            "energy": 10,
+            "strength": 1,
+            "dexterity": 1,
+            "intelligence": 1,
+            "stat_combat": 1,
+            "stat_dodge_rating": 1,
+            "stat_hit_rating": 1,
+            "stat_intelligence": 1,
+            "stat_luck": 1,
+            "stat_vitality": 1,
+        }
+
+    def item(number: int, prefix: str) -> dict:
+        return {
+            "name": f"{prefix} {number}",
+            "type": "weapon",
+            "description": "Benchmark item.",
+            "stackable": True,
+            "max_stack": 100,
+            "unique_store": False,
+            "unique_equipped": False,
+            "icon": "item.png",
+            "damage_fire": 1,
+            "damage_physical": 1,
+            "requirement_dexterity": 1,
+            "requirement_intelligence": 1,
+            "requirement_level": 1,
+            "requirement_strength": 1,
+        }
+
+    def updated_character(number: int) -> dict:
+        return {
+            **character(scale + number),
+            "id": pick(seeded.characters, number),
+            "inventory_id": None,
+        }
+
+    return {
+        "GET /catalog/stats": lambda _: ("GET", "/catalog/stats"),
+        "GET /species/": lambda _: ("GET", "/species/"),
+        "POST /species/bulk": lambda n: (
+            "POST",
+            "/species/bulk?on_conflict=ignore",
+            [
+                {
+                    "name": f"Bench species {n}",
+                    "description": "Benchmark species.",
+                    "icon": "species.png",
+                    "base_strength": 1,
+                    "base_dexterity": 1,
+                    "base_intelligence": 1,
+                    **{stat: 1 for stat in character(n) if stat.startswith("stat_")},
+                },
+            ],
+        ),
+        "GET /character/": lambda _: ("GET", "/character/"),
+        "POST /character/": lambda n: ("POST", "/character/", character(n)),
+        "POST /character/bulk": lambda n: (
+            "POST",
+            "/character/bulk?on_conflict=ignore",
+            [character(-1 - n)],
+        ),
+        "GET /character/{character_id}": lambda n: (
+            "GET",
+            f"/character/{pick(seeded.characters, n)}",
+        ),
+        "PUT /character/{character_id}": lambda n: (
+            "PUT",
+            f"/character/{pick(seeded.characters, n)}",
+            updated_character(n),
+        ),
+        "GET /character/{character_id}/inventory": lambda n: (
+            "GET",
+            f"/character/{pick(seeded.characters, n)}/inventory",
+        ),
+        "GET /leaderboard/": lambda _: ("GET", "/leaderboard/?limit=100"),
+        "GET /leaderboard/{character_id}": lambda n: (
+            "GET",
+            f"/leaderboard/{pick(seeded.characters, n)}",
+        ),
+        "GET /inventory/": lambda _: ("GET", "/inventory/"),
+        "GET /inventory/{inventory_id}": lambda n: (
+            "GET",
+            f"/inventory/{pick(seeded.inventories, n)}",
+        ),
+        "POST /inventory/": lambda _: ("POST", "/inventory/", {}),
+        "PUT /inventory/{inventory_id}": lambda n: (
+            "PUT",
+            f"/inventory/{pick(seeded.inventories, n)}",
+            {"slots": 10, "gold": n},
+        ),
+        "DELETE /inventory/{inventory_id}": lambda n: (
+            "DELETE",
+            f"/inventory/{spare(seeded.spare_inventories, n)}",
+        ),
+        "POST /item/": lambda n: ("POST", "/item/", item(n, "Bench item")),
+        "POST /item/bulk": lambda n: (
+            "POST",
+            "/item/bulk?on_conflict=ignore",
+            [item(n, "Bench bulk item")],
+        ),
+        "GET /item/": lambda _: ("GET", "/item/"),
+        "GET /item/{item_id}": lambda n: ("GET", f"/item/{pick(seeded.items, n)}"),
+        "PUT /item/{item_id}": lambda n: (
+            "PUT",
+            f"/item/{pick(seeded.items, n)}",
+            item(n, "Bench renamed item"),
+        ),
+        "DELETE /item/{item_id}": lambda n: (
+            "DELETE",
+            f"/item/{spare(seeded.spare_items, n)}",
+        ),
+        "POST /inventory/{inventory_id}/item/{item_id}/{item_count}": lambda n: (
+            "POST",
+            (
+                f"/inventory/{pick(seeded.inventories, n)}"
+                f"/item/{pick(seeded.items, n * 7)}/1"
+            ),
+        ),
+        "POST /inventory/{inventory_id}/items": lambda n: (
+            "POST",
+            f"/inventory/{pick(seeded.inventories, n + 1)}/items",
+            [
+                {"item_id": pick(seeded.items, n * 13 + offset), "item_count": 1}
+                for offset in range(5)
+            ],
+        ),
+        "POST /monster/bulk": lambda n: (
+            "POST",
+            "/monster/bulk?on_conflict=ignore",
+            [
+                {
+                    "name": f"Bench monster {n}",
+                    "description": "Benchmark monster.",
+                    "level": 1,
+                    "base_damage": 1,
+                    "icon": "monster.png",
+                },
+            ],
+        ),
+        "POST /planet/bulk": lambda n: (
+            "POST",
+            "/planet/bulk?on_conflict=ignore",
+            [
+                {
+                    "name": f"Bench planet {n}",
+                    "description": "Benchmark planet.",
+                    "icon": "planet.png",
+                },
+            ],
+        ),
+    }
+
+
+def run_scale(scale: int, clients: int, requests: int) -> dict:
+    """Seed a database of the scale, drive all routes and return the results."""
+    from pyphoria.helper.database import create_engine
+    from pyphoria.helper.migrations import migrate
+
+    directory = tempfile.mkdtemp(prefix="pyphoria-routes-")
+    path = f"{directory}/benchmark.db"
+    engine = create_engine(f"sqlite:///{path}")
+    migrate(engine)
+    start = time.perf_counter()
+    seeded = seed_scale(
+        engine,
+        characters=scale,
+        items=scale,
+        spares=clients * requests,
+    )
+    seed_seconds = time.perf_counter() - start
+    engine.dispose()
+
+    builders = routes(seeded, scale)
+    labels = list(builders)
+
+    def request(client: int, n: int) -> Request:
+        # clients start at different routes, so every route is hit at any moment
+        label = labels[(client + n) % len(labels)]
+        method, url, *body = builders[label](client * requests + n)
+        return method, url, label, *body
+
+    os.environ["PYPHORIA_SQLITE_DB"] = path
+    server, base_url = start_server(directory)
+    errors: dict[str, int] = {}
+    try:
+        latencies, elapsed = asyncio.run(
+            drive(base_url, request, clients, requests, errors),
+        )
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        "scale": scale,
+        "seed_seconds": seed_seconds,
+        "routes": {
+            label: {
+                **summarize(latencies.get(label, []), elapsed),
+                "errors": errors.get(label, 0),
+            }
+            for label in labels
+        },
+        "all": summarize(list(chain(*latencies.values())), elapsed),
+    }
+
+
+def compare(results: list[dict], baseline: list[dict]) -> None:
+    """Print the throughput and p99 change of every route against the baseline."""
+    before = {
+        (result["scale"], label): stats
+        for result in baseline
+        for label, stats in result["routes"].items()
+    }
+    print(f"\n{'change against baseline':<64}{'req/s':>10}{'p99':>10}")
+    for result in results:
+        for label, stats in result["routes"].items():
+            old = before.get((result["scale"], label))
+            if not old or not old["throughput"] or not old["p99_ms"]:
+                continue
+            throughput = stats["throughput"] / old["throughput"] - 1
+            p99 = stats["p99_ms"] / old["p99_ms"] - 1
+            print(
+                f"{result['scale']:>9} {label:<54}{throughput:>+10.1%}{p99:>+10.1%}",
+            )
+
+
+def commit() -> str | None:
+    """Return the commit the benchmark runs on, if it runs in a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],  # noqa: S607
+            cwd=REPOSITORY,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--scales",
+        type=int,
+        nargs="+",
+        default=[1_000, 100_000, 1_000_000],
+        help="characters and items to seed",
+    )
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=50, help="per client")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Results of an earlier run to compare to")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    results = []
+    for scale in args.scales:
+        result = run_scale(scale, args.clients, args.requests)
+        results.append(result)
+        print(
+            f"\n{scale} characters and items, seeded in {result['seed_seconds']:.1f} s",
+        )
+        print(
+            f"{'route':<64}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}",
+        )
+        for label, stats in [*result["routes"].items(), ("all", result["all"])]:
+            print(
+                f"{label:<64}{stats['throughput']:>8.1f}{stats['p50_ms']:>9.1f}"
+                f"{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}"
+                f"{stats.get('errors', ''):>8}",
+            )
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(
+                {
+                    "commit": commit(),
+                    "clients": args.clients,
+                    "requests": args.requests,
+                    "results": results,
+                },
+                file,
+                indent=4,
+            )
+    if args.compare:
+        with open(args.compare) as file:
+            compare(results, json.load(file)["results"])
+
+
+if __name__ == "__main__":
+    main()
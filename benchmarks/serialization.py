@@ -0,0 +1,107 @@
+"""Benchmark the JSON serializer against the stdlib paths it replaces."""
+
+import argparse
+import json
+import time
+import uuid
+from collections.abc import Callable
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from pyphoria.helper import serializer
+from pyphoria.models import Item
+
+
+def timed(function: Callable[[], object], repeat: int) -> float:
+    """Return the best wall time of ``repeat`` calls in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def items(size: int) -> list[Item]:  # noqa: D103
+    return [
+        Item(
+            id=uuid.uuid4(),
+            name=f"item-{i}",
+            type="weapon",
+            description="A sharp and shiny test item.",
+            stackable=i % 2 == 0,
+            max_stack=100,
+            unique_store=False,
+            unique_equipped=False,
+            icon="",
+            damage_fire=1 + i % 7,
+            damage_physical=1 + i % 11,
+            requirement_dexterity=1,
+            requirement_intelligence=1,
+            requirement_level=1 + i % 60,
+            requirement_strength=1,
+        )
+        for i in range(size)
+    ]
+
+
+def inventory(size: int) -> dict:
+    """Return an inventory file in the layout of the JSON Inventory model."""
+    items = {}
+    for i in range(size):
+        item_id = uuid.uuid4()
+        items[str(item_id)] = {"item_id": item_id, "amount": 1 + i % 100}
+    return {
+        "slots": size,
+        "items": items,
+        "gold": 0,
+        "inventory_id": uuid.uuid4(),
+        "character_id": uuid.uuid4(),
+    }
+
+
+def run(item_count: int, inventory_size: int, repeat: int) -> None:  # noqa: D103
+    print(f"backend: {serializer.BACKEND}")
+    rows = items(item_count)
+    # what FastAPI hands to the response class after validating the response model
+    content = TypeAdapter(list[Item]).dump_python(rows, mode="json")
+    stdlib_response = JSONResponse.__new__(JSONResponse)
+    fast_response = serializer.FastJSONResponse.__new__(serializer.FastJSONResponse)
+    print(f"{item_count} items{'ms':>36}")
+    for label, function in (
+        ("jsonable_encoder + json.dumps", lambda: json.dumps(jsonable_encoder(rows))),
+        ("JSONResponse.render", lambda: stdlib_response.render(content)),
+        ("FastJSONResponse.render", lambda: fast_response.render(content)),
+    ):
+        print(f"  {label:<36}{timed(function, repeat):>8.2f}")
+
+    data = inventory(inventory_size)
+    stdlib = json.dumps(data, indent=4, default=str).encode()
+    fast = serializer.dumps(data)
+    print(f"inventory file with {inventory_size} items{'ms':>21}{'bytes':>12}")
+    for label, function, size in (
+        (
+            "json.dumps(indent=4, default=str)",
+            lambda: json.dumps(data, indent=4, default=str),
+            len(stdlib),
+        ),
+        ("serializer.dumps", lambda: serializer.dumps(data), len(fast)),
+        ("json.loads", lambda: json.loads(stdlib), len(stdlib)),
+        ("serializer.loads", lambda: serializer.loads(fast), len(fast)),
+    ):
+        print(f"  {label:<36}{timed(function, repeat):>8.2f}{size:>12}")
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--inventory-size", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.items, args.inventory_size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compare read and write throughput of the database engine profiles.
+
+Reader threads look up random rows while a single writer keeps committing small
+transactions, the way the API uses the database.
+"""
+
+import argparse
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import text
+
+from pyphoria.helper.database import PROFILES, create_engine
+
+
+def run(profile: str, readers: int, rows: int, duration: float) -> dict:
+    """Return the reads and writes per second of the profile."""
+    path = Path(tempfile.mkdtemp(prefix="pyphoria-bench-")) / "database.db"
+    engine = create_engine(f"sqlite:///{path}", profile)
+    with engine.begin() as connection:
+        connection.execute(
+            text("CREATE TABLE entry (id INTEGER PRIMARY KEY, value INTEGER)"),
+        )
+        connection.execute(
+            text("INSERT INTO entry (id, value) VALUES (:id, 0)"),
+            [{"id": i} for i in range(rows)],
+        )
+
+    stop = threading.Event()
+    reads = [0] * readers
+    writes = [0]
+
+    def read(number: int) -> None:
+        with engine.connect() as connection:
+            while not stop.is_set():
+                connection.execute(
+                    text("SELECT value FROM entry WHERE id = :id"),
+                    {"id": random.randrange(rows)},
+                ).one()
+                connection.commit()
+                reads[number] += 1
+
+    def write() -> None:
+        with engine.connect() as connection:
+            while not stop.is_set():
+                connection.execute(
+                    text("UPDATE entry SET value = value + 1 WHERE id = :id"),
+                    {"id": random.randrange(rows)},
+                )
+                connection.commit()
+                writes[0] += 1
+
+    threads = [threading.Thread(target=read, args=(n,)) for n in range(readers)]
+    threads.append(threading.Thread(target=write))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    return {"reads": sum(reads) / duration, "writes": writes[0] / duration}
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profiles", nargs="+", default=sorted(PROFILES))
+    parser.add_argument(
+        "--readers",
+        type=int,
+        default=4,
+        help="at most the readers of the smallest profile",
+    )
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{'profile':<12} {'reads/s':>10} {'writes/s':>10}")
+    for profile in args.profiles:
+        result = run(profile, args.readers, args.rows, args.duration)
+        print(f"{profile:<12} {result['reads']:>10.0f} {result['writes']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
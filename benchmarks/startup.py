@@ -0,0 +1,117 @@
+"""
+Measure the cold start of a worker.
+
+Every run is a fresh interpreter that imports the app and runs its lifespan
+startup against an already migrated database, the way an autoscaled worker
+boots. The schema version check is compared with the ``create_all`` workers used
+to run on every boot, the slowest imports are listed, and modules the server
+must not load eagerly, like NumPy, are reported. Exits non-zero when the median
+cold start is over ``--target-ms``.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.http_concurrency import REPOSITORY
+
+# only needed by the mechanics and the command line tools
+LAZY_MODULES = ("numpy", "pyphoria.mechanics", "pyphoria.helper.files")
+
+_BOOT = """
+import json, sys, time
+start = time.perf_counter()
+import pyphoria.main as api
+imported = time.perf_counter()
+if sys.argv[1] == "create_all":
+    from sqlmodel import SQLModel
+    SQLModel.metadata.create_all(api.engine)
+else:
+    from pyphoria.helper.migrations import check
+    check(api.engine)
+started = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (started - imported) * 1000,
+    "loaded": [name for name in sys.argv[2:] if name in sys.modules],
+}))
+"""
+
+
+def boot(mode: str, environment: dict[str, str]) -> dict:
+    """Import the app and run its startup in a fresh interpreter."""
+    output = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", _BOOT, mode, *LAZY_MODULES],
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def slowest_imports(environment: dict[str, str], count: int) -> list[tuple[int, str]]:
+    """Return the modules with the most import time of their own, in microseconds."""
+    lines = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import pyphoria.main"],
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr.splitlines()
+    timings = []
+    # "import time: self [us] | cumulative | imported package", after a header
+    for line in lines[1:]:
+        own, _, name = line.removeprefix("import time:").split("|")
+        timings.append((int(own), name.strip()))
+    return sorted(timings, reverse=True)[:count]
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--target-ms", type=float, default=2000)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="pyphoria-startup-")
+    environment = {
+        **os.environ,
+        "PYTHONPATH": str(REPOSITORY),
+        "PYPHORIA_SQLITE_DB": f"{directory}/benchmark.db",
+    }
+    subprocess.run(
+        [sys.executable, "-m", "pyphoria.helper.migrations"],
+        env=environment,
+        capture_output=True,
+        check=True,
+    )
+
+    print(f"{'startup':<12}{'import ms':>10}{'startup ms':>12}{'total ms':>10}")
+    totals = {}
+    for mode in ("create_all", "check"):
+        runs = [boot(mode, environment) for _ in range(args.runs)]
+        imported = statistics.median(run["import_ms"] for run in runs)
+        started = statistics.median(run["startup_ms"] for run in runs)
+        totals[mode] = imported + started
+        print(f"{mode:<12}{imported:>10.1f}{started:>12.1f}{totals[mode]:>10.1f}")
+    loaded = runs[-1]["loaded"]
+
+    print("\nslowest imports, own time")
+    for own, name in slowest_imports(environment, args.top):
+        print(f"{own / 1000:>8.1f} ms  {name}")
+    print(
+        f"\nloaded eagerly: {', '.join(loaded) or 'none of ' + ', '.join(LAZY_MODULES)}",
+    )
+
+    if totals["check"] > args.target_ms:
+        print(f"cold start of {totals['check']:.0f} ms is over {args.target_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Compare how UUID keys are stored and generated.
+
+For every combination of storage (hex text or 16 byte blob) and UUID version
+(random 4 or time ordered 7) a parent and a child table shaped like inventory
+and character are filled with ``--rows`` rows each, with the pragmas of the
+production profile. Reported are the insert throughput, the size of the tables
+and their indexes, point lookups joining child to parent, and a full join.
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+from collections.abc import Callable
+
+from pyphoria.helper.database import PROFILES
+from pyphoria.helper.identifiers import uuid7
+
+BATCH = 100_000
+
+STORAGES: dict[str, tuple[str, Callable[[uuid.UUID], bytes | str]]] = {
+    "hex": ("CHAR(32)", lambda key: key.hex),
+    "binary": ("BLOB", lambda key: key.bytes),
+}
+VERSIONS: dict[int, Callable[[], uuid.UUID]] = {4: uuid.uuid4, 7: uuid7}
+
+
+def run_case(
+    directory: str,
+    storage: str,
+    version: int,
+    rows: int,
+    lookups: int,
+) -> dict:
+    """Fill the tables of one case and measure them."""
+    column, stored = STORAGES[storage]
+    generate = VERSIONS[version]
+    path = f"{directory}/{storage}-{version}.db"
+    connection = sqlite3.connect(path, isolation_level=None)
+    for pragma, value in PROFILES["production"].pragmas.items():
+        connection.execute(f"PRAGMA {pragma}={value}")
+    connection.execute("PRAGMA foreign_keys=ON")
+    connection.execute(f"CREATE TABLE parent (id {column} PRIMARY KEY, slots INTEGER)")
+    connection.execute(
+        f"CREATE TABLE child (id {column} PRIMARY KEY, name TEXT, "
+        f"parent_id {column} REFERENCES parent (id))",
+    )
+    connection.execute("CREATE INDEX ix_child_parent_id ON child (parent_id)")
+
+    sample: list = []
+    elapsed = 0.0
+    for start in range(0, rows, BATCH):
+        size = min(BATCH, rows - start)
+        # the keys are generated outside the timing, as the app does before insert
+        parents = [stored(generate()) for _ in range(size)]
+        children = [
+            (stored(generate()), f"Name{start + n}", parent)
+            for n, parent in enumerate(parents)
+        ]
+        if len(sample) < lookups:
+            sample += [child[0] for child in children[: lookups - len(sample)]]
+        begin = time.perf_counter()
+        connection.execute("BEGIN")
+        connection.executemany(
+            "INSERT INTO parent VALUES (?, 10)",
+            ((key,) for key in parents),
+        )
+        connection.executemany("INSERT INTO child VALUES (?, ?, ?)", children)
+        connection.execute("COMMIT")
+        elapsed += time.perf_counter() - begin
+
+    sizes = dict(
+        connection.execute(
+            "SELECT name, sum(pgsize) FROM dbstat GROUP BY name",
+        ).fetchall(),
+    )
+    indexes = sum(
+        size
+        for name, size in sizes.items()
+        if name.startswith(("sqlite_autoindex", "ix_"))
+    )
+
+    random.shuffle(sample)
+    begin = time.perf_counter()
+    for key in sample:
+        connection.execute(
+            "SELECT child.name, parent.slots FROM child "
+            "JOIN parent ON parent.id = child.parent_id WHERE child.id = ?",
+            (key,),
+        ).fetchone()
+    lookup_seconds = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    connection.execute(
+        "SELECT count(*) FROM child JOIN parent ON parent.id = child.parent_id",
+    ).fetchone()
+    join_seconds = time.perf_counter() - begin
+    connection.close()
+    file_size = os.path.getsize(path)  # noqa: PTH202
+    os.remove(path)  # noqa: PTH107
+    return {
+        "inserts": 2 * rows / elapsed,
+        "tables_mb": sum(sizes.values()) / 2**20 - indexes / 2**20,
+        "indexes_mb": indexes / 2**20,
+        "file_mb": file_size / 2**20,
+        "lookups": len(sample) / lookup_seconds,
+        "join_s": join_seconds,
+    }
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000_000, help="per table")
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--directory", help="where to create the databases")
+    args = parser.parse_args()
+    directory = args.directory or tempfile.mkdtemp(prefix="pyphoria-uuid-")
+
+    print(
+        f"{'storage':<8}{'uuid':>5}{'inserts/s':>12}{'tables MB':>11}"
+        f"{'indexes MB':>12}{'file MB':>9}{'lookups/s':>11}{'join s':>8}",
+    )
+    for storage in STORAGES:
+        for version in VERSIONS:
+            result = run_case(directory, storage, version, args.rows, args.lookups)
+            print(
+                f"{storage:<8}{version:>5}{result['inserts']:>12,.0f}"
+                f"{result['tables_mb']:>11.1f}{result['indexes_mb']:>12.1f}"
+                f"{result['file_mb']:>9.1f}{result['lookups']:>11,.0f}"
+                f"{result['join_s']:>8.2f}",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Set based bulk inserts and upserts."""
+
+from collections.abc import Sequence
+from enum import StrEnum
+
+from fastapi import HTTPException, status
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, SQLModel
+
+
+class ConflictMode(StrEnum):
+    """What to do with rows clashing with a unique index."""
+
+    error = "error"
+    ignore = "ignore"
+    update = "update"
+
+
+def bulk_insert(  # noqa: PLR0913
+    session: Session,
+    model: type[SQLModel],
+    rows: Sequence[dict],
+    on_conflict: ConflictMode = ConflictMode.error,
+    *,
+    conflict_columns: Sequence[str] = ("name",),
+    keep_columns: Sequence[str] = (),
+) -> int:
+    """
+    Insert the rows with a single executemany in the current transaction.
+
+    With ``ignore`` rows clashing on the unique ``conflict_columns`` are skipped, with
+    ``update`` they overwrite the existing row but keep its id. Clashes in ``error``
+    mode roll the transaction back and raise a 409, rows referring to missing rows
+    a 422 in every mode. ``keep_columns`` are never overwritten by an update.
+    Returns the number of rows inserted or updated.
+    """
+    if not rows:
+        return 0
+    table = model.__table__
+    statement = insert(table)
+    if on_conflict == ConflictMode.ignore:
+        statement = statement.on_conflict_do_nothing(index_elements=conflict_columns)
+    elif on_conflict == ConflictMode.update:
+        statement = statement.on_conflict_do_update(
+            index_elements=conflict_columns,
+            set_={
+                column.name: statement.excluded[column.name]
+                for column in table.columns
+                if column.name not in {"id", *conflict_columns, *keep_columns}
+            },
+        )
+    try:
+        result = session.execute(statement, rows)
+    except IntegrityError as error:
+        session.rollback()
+        if "FOREIGN KEY" in str(error.orig):
+            raise HTTPException(
+                status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"{table.name} rows refer to rows that do not exist",
+            ) from None
+        raise HTTPException(
+            status.HTTP_409_CONFLICT,
+            detail=f"Conflicting {table.name} rows: {error.orig}",
+        ) from None
+    # skipped rows are not counted, updated ones are
+    return result.rowcount
@@ -0,0 +1,252 @@
+"""In-memory read-through cache of the static game data."""
+
+import bisect
+import hashlib
+import threading
+import uuid
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Self
+
+from fastapi import Request, Response, status
+from sqlalchemy import Engine
+from sqlmodel import Session, SQLModel, select
+
+from pyphoria.helper.pagination import Page, page_response, selected_columns
+
+
+@dataclass(frozen=True)
+class CatalogTable:
+    """
+    Snapshot of a table held in memory.
+
+    Attributes
+        rows (list[SQLModel]): The detached rows ordered by id.
+        ids (list[uuid.UUID]): The ids of the rows in the same order.
+        by_id (dict[uuid.UUID, SQLModel]): The rows by id.
+        by_name (dict[str, SQLModel]): The rows by name.
+        etag (str): Strong validator computed from the content of the rows.
+        last_modified (datetime): When this worker saw the table change last.
+
+    """
+
+    rows: list[SQLModel]
+    ids: list[uuid.UUID]
+    by_id: dict[uuid.UUID, SQLModel]
+    by_name: dict[str, SQLModel]
+    etag: str
+    last_modified: datetime
+
+
+def _is_current(snapshot: CatalogTable, request: Request) -> bool:
+    """Return whether the conditional headers of the request match the snapshot."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return snapshot.etag in tags or "*" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return since.tzinfo is not None and snapshot.last_modified <= since
+
+
+class Catalog:
+    """
+    Read-through cache of tables that almost never change, like species and items.
+
+    A table is loaded on its first lookup and served from memory until the routes
+    writing it call ``invalidate``. The cache lives in the worker process, other
+    workers only see the change once they are invalidated themselves. A table is
+    read without holding the lock of the cache, so lookups of the other tables go
+    on meanwhile. Only one thread loads a table, the others wait for its snapshot.
+
+    Attributes
+        hits (int): The number of lookups served from memory.
+        misses (int): The number of lookups that had to load their table.
+
+    """
+
+    def __init__(
+        self: Self,
+        engine: Engine,
+        models: Iterable[type[SQLModel]],
+    ) -> None:
+        """Cache the tables of the models, nothing is loaded until first use."""
+        self.engine = engine
+        self.models = tuple(models)
+        self.hits = 0
+        self.misses = 0
+        self._tables: dict[type[SQLModel], CatalogTable] = {}
+        self._generations: dict[type[SQLModel], int] = dict.fromkeys(self.models, 0)
+        self._modified: dict[type[SQLModel], datetime] = {}
+        self._lock = threading.Lock()
+        self._loading = {model: threading.Lock() for model in self.models}
+
+    def cached(self: Self, model: type[SQLModel]) -> CatalogTable | None:
+        """Return the snapshot of the model's table if it is in memory."""
+        with self._lock:
+            snapshot = self._tables.get(model)
+            if snapshot is not None:
+                self.hits += 1
+        return snapshot
+
+    def table(
+        self: Self,
+        model: type[SQLModel],
+        session: Session | None = None,
+    ) -> CatalogTable:
+        """
+        Return the snapshot of the model's table, loading it on a miss.
+
+        A route holding a session passes it, a miss then loads through its
+        connection instead of taking a second one from the pool.
+        """
+        snapshot = self.cached(model)
+        if snapshot is not None:
+            return snapshot
+        with self._loading[model]:
+            with self._lock:
+                # another thread loaded the table while this one waited
+                snapshot = self._tables.get(model)
+                if snapshot is not None:
+                    self.hits += 1
+                    return snapshot
+                self.misses += 1
+                generation = self._generations[model]
+                last_modified = self._modified.setdefault(
+                    model,
+                    datetime.now(UTC).replace(microsecond=0),
+                )
+            snapshot = self._load(model, last_modified, session)
+            with self._lock:
+                # a write during the load made the snapshot stale, serve it only once
+                if self._generations[model] == generation:
+                    self._tables[model] = snapshot
+        return snapshot
+
+    def invalidate(self: Self, model: type[SQLModel]) -> None:
+        """Drop the snapshot of the model's table, call after committing a write."""
+        with self._lock:
+            self._generations[model] += 1
+            # Last-Modified has a resolution of seconds, never hand out one twice
+            modified = datetime.now(UTC).replace(microsecond=0)
+            previous = self._modified.get(model)
+            if previous is not None and modified <= previous:
+                modified = previous + timedelta(seconds=1)
+            self._modified[model] = modified
+            self._tables.pop(model, None)
+
+    def get(
+        self: Self,
+        model: type[SQLModel],
+        key: uuid.UUID,
+        session: Session | None = None,
+    ) -> SQLModel | None:
+        """Return the row with the id."""
+        return self.table(model, session).by_id.get(key)
+
+    def get_by_name(self: Self, model: type[SQLModel], name: str) -> SQLModel | None:
+        """Return the row with the name."""
+        return self.table(model).by_name.get(name)
+
+    def stats(self: Self) -> dict:
+        """Return the hit and miss counters and the number of cached rows per table."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "tables": {
+                    model.__tablename__: len(snapshot.rows)
+                    for model, snapshot in self._tables.items()
+                },
+            }
+
+    def page(
+        self: Self,
+        model: type[SQLModel],
+        page: Page,
+        request: Request,
+        response: Response,
+        snapshot: CatalogTable | None = None,
+    ) -> Sequence[SQLModel] | Response:
+        """Return a page of the table like ``paginate`` does, or a 304."""
+        if snapshot is None:
+            snapshot = self.table(model)
+        not_modified = self.not_modified(snapshot, request, response)
+        if not_modified is not None:
+            return not_modified
+        start = bisect.bisect_right(snapshot.ids, page.after) if page.after else 0
+        rows = snapshot.rows[start : start + page.limit + 1]
+        columns = selected_columns(model, page)
+        if not columns:
+            return page_response(rows, page, response)
+        projected = [tuple(getattr(row, name) for name in columns) for row in rows]
+        result = page_response(projected, page, response, columns)
+        for header in ("ETag", "Last-Modified"):
+            result.headers[header] = response.headers[header]
+        return result
+
+    def lookup(
+        self: Self,
+        model: type[SQLModel],
+        key: uuid.UUID,
+        request: Request,
+        response: Response,
+        snapshot: CatalogTable | None = None,
+    ) -> SQLModel | Response | None:
+        """Return the row with the id, or a 304."""
+        if snapshot is None:
+            snapshot = self.table(model)
+        not_modified = self.not_modified(snapshot, request, response)
+        if not_modified is not None:
+            return not_modified
+        return snapshot.by_id.get(key)
+
+    def not_modified(
+        self: Self,
+        snapshot: CatalogTable,
+        request: Request,
+        response: Response,
+    ) -> Response | None:
+        """Return a 304 if the client's copy is current, else add the validators."""
+        headers = {
+            "ETag": snapshot.etag,
+            "Last-Modified": format_datetime(snapshot.last_modified, usegmt=True),
+        }
+        if _is_current(snapshot, request):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+        return None
+
+    def _load(
+        self: Self,
+        model: type[SQLModel],
+        last_modified: datetime,
+        session: Session | None = None,
+    ) -> CatalogTable:
+        """Read the whole table and fingerprint its content."""
+        # a session of its own keeps the rows out of the identity map of the request
+        bind = self.engine if session is None else session.connection()
+        with Session(bind) as loader:
+            rows = list(loader.exec(select(model).order_by(model.id)).all())
+            loader.expunge_all()
+
+        columns = [column.name for column in model.__table__.columns]
+        digest = hashlib.blake2b(digest_size=16)
+        for row in rows:
+            digest.update(repr(tuple(getattr(row, name) for name in columns)).encode())
+
+        return CatalogTable(
+            rows=rows,
+            ids=[row.id for row in rows],
+            by_id={row.id: row for row in rows},
+            by_name={row.name: row for row in rows},
+            etag=f'"{digest.hexdigest()}"',
+            last_modified=last_modified,
+        )
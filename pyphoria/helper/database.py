@@ -0,0 +1,89 @@
+"""Shared SQLite engine factory."""
+
+import os
+from dataclasses import dataclass, field
+
+from sqlalchemy import Engine, event
+from sqlmodel import create_engine as sqlmodel_create_engine
+
+SQLITE_DB = os.environ.get("PYPHORIA_SQLITE_DB", "database.db")
+sqlite_url = f"sqlite:///{SQLITE_DB}"
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    """
+    Connection settings of an engine.
+
+    Attributes
+        pragmas (dict[str, str | int]): The PRAGMAs run on every new connection.
+        readers (int): The number of pooled connections for readers, one more is added for the writer.
+        pool_timeout (float): The seconds to wait for a pooled connection.
+
+    """
+
+    pragmas: dict[str, str | int] = field(default_factory=dict)
+    readers: int = 4
+    pool_timeout: float = 30
+
+    @property
+    def pool_size(self: "EngineProfile") -> int:
+        """Return the number of pooled connections, the readers plus a single writer."""
+        return self.readers + 1
+
+
+PROFILES: dict[str, EngineProfile] = {
+    # SQLite defaults: rollback journal, synchronous=FULL, readers wait for writers
+    "default": EngineProfile(),
+    # WAL lets readers run next to the single writer, synchronous=NORMAL is durable
+    # in WAL mode except for the last transactions on power loss
+    "production": EngineProfile(
+        pragmas={
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+            "cache_size": -64000,  # 64 MiB
+            "mmap_size": 268435456,  # 256 MiB
+            "temp_store": "MEMORY",
+        },
+        readers=int(os.environ.get("PYPHORIA_DB_READERS", "8")),
+    ),
+}
+DB_PROFILE = os.environ.get("PYPHORIA_DB_PROFILE", "production")
+
+
+def create_engine(
+    url: str = sqlite_url,
+    profile: str = DB_PROFILE,
+    *,
+    echo: bool = False,
+) -> Engine:
+    """Create a SQLite engine configured by the named profile."""
+    try:
+        settings = PROFILES[profile]
+    except KeyError:
+        msg = f"Unknown database profile {profile!r}, choose one of {sorted(PROFILES)}"
+        raise ValueError(msg) from None
+
+    engine = sqlmodel_create_engine(
+        url,
+        echo=echo,
+        connect_args={"check_same_thread": False},
+        pool_size=settings.pool_size,
+        max_overflow=0,
+        pool_timeout=settings.pool_timeout,
+    )
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record) -> None:  # noqa: ANN001, ARG001
+        cursor = dbapi_connection.cursor()
+        # SQLite ignores foreign keys unless every connection asks for them
+        cursor.execute("PRAGMA foreign_keys=ON")
+        for pragma, value in settings.pragmas.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+        cursor.close()
+
+    return engine
+
+
+engine: Engine = create_engine()
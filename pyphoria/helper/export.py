@@ -0,0 +1,98 @@
+"""Streaming NDJSON dumps of whole tables."""
+
+import os
+import zlib
+from collections.abc import Iterator
+from enum import StrEnum
+
+from sqlalchemy import Engine, Table, select
+
+from pyphoria.helper.identifiers import UUIDType, stored, to_text
+from pyphoria.helper.serializer import dumps
+from pyphoria.models import Character, Inventory, InventoryItemLink
+
+# rows fetched from the cursor and encoded per chunk of the response
+EXPORT_BATCH = int(os.environ.get("PYPHORIA_EXPORT_BATCH", "1000"))
+# 1 compresses NDJSON almost as well as 6 at several times the speed
+GZIP_LEVEL = 1
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class ExportTable(StrEnum):
+    """The tables that can be exported."""
+
+    character = "character"
+    inventory = "inventory"
+    inventoryitemlink = "inventoryitemlink"
+
+
+TABLES: dict[ExportTable, Table] = {
+    ExportTable.character: Character.__table__,
+    ExportTable.inventory: Inventory.__table__,
+    ExportTable.inventoryitemlink: InventoryItemLink.__table__,
+}
+
+
+def ndjson_chunks(engine: Engine, table: Table) -> Iterator[bytes]:
+    """
+    Yield the rows of the table as JSON lines, ``EXPORT_BATCH`` rows per chunk.
+
+    The rows are stepped from the cursor in table order while the chunks are sent,
+    so memory stays flat and the first chunk is ready after the first batch. The
+    export reads a single snapshot, in WAL mode the writers carry on meanwhile.
+    """
+    # the key first, the way the list routes send the rows
+    columns = [
+        *table.primary_key.columns,
+        *(column for column in table.columns if not column.primary_key),
+    ]
+    names = [column.name for column in columns]
+    # the keys are read as stored and printed directly instead of parsing them
+    # into UUIDs first, which took most of the time of an export
+    keys = [
+        position
+        for position, column in enumerate(columns)
+        if isinstance(column.type, UUIDType)
+    ]
+    statement = select(
+        *(
+            stored(column) if isinstance(column.type, UUIDType) else column
+            for column in columns
+        ),
+    )
+    with engine.connect() as connection:
+        result = connection.execution_options(yield_per=EXPORT_BATCH).execute(
+            statement,
+        )
+        for rows in result.partitions():
+            lines = []
+            for row in rows:
+                values = list(row)
+                for position in keys:
+                    if values[position] is not None:
+                        values[position] = to_text(values[position])
+                lines.append(dumps(dict(zip(names, values, strict=True))))
+            lines.append(b"")
+            yield b"\n".join(lines)
+
+
+def gzip_chunks(chunks: Iterator[bytes], level: int = GZIP_LEVEL) -> Iterator[bytes]:
+    """
+    Compress the chunks into a single gzip stream.
+
+    Every chunk is flushed, so the client can decompress what has arrived so far
+    instead of waiting for the compressor to fill a block.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    """Return whether the Accept-Encoding header allows gzip."""
+    for coding in (accept_encoding or "").split(","):
+        name, _, parameters = coding.partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            return parameters.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00")
+    return False
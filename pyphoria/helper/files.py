@@ -1,5 +1,11 @@
-import json  # noqa: D100
+import copy  # noqa: D100
+import json
 import os
+import threading
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Self, TextIO
+
+from pyphoria.helper import serializer
 
 # _filepath = Path(__file__)  # noqa: ERA001
 # pyphoria_path = Path.parent(Path.parent(Path.resolve(Path(_filepath))))  # noqa: ERA001
@@ -21,31 +27,365 @@ import os
 #     with open(f"{pyphoria_path}/{file_name}", "w") as file:
 #         json.dump(data, file, indent=4)  # noqa: ERA001
 
-pyphoria_path = os.path.dirname(
-    os.path.dirname(os.path.abspath(__file__))
-)  # noqa: PTH100, PTH120
+pyphoria_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # noqa: PTH100, PTH120
 
 
 def create_path_and_file(file_name: str) -> None:  # noqa: D103
-    if not os.path.exists(
-        f"{pyphoria_path}/{os.path.dirname(file_name)}"
-    ):  # noqa: PTH110, PTH120
-        os.makedirs(
-            f"{pyphoria_path}/{os.path.dirname(file_name)}"
-        )  # noqa: PTH103, PTH120
+    if not os.path.exists(f"{pyphoria_path}/{os.path.dirname(file_name)}"):  # noqa: PTH110, PTH120
+        os.makedirs(f"{pyphoria_path}/{os.path.dirname(file_name)}")  # noqa: PTH103, PTH120
     if not os.path.exists(f"{pyphoria_path}/{file_name}"):  # noqa: PTH110
         open(f"{pyphoria_path}/{file_name}", "w").close()
 
 
+# Every file is a JSON snapshot plus a journal of the values written since. An
+# entry sets or deletes the value at a path of keys, the empty path standing for
+# the whole file. The models name the paths they changed, so a save journals only
+# those values, adding an item to an inventory appends that item rather than
+# every item, and costs as much as the change no matter how large the file is.
+# Once the journal outgrows the snapshot both are compacted into a new snapshot.
+JOURNAL_SUFFIX = ".journal"
+COMPACT_MIN_BYTES = 64 * 1024
+# bytes read at a time from the end of a journal when looking for its last line
+JOURNAL_TAIL_CHUNK = 4096
+
+_lock = threading.RLock()
+# sizes of the files read or written in this process, their journals are repaired
+_journal_bytes: dict[str, int] = {}
+_snapshot_bytes: dict[str, int] = {}
+_DELETED = object()
+
+
+def forget() -> None:
+    """Forget what was read and written, the next access reads the files again."""
+    with _lock:
+        _journal_bytes.clear()
+        _snapshot_bytes.clear()
+
+
+def _path(entry: dict) -> list:
+    # journals written before the paths hold the top-level key of every entry
+    return entry["path"] if "path" in entry else [entry["key"]]
+
+
+def _apply(data: dict, path: list, op: str, value: object = None) -> None:
+    """Set or delete the value at the path, creating the objects on the way."""
+    if not path:
+        data.clear()
+        if op == "set":
+            data.update(value)
+        return
+    *parents, last = path
+    for key in parents:
+        child = data.get(key)
+        if not isinstance(child, dict):
+            child = data[key] = {}
+        data = child
+    if op == "set":
+        data[last] = value
+    else:
+        data.pop(last, None)
+
+
+def journal_entries(
+    data: dict,
+    changed: Iterable[Sequence[str]],
+    *,
+    copy_values: bool = True,
+) -> list[dict]:
+    """
+    Return the journal entries of the current values at the changed paths.
+
+    A path without a value, like the one of a deleted key, journals its deletion.
+    The values are copied unless ``copy_values`` is off, so the data may change
+    while the entries wait to be written.
+    """
+    entries = []
+    for path in changed:
+        value = data
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                value = _DELETED
+                break
+            value = value[key]
+        if value is _DELETED:
+            entries.append({"op": "del", "path": list(path)})
+        else:
+            value = copy.deepcopy(value) if copy_values else value
+            entries.append({"op": "set", "path": list(path), "value": value})
+    return entries
+
+
+def _read_journal(file_name: str, *, repair: bool = False) -> tuple[list, int]:
+    """
+    Return the complete entries of the journal of the file and their size.
+
+    A crash in the middle of an append leaves a partial last line, which is
+    ignored, and with ``repair`` cut off so the next appends are not glued to it.
+    """
+    path = f"{pyphoria_path}/{file_name}{JOURNAL_SUFFIX}"
+    entries: list = []
+    size = 0
+    if not os.path.exists(path):  # noqa: PTH110
+        return entries, size
+    with open(path, "r+b" if repair else "rb") as journal:
+        for line in journal:
+            try:
+                entry = serializer.loads(line) if line.endswith(b"\n") else None
+            except serializer.DecodeError:
+                entry = None
+            if entry is None:
+                if repair:
+                    journal.truncate(size)
+                break
+            entries.append((_path(entry), entry["op"], entry.get("value")))
+            size += len(line)
+    return entries, size
+
+
+def _repair_tail(file_name: str) -> int:
+    """Cut off a partial last line of the journal, return the size of the journal."""
+    path = f"{pyphoria_path}/{file_name}{JOURNAL_SUFFIX}"
+    if not os.path.exists(path):  # noqa: PTH110
+        return 0
+    with open(path, "r+b") as journal:
+        end = position = journal.seek(0, os.SEEK_END)
+        # only the end of the journal is read, however long it is
+        while position:
+            start = max(0, position - JOURNAL_TAIL_CHUNK)
+            journal.seek(start)
+            newline = journal.read(position - start).rfind(b"\n")
+            if newline != -1:
+                position = start + newline + 1
+                break
+            position = start
+        if position < end:
+            journal.truncate(position)
+    return position
+
+
+def _open_journal(file_name: str) -> None:
+    """Repair the journal of the file and note the sizes, once per process."""
+    if file_name in _journal_bytes:
+        return
+    path = f"{pyphoria_path}/{file_name}"
+    exists = os.path.exists(path)  # noqa: PTH110
+    _snapshot_bytes[file_name] = os.path.getsize(path) if exists else 0  # noqa: PTH202
+    _journal_bytes[file_name] = _repair_tail(file_name)
+
+
+def _replay_journal(file_name: str, data: dict) -> int:
+    """Apply the journal of the file to the data and return the journal size."""
+    entries, size = _read_journal(file_name, repair=True)
+    for path, op, value in entries:
+        _apply(data, path, op, value)
+    return size
+
+
 def read_json(file_name: str) -> dict:  # noqa: D103
-    with open(f"{pyphoria_path}/{file_name}", "r") as file:
+    with _lock, open(f"{pyphoria_path}/{file_name}", "rb") as file:
+        snapshot = file.read()
         try:
-            data = json.load(file)
-        except json.decoder.JSONDecodeError:
+            data = serializer.loads(snapshot)
+        except serializer.DecodeError:
             data = {}
+        _snapshot_bytes[file_name] = len(snapshot)
+        _journal_bytes[file_name] = _replay_journal(file_name, data)
     return data
 
 
-def write_json(file_name: str, data: dict) -> None:  # noqa: D103
-    with open(f"{pyphoria_path}/{file_name}", "w") as file:
-        json.dump(data, file, indent=4, default=str)
+def _append(file_name: str, entries: list[dict]) -> int:
+    """Append the entries to the journal of the file, return the bytes appended."""
+    _open_journal(file_name)
+    lines = b"".join(serializer.dumps(entry) + b"\n" for entry in entries)
+    with open(f"{pyphoria_path}/{file_name}{JOURNAL_SUFFIX}", "ab") as journal:
+        journal.write(lines)
+    _journal_bytes[file_name] += len(lines)
+    return len(lines)
+
+
+def write_journal(file_name: str, entries: list[dict]) -> None:
+    """Append the entries to the journal, compacting once it outgrows the snapshot."""
+    with _lock:
+        if entries and _append(file_name, entries) > 0:
+            limit = max(COMPACT_MIN_BYTES, _snapshot_bytes[file_name])
+            if _journal_bytes[file_name] > limit:
+                compact(file_name)
+
+
+def write_json(
+    file_name: str,
+    data: dict,
+    changed: Iterable[Sequence[str]] | None = None,
+) -> None:
+    """Persist the values at the changed paths of the data, or all of it."""
+    if changed is None:
+        compact(file_name, data)
+    else:
+        write_journal(file_name, journal_entries(data, changed, copy_values=False))
+
+
+def compact(file_name: str, data: dict | None = None) -> None:
+    """Write the data, or the data read, atomically as the snapshot, empty the journal."""
+    with _lock:
+        if data is None:
+            data = read_json(file_name)
+        else:
+            _open_journal(file_name)
+            if _journal_bytes[file_name]:
+                # the journal has to lead to the data too, see below
+                _append(file_name, [{"op": "set", "path": [], "value": data}])
+        path = f"{pyphoria_path}/{file_name}"
+        snapshot = serializer.dumps(data)
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(snapshot)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)  # noqa: PTH105
+        # a crash before the journal is emptied replays it over the new snapshot,
+        # every entry then sets a value it has already, which changes nothing
+        with open(f"{path}{JOURNAL_SUFFIX}", "wb"):
+            pass
+        _snapshot_bytes[file_name] = len(snapshot)
+        _journal_bytes[file_name] = 0
+
+
+READ_CHUNK = 1024 * 1024
+# a top-level entry may take this many characters, a malformed file stops there
+# instead of being read into memory
+MAX_ENTRY_CHARS = 256 * READ_CHUNK
+
+
+def _journal_by_key(file_name: str) -> tuple[dict | None, dict[str, list]]:
+    """
+    Return the journal entries of the file by the top-level key they change.
+
+    An entry setting the whole data resets the entries, its data is returned too.
+    """
+    data = None
+    changes: dict[str, list] = {}
+    for entry in _read_journal(file_name)[0]:
+        path, op, value = entry
+        if not path:
+            data = value if op == "set" else {}
+            changes = {}
+        else:
+            changes.setdefault(path[0], []).append(entry)
+    return data, changes
+
+
+def _changed(key: str, value: object, entries: list) -> object:
+    """Return the value of the key once the journal entries of it are applied."""
+    holder = {} if value is _DELETED else {key: value}
+    for path, op, change in entries:
+        _apply(holder, path, op, change)
+    return holder.get(key, _DELETED)
+
+
+class _EntryDecoder:
+    """Decode the top-level entries of a JSON object in a file, chunk by chunk."""
+
+    def __init__(self: Self, file: TextIO, file_name: str) -> None:
+        self.file = file
+        self.file_name = file_name
+        self.buffer = ""
+        self.position = 0
+        self.decoder = json.JSONDecoder()
+
+    def __iter__(self: Self) -> Iterator[tuple[str, object]]:
+        # an empty snapshot is an empty object, like in read_json
+        if self._token() is None:
+            return
+        self._expect("{")
+        if self._token() == "}":
+            return
+        while True:
+            key = self._decode()
+            if not isinstance(key, str):
+                msg = f"Unexpected key {key!r} in {self.file_name}"
+                raise ValueError(msg)  # noqa: TRY004
+            self._expect(":")
+            yield key, self._decode()
+            if self._expect(",", "}") == "}":
+                return
+
+    def _read(self: Self) -> bool:
+        """Append the next chunk to the unread part of the buffer, False at the end."""
+        # reading as much again as is buffered keeps decoding a long entry linear
+        chunk = self.file.read(max(READ_CHUNK, len(self.buffer) - self.position))
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        if len(self.buffer) > MAX_ENTRY_CHARS:
+            msg = f"An entry of {self.file_name} exceeds {MAX_ENTRY_CHARS} characters"
+            raise ValueError(msg)
+        return True
+
+    def _token(self: Self) -> str | None:
+        """Return the next character that is not whitespace, None at the end."""
+        while True:
+            while (
+                self.position < len(self.buffer)
+                and self.buffer[self.position].isspace()
+            ):
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._read():
+                return None
+
+    def _expect(self: Self, *tokens: str) -> str:
+        token = self._token()
+        if token not in tokens:
+            msg = f"Unexpected {token!r} in {self.file_name}"
+            raise ValueError(msg)
+        self.position += 1
+        return token
+
+    def _decode(self: Self) -> object:
+        self._token()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+            # a number cut off by the end of the buffer decodes as a shorter one
+            if end < len(self.buffer) or not self._read():
+                self.position = end
+                return value
+
+
+def iter_entries(file_name: str) -> Iterator[tuple[str, object]]:
+    """
+    Yield the top-level keys and values of a file one at a time, journal applied.
+
+    The snapshot is decoded incrementally, so memory is bounded by the largest
+    entry, at most ``MAX_ENTRY_CHARS``, and the journal rather than by the file.
+    Nothing is written, unlike ``read_json``, which repairs the journal.
+    """
+    path = f"{pyphoria_path}/{file_name}"
+    data, changes = _journal_by_key(file_name)
+    if data is None and os.path.getsize(path) <= READ_CHUNK:  # noqa: PTH202
+        # small files, like the one of every character, are decoded in one go
+        with open(path, "rb") as file:
+            snapshot = file.read()
+        data = serializer.loads(snapshot) if snapshot.strip() else {}
+    if data is not None:
+        for key, entries in changes.items():
+            data[key] = _changed(key, data.get(key, _DELETED), entries)
+        yield from (
+            (key, value) for key, value in data.items() if value is not _DELETED
+        )
+        return
+    with open(path, encoding="utf-8") as file:
+        for key, value in _EntryDecoder(file, file_name):
+            if key in changes:
+                value = _changed(key, value, changes.pop(key))  # noqa: PLW2901
+            if value is not _DELETED:
+                yield key, value
+    for key, entries in changes.items():
+        if (value := _changed(key, _DELETED, entries)) is not _DELETED:
+            yield key, value
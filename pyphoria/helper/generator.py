@@ -0,0 +1,582 @@
+"""
+Generate synthetic game data at production scale.
+
+    python -m pyphoria.helper.generator --characters 10000000 --items 100000
+
+Every character gets an inventory holding a Poisson distributed number of items,
+drawn with Zipf distributed popularity, so a few items are in most inventories
+and most items in a few. Levels fall off geometrically and the species are skewed
+the same way. The rows are built in NumPy chunks and loaded with executemany of
+the stored values, the secondary indexes are built once after the load. The same
+seed and counts always produce the same rows, keys included.
+"""
+
+import argparse
+import logging
+import time
+import uuid
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from operator import itemgetter
+from typing import Self
+
+import numpy as np
+from sqlalchemy import Connection, Engine, Table
+
+from pyphoria.helper.identifiers import UUID_STORAGE, UUID_VERSION, from_db
+from pyphoria.helper.migrations import change_log_suspended
+from pyphoria.mechanics.Sampler import AliasSampler
+from pyphoria.models import (
+    Character,
+    Inventory,
+    InventoryItemLink,
+    Item,
+    Monster,
+    Planet,
+    Species,
+)
+
+log = logging.getLogger(__name__)
+
+# characters, with their inventories and items, built and committed at once
+CHUNK = 100_000
+# page cache of the loading connection, in KiB
+LOAD_CACHE_KIB = 512 * 1024
+# keys of every table returned for building requests against the data
+SAMPLE_KEYS = 10_000
+# the clock of the first time ordered key, so version 7 keys are reproducible
+EPOCH_MS = 1_704_067_200_000  # 2024-01-01
+
+FIRST_NAMES = (
+    "Ada", "Alan", "Anna", "Ben", "Clara", "Dan", "Edith", "Emil", "Eva", "Finn",
+    "Grace", "Hanna", "Ida", "Ivan", "Jonas", "Kai", "Lea", "Leo", "Lina", "Max",
+    "Mia", "Nora", "Olaf", "Paul", "Peter", "Rosa", "Sam", "Tara", "Theo", "Zoe",
+)  # fmt: skip
+SURNAMES = (
+    "Baker", "Berg", "Carter", "Fischer", "Frost", "Hale", "Hart", "Keller",
+    "Lang", "Meyer", "Moss", "Nash", "Novak", "Parker", "Reed", "Richter", "Ross",
+    "Schmidt", "Smith", "Stone", "Vogel", "Wagner", "Weber", "Wolf", "Young",
+)  # fmt: skip
+SPECIES_NAMES = (
+    "Human", "Alien", "Elf", "Dwarf", "Orc", "Goblin", "Troll", "Android",
+    "Cyborg", "Mutant",
+)  # fmt: skip
+ITEM_ADJECTIVES = (
+    "Rusty", "Sharp", "Heavy", "Ancient", "Blessed", "Cursed", "Glowing",
+    "Broken", "Golden", "Silent", "Burning", "Frozen",
+)  # fmt: skip
+# name, type, stackable, max stack
+ITEM_KINDS = (
+    ("Sword", "weapon", False, 1),
+    ("Axe", "weapon", False, 1),
+    ("Gun", "weapon", False, 1),
+    ("Bow", "weapon", False, 1),
+    ("Helmet", "armor", False, 1),
+    ("Shield", "armor", False, 1),
+    ("Potion", "consumable", True, 20),
+    ("Ration", "consumable", True, 50),
+    ("Arrow", "ammunition", True, 99),
+    ("Ore", "material", True, 99),
+)
+MONSTER_NAMES = (
+    "Goblin", "Wolf", "Spider", "Skeleton", "Slime", "Bandit", "Drake",
+    "Golem", "Wraith", "Ogre",
+)  # fmt: skip
+PLANET_NAMES = (
+    "Earth", "Mars", "Venus", "Kepler", "Proxima", "Tau Ceti", "Gliese", "Vega",
+)  # fmt: skip
+
+
+@dataclass(frozen=True)
+class Counts:
+    """
+    Size and shape of the generated data.
+
+    Attributes
+        characters (int): The characters, each with an inventory of its own.
+        items (int): The items.
+        species (int): The species.
+        monsters (int): The monsters.
+        planets (int): The planets.
+        items_per_inventory (float): The mean number of items in an inventory.
+        popularity (float): The Zipf exponent of how often items and species are picked.
+
+    """
+
+    characters: int = 1000
+    items: int = 1000
+    species: int = 10
+    monsters: int = 100
+    planets: int = 10
+    items_per_inventory: float = 4.0
+    popularity: float = 1.1
+
+
+@dataclass
+class Generated:
+    """
+    Keys of the generated rows.
+
+    Attributes
+        species (list[uuid.UUID]): Every species key.
+        items (list[uuid.UUID]): A sample of the item keys.
+        characters (list[uuid.UUID]): A sample of the character keys.
+        inventories (list[uuid.UUID]): The inventories of the sampled characters.
+        rows (dict[str, int]): The rows inserted per table.
+
+    """
+
+    species: list[uuid.UUID] = field(default_factory=list)
+    items: list[uuid.UUID] = field(default_factory=list)
+    characters: list[uuid.UUID] = field(default_factory=list)
+    inventories: list[uuid.UUID] = field(default_factory=list)
+    rows: dict[str, int] = field(default_factory=dict)
+
+
+def unique_names(start: int, count: int, *parts: Sequence[str]) -> list[str]:
+    """
+    Return the names ``start`` to ``start + count`` of the combinations of the parts.
+
+    Once every combination is used up they repeat with a number appended, so the
+    names never clash.
+    """
+    names = []
+    for number in range(start, start + count):
+        words = []
+        rest = number
+        for part in reversed(parts):
+            rest, index = divmod(rest, len(part))
+            words.append(part[index])
+        name = " ".join(reversed(words))
+        names.append(f"{name} {rest}" if rest else name)
+    return names
+
+
+def zipf_sampler(count: int, exponent: float) -> AliasSampler:
+    """Return a sampler of the indices below count, index n weighted 1 / (n + 1)^s."""
+    return AliasSampler([(index, (index + 1) ** -exponent) for index in range(count)])
+
+
+class Generator:
+    """
+    Deterministic source of the rows.
+
+    Attributes
+        counts (Counts): What to generate.
+        rng (np.random.Generator): The random numbers, seeded once.
+        clock (int): The milliseconds of the next time ordered key.
+
+    """
+
+    def __init__(self: Self, counts: Counts, seed: int = 0) -> None:  # noqa: D107
+        self.counts = counts
+        self.rng = np.random.default_rng(seed)
+        self.clock = EPOCH_MS
+
+    def keys(self: Self, count: int) -> list[bytes] | list[str]:
+        """Return new keys in their stored form, of the configured UUID version."""
+        raw = np.frombuffer(self.rng.bytes(16 * count), np.uint8).reshape(count, 16)
+        raw = raw.copy()
+        if UUID_VERSION == 7:  # noqa: PLR2004
+            # a key per millisecond, big endian into the first 48 bits
+            clock = np.arange(self.clock, self.clock + count, dtype=">u8")
+            raw[:, :6] = clock.view(np.uint8).reshape(count, 8)[:, 2:]
+            self.clock += count
+        raw[:, 6] = raw[:, 6] & 0x0F | UUID_VERSION << 4
+        raw[:, 8] = raw[:, 8] & 0x3F | 0x80
+        data = raw.tobytes()
+        if UUID_STORAGE == "binary":
+            return [data[start : start + 16] for start in range(0, len(data), 16)]
+        digits = data.hex()
+        return [digits[start : start + 32] for start in range(0, len(digits), 32)]
+
+    def positive(self: Self, low: int, high: int, count: int) -> list[int]:
+        """Return uniform integers from low to high, both included."""
+        return self.rng.integers(low, high + 1, count).tolist()
+
+    def species(self: Self) -> tuple[list[tuple], np.ndarray]:
+        """Return the species rows and their character stats, one row per species."""
+        count = self.counts.species
+        stats = self.rng.integers(1, 11, (count, 6))
+        names = unique_names(0, count, SPECIES_NAMES)
+        rows = list(
+            zip(
+                self.keys(count),
+                names,
+                [f"The {name} species." for name in names],
+                [f"species-{number}.png" for number in range(count)],
+                self.positive(1, 5, count),
+                self.positive(1, 5, count),
+                self.positive(1, 5, count),
+                *stats.T.tolist(),
+                strict=True,
+            ),
+        )
+        return rows, stats
+
+    def items(self: Self) -> tuple[list[tuple], np.ndarray]:
+        """Return the item rows and their max stacks, 1 for items that do not stack."""
+        count = self.counts.items
+        nouns = [kind[0] for kind in ITEM_KINDS]
+        names = unique_names(0, count, ITEM_ADJECTIVES, nouns)
+        kinds = [ITEM_KINDS[number % len(ITEM_KINDS)] for number in range(count)]
+        level = np.minimum(1 + self.rng.geometric(0.1, count), 100)
+        rows = list(
+            zip(
+                self.keys(count),
+                names,
+                [kind[1] for kind in kinds],
+                [f"A {name.lower()}." for name in names],
+                [kind[2] for kind in kinds],
+                [kind[3] for kind in kinds],
+                [False] * count,
+                [False] * count,
+                [f"{kind[0].lower()}.png" for kind in kinds],
+                self.positive(1, 20, count),
+                (level * self.rng.integers(1, 6, count)).tolist(),
+                self.positive(1, 10, count),
+                self.positive(1, 10, count),
+                level.tolist(),
+                self.positive(1, 10, count),
+                strict=True,
+            ),
+        )
+        max_stack = np.array([kind[3] for kind in kinds], dtype=np.int64)
+        return rows, max_stack
+
+    def monsters(self: Self) -> list[tuple]:  # noqa: D102
+        count = self.counts.monsters
+        names = unique_names(0, count, MONSTER_NAMES)
+        return list(
+            zip(
+                self.keys(count),
+                names,
+                [f"A wild {name.lower()}." for name in names],
+                self.positive(1, 100, count),
+                self.positive(1, 50, count),
+                [f"monster-{number}.png" for number in range(count)],
+                strict=True,
+            ),
+        )
+
+    def planets(self: Self) -> list[tuple]:  # noqa: D102
+        count = self.counts.planets
+        names = unique_names(0, count, PLANET_NAMES)
+        return list(
+            zip(
+                self.keys(count),
+                names,
+                [f"The planet {name}." for name in names],
+                [f"planet-{number}.png" for number in range(count)],
+                strict=True,
+            ),
+        )
+
+    def characters(  # noqa: PLR0913, PLR0917
+        self: Self,
+        start: int,
+        count: int,
+        species: list,
+        species_stats: np.ndarray,
+        species_sampler: AliasSampler,
+        items: list,
+        max_stack: np.ndarray,
+        item_sampler: AliasSampler,
+    ) -> tuple[list[tuple], list[tuple], list[tuple]]:
+        """Return the inventory, item link and character rows of a chunk."""
+        rng = self.rng
+        inventories = self.keys(count)
+        slots = 10 + 5 * rng.integers(0, 3, count)
+        inventory_rows = list(
+            zip(
+                inventories,
+                slots.tolist(),
+                rng.lognormal(4, 1.5, count).astype(np.int64).tolist(),
+                strict=True,
+            ),
+        )
+
+        # the same item twice in an inventory is a single link
+        held = np.minimum(rng.poisson(self.counts.items_per_inventory, count), slots)
+        owner = np.repeat(np.arange(count, dtype=np.int64), held)
+        pairs = np.unique(
+            owner * len(items) + item_sampler.sample_indices(len(owner), rng),
+        )
+        owner, item = np.divmod(pairs, len(items))
+        stack = max_stack[item]
+        amount = np.where(stack > 1, 1 + (rng.random(len(item)) * stack), 1)
+        inventory_keys = np.array(inventories, dtype=object)
+        item_keys = np.array(items, dtype=object)
+        link_rows = list(
+            zip(
+                inventory_keys[owner].tolist(),
+                item_keys[item].tolist(),
+                amount.astype(np.int64).tolist(),
+                strict=True,
+            ),
+        )
+
+        level = np.minimum(rng.geometric(0.15, count), 100)
+        kind = species_sampler.sample_indices(count, rng)
+        # character n is first name n % 30 with surname n // 30, so no two clash
+        numbers = range(start, start + count)
+        offset = start // len(FIRST_NAMES)
+        surnames = unique_names(
+            offset,
+            (start + count - 1) // len(FIRST_NAMES) - offset + 1,
+            SURNAMES,
+        )
+        character_rows = list(
+            zip(
+                self.keys(count),
+                *species_stats[kind].T.tolist(),
+                np.array(species, dtype=object)[kind].tolist(),
+                [FIRST_NAMES[number % len(FIRST_NAMES)] for number in numbers],
+                [surnames[number // len(FIRST_NAMES) - offset] for number in numbers],
+                level.tolist(),
+                (level * level * 100 + rng.integers(1, 100, count)).tolist(),
+                rng.integers(1, 101, count).tolist(),
+                inventories,
+                *(level + rng.integers(0, 10, (3, count))).tolist(),
+                strict=True,
+            ),
+        )
+        return inventory_rows, link_rows, character_rows
+
+
+def _columns(table: Table) -> list[str]:
+    """Return the columns in the order the generator builds the rows."""
+    columns = {
+        Species.__table__: [
+            "id", "name", "description", "icon", "base_strength", "base_dexterity",
+            "base_intelligence", "stat_combat", "stat_dodge_rating", "stat_hit_rating",
+            "stat_intelligence", "stat_luck", "stat_vitality",
+        ],
+        Item.__table__: [
+            "id", "name", "type", "description", "stackable", "max_stack",
+            "unique_store", "unique_equipped", "icon", "damage_fire",
+            "damage_physical", "requirement_dexterity", "requirement_intelligence",
+            "requirement_level", "requirement_strength",
+        ],
+        Monster.__table__: [
+            "id", "name", "description", "level", "base_damage", "icon",
+        ],
+        Planet.__table__: ["id", "name", "description", "icon"],
+        Inventory.__table__: ["id", "slots", "gold"],
+        InventoryItemLink.__table__: ["inventory_id", "item_id", "item_count"],
+        Character.__table__: [
+            "id", "stat_combat", "stat_dodge_rating", "stat_hit_rating",
+            "stat_intelligence", "stat_luck", "stat_vitality", "species", "name",
+            "surname", "level", "experience", "energy", "inventory_id", "strength",
+            "dexterity", "intelligence",
+        ],
+    }  # fmt: skip
+    return columns[table]
+
+
+def _insert(connection: Connection, table: Table, rows: Iterable[tuple]) -> int:
+    """Insert the stored values with one executemany, bypassing the column types."""
+    columns = _columns(table)
+    # in key order every row lands next to the previous one in the primary key
+    # index, instead of on a random page of it
+    rows = sorted(rows, key=itemgetter(0))
+    connection.exec_driver_sql(
+        f'INSERT INTO "{table.name}" ({", ".join(columns)}) '  # noqa: S608
+        f"VALUES ({', '.join('?' * len(columns))})",
+        rows,
+    )
+    return len(rows)
+
+
+def _sample(keys: list, count: int, rng: np.random.Generator) -> list[uuid.UUID]:
+    chosen = rng.choice(len(keys), min(count, len(keys)), replace=False)
+    return [from_db(keys[index]) for index in sorted(chosen)]
+
+
+# loading into the secondary indexes row by row costs more than building them after
+_DEFERRED_INDEX_TABLES = (Character.__table__, InventoryItemLink.__table__)
+
+
+def generate(engine: Engine, counts: Counts, seed: int = 0) -> Generated:
+    """
+    Fill an empty, migrated database with generated rows.
+
+    The catalog tables go in one transaction, then every ``CHUNK`` characters with
+    their inventories and item links in one of their own. The secondary indexes of
+    the characters and item links are dropped during the load and built again once
+    it is done, also when it fails.
+    """
+    generator = Generator(counts, seed)
+    # the samples are drawn separately, so their size does not change the data
+    sample_rng = np.random.default_rng(seed + 1)
+    generated = Generated()
+    inserted = dict.fromkeys(
+        (
+            "species",
+            "item",
+            "monster",
+            "planet",
+            "inventory",
+            "inventoryitemlink",
+            "character",
+        ),
+        0,
+    )
+
+    species, species_stats = generator.species()
+    items, max_stack = generator.items()
+    with engine.begin() as connection:
+        inserted["species"] = _insert(connection, Species.__table__, species)
+        inserted["item"] = _insert(connection, Item.__table__, items)
+        inserted["monster"] = _insert(
+            connection,
+            Monster.__table__,
+            generator.monsters(),
+        )
+        inserted["planet"] = _insert(
+            connection,
+            Planet.__table__,
+            generator.planets(),
+        )
+    species_keys = [row[0] for row in species]
+    item_keys = [row[0] for row in items]
+    generated.species = [from_db(key) for key in species_keys]
+    generated.items = _sample(item_keys, SAMPLE_KEYS, sample_rng)
+    species_sampler = zipf_sampler(counts.species, counts.popularity)
+    item_sampler = zipf_sampler(counts.items, counts.popularity)
+
+    # which characters to return, drawn up front so no chunk has to be kept
+    wanted = np.sort(
+        sample_rng.choice(
+            counts.characters,
+            min(SAMPLE_KEYS, counts.characters),
+            replace=False,
+        ),
+    )
+    with engine.connect() as connection:
+        # the primary key indexes of the chunks hit pages all over the file
+        cache_size = connection.exec_driver_sql("PRAGMA cache_size").scalar()
+        connection.exec_driver_sql(f"PRAGMA cache_size = {-LOAD_CACHE_KIB}")
+        connection.commit()
+        with connection.begin():
+            indexes = (
+                connection.exec_driver_sql(
+                    "SELECT name FROM sqlite_master WHERE type = 'index' "
+                    "AND sql IS NOT NULL AND tbl_name IN (?, ?)",
+                    tuple(table.name for table in _DEFERRED_INDEX_TABLES),
+                )
+                .scalars()
+                .all()
+            )
+            for index in indexes:
+                connection.exec_driver_sql(f'DROP INDEX "{index}"')
+        try:
+            # the workers reload their leaderboards once instead of per character
+            with change_log_suspended(connection):
+                start_time = time.perf_counter()
+                for start in range(0, counts.characters, CHUNK):
+                    count = min(CHUNK, counts.characters - start)
+                    inventories, links, characters = generator.characters(
+                        start,
+                        count,
+                        species_keys,
+                        species_stats,
+                        species_sampler,
+                        item_keys,
+                        max_stack,
+                        item_sampler,
+                    )
+                    with connection.begin():
+                        for table, rows in (
+                            (Inventory.__table__, inventories),
+                            (InventoryItemLink.__table__, links),
+                            (Character.__table__, characters),
+                        ):
+                            inserted[table.name] += _insert(connection, table, rows)
+                    for number in wanted[(wanted >= start) & (wanted < start + count)]:
+                        row = characters[number - start]
+                        generated.characters.append(from_db(row[0]))
+                        generated.inventories.append(from_db(row[13]))
+                    done = start + count
+                    log.info(
+                        "%d of %d characters, %.0f rows/s",
+                        done,
+                        counts.characters,
+                        (inserted["inventory"] + inserted["inventoryitemlink"] + done)
+                        / (time.perf_counter() - start_time),
+                    )
+        finally:
+            with connection.begin():
+                for table in _DEFERRED_INDEX_TABLES:
+                    for index in table.indexes:
+                        index.create(connection, checkfirst=True)
+            connection.exec_driver_sql(f"PRAGMA cache_size = {cache_size}")
+    generated.rows = inserted
+    return generated
+
+
+def main() -> None:  # noqa: D103
+    defaults = Counts()
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--characters", type=int, default=defaults.characters)
+    parser.add_argument("--items", type=int, default=defaults.items)
+    parser.add_argument("--species", type=int, default=defaults.species)
+    parser.add_argument("--monsters", type=int, default=defaults.monsters)
+    parser.add_argument("--planets", type=int, default=defaults.planets)
+    parser.add_argument(
+        "--items-per-inventory",
+        type=float,
+        default=defaults.items_per_inventory,
+        help="mean number of items in an inventory",
+    )
+    parser.add_argument(
+        "--popularity",
+        type=float,
+        default=defaults.popularity,
+        help="Zipf exponent of the item and species popularity, 0 for uniform",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.items < 1 or args.species < 1:
+        parser.error("at least one item and one species are needed")
+
+    from pyphoria.helper.database import engine  # noqa: PLC0415
+    from pyphoria.helper.migrations import migrate  # noqa: PLC0415
+
+    logging.basicConfig(level=logging.INFO)
+    migrate(engine)
+    with engine.connect() as connection:
+        # the generated names would clash with the ones of an earlier run
+        populated = connection.exec_driver_sql(
+            "SELECT EXISTS (SELECT 1 FROM species) OR EXISTS (SELECT 1 FROM item)",
+        ).scalar()
+    if populated:
+        parser.error("the database is not empty, reset it first")
+
+    start = time.perf_counter()
+    generated = generate(
+        engine,
+        Counts(
+            characters=args.characters,
+            items=args.items,
+            species=args.species,
+            monsters=args.monsters,
+            planets=args.planets,
+            items_per_inventory=args.items_per_inventory,
+            popularity=args.popularity,
+        ),
+        args.seed,
+    )
+    print(  # noqa: T201
+        f"Generated {sum(generated.rows.values())} rows in "
+        f"{time.perf_counter() - start:.1f} s",
+    )
+    for table, rows in generated.rows.items():
+        print(f"{table:<20}{rows:>12}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
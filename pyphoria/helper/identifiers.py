@@ -0,0 +1,96 @@
+"""Generation and storage of the UUID keys."""
+
+import os
+import secrets
+import time
+import uuid
+from typing import Self
+
+from sqlalchemy import ColumnElement, LargeBinary, String, type_coerce
+from sqlalchemy.types import TypeDecorator
+from sqlmodel.sql.sqltypes import GUID
+
+# hex stores the 32 hex digits as text, binary the 16 bytes as a blob
+STORAGES = ("hex", "binary")
+UUID_STORAGE = os.environ.get("PYPHORIA_UUID_STORAGE", "hex")
+if UUID_STORAGE not in STORAGES:
+    msg = f"Unknown UUID storage {UUID_STORAGE!r}, choose one of {STORAGES}"
+    raise ValueError(msg)
+
+# 4 is random, 7 starts with the creation time, so new keys go to the end of the
+# primary key index instead of a random page of it
+UUID_VERSION = int(os.environ.get("PYPHORIA_UUID_VERSION", "4"))
+if UUID_VERSION not in (4, 7):
+    msg = f"Unsupported UUID version {UUID_VERSION}, choose 4 or 7"
+    raise ValueError(msg)
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Return a UUID version 7, ordered by creation time.
+
+    48 bits of Unix time in milliseconds are followed by the version, 74 random
+    bits and the variant (RFC 9562).
+    """
+    value = time.time_ns() // 1_000_000 << 80 | secrets.randbits(80)
+    # version 7 and the RFC 4122 variant
+    value = value & ~(0xF << 76) | 7 << 76
+    value = value & ~(0x3 << 62) | 0x2 << 62
+    return uuid.UUID(int=value)
+
+
+def new_id() -> uuid.UUID:
+    """Return a new key of the configured UUID version."""
+    return uuid7() if UUID_VERSION == 7 else uuid.uuid4()  # noqa: PLR2004
+
+
+class BinaryUUID(TypeDecorator):
+    """UUID stored as its 16 bytes, half the size of the hex text in every index."""
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def process_bind_param(self: Self, value, dialect) -> bytes | None:  # noqa: ANN001, ARG002, D102
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        return value.bytes
+
+    def process_result_value(self: Self, value, dialect) -> uuid.UUID | None:  # noqa: ANN001, ARG002, D102
+        if value is None:
+            return None
+        return uuid.UUID(bytes=bytes(value))
+
+
+# the column type of every UUID field of the table models
+UUIDType = BinaryUUID if UUID_STORAGE == "binary" else GUID
+
+# what SQLite reports as typeof() of a stored key
+SQLITE_TYPE = "blob" if UUID_STORAGE == "binary" else "text"
+
+
+def to_db(value: uuid.UUID) -> bytes | str:
+    """Return the stored form of the key, for parameters of text statements."""
+    return value.bytes if UUID_STORAGE == "binary" else value.hex
+
+
+def from_db(value: bytes | str) -> uuid.UUID:
+    """Return the key from its stored form, for rows of text statements."""
+    if isinstance(value, bytes | memoryview):
+        return uuid.UUID(bytes=bytes(value))
+    return uuid.UUID(hex=value)
+
+
+def stored(column: ColumnElement) -> ColumnElement:
+    """Return the key column read as stored, without parsing every value."""
+    return type_coerce(
+        column,
+        LargeBinary if UUID_STORAGE == "binary" else String,
+    ).label(column.name)
+
+
+def to_text(value: bytes | str) -> str:
+    """Return the dashed text of a stored key, like str() of its UUID."""
+    digits = value.hex() if isinstance(value, bytes) else value
+    return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
@@ -0,0 +1,568 @@
+"""
+Import the data files of the JSON file models into the database.
+
+    python -m pyphoria.helper.importer --species Human
+
+Items, monsters, inventories and characters are imported in that order, so every
+row finds the rows it references. Files are decoded one at a time, and the
+large item and monster files entry by entry, so memory stays bounded no matter
+how much data there is. Every ``--batch`` files or entries are inserted in one
+transaction, after which the progress is written to a checkpoint file. An
+interrupted import continues after the last committed batch when run again.
+Rows whose keys exist already are skipped, so a batch imported twice is
+harmless. The data files must not change between the runs of an import.
+
+Names only had to be unique per account in the files, the database keeps them
+unique across all of them. A row whose unique name is taken by another row, like
+a character of a second account with the same full name, is imported under the
+name suffixed with the start of its id. Every rename is logged.
+
+The files lack some columns of the tables. Characters take the stats of the
+species they are imported as, items get the lowest damage of the damage types
+they do not have, and values below the minimum of their column are raised to it.
+"""
+
+import argparse
+import logging
+import os
+import time
+import uuid
+from collections.abc import Callable, Iterable, Iterator
+from itertools import islice
+from typing import Self
+
+from sqlalchemy import Connection, Engine, Table, insert, select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from pyphoria.helper import files, serializer
+from pyphoria.models import (
+    Character,
+    Inventory,
+    InventoryItemLink,
+    Item,
+    Monster,
+    Species,
+)
+
+log = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = "data/import-checkpoint.json"
+DEFAULT_BATCH = 1000
+# keys per IN (...) lookup, well below the variable limit of SQLite
+LOOKUP_CHUNK = 500
+PHASES = ("items", "monsters", "inventories", "characters")
+CHARACTERS_DIRECTORY = "data/characters"
+INVENTORIES_DIRECTORY = "data/inventories"
+ITEMS_FILE = "data/items.json"
+MONSTERS_FILE = "data/monsters.json"
+
+
+class ImportStats:
+    """
+    Counts of an import.
+
+    Attributes
+        inserted (int): The rows inserted.
+        skipped (int): The rows that existed already or reference missing rows.
+        invalid (int): The records that could not be read or mapped.
+        adjusted (int): The values raised to the minimum of their column.
+        renamed (int): The rows imported under a new name, their name was taken.
+
+    """
+
+    def __init__(self: Self) -> None:  # noqa: D107
+        self.inserted = 0
+        self.skipped = 0
+        self.invalid = 0
+        self.adjusted = 0
+        self.renamed = 0
+
+    def at_least(self: Self, value: int, minimum: int = 1) -> int:
+        """Return the value, raised to the minimum if needed."""
+        if value < minimum:
+            self.adjusted += 1
+            return minimum
+        return value
+
+
+def _batches(entries: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(entries)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _data_files(directory: str, prefix: str) -> Iterator[str]:
+    """Yield the data files of the directory in directory order."""
+    path = f"{files.pyphoria_path}/{directory}"
+    if not os.path.isdir(path):  # noqa: PTH112
+        return
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name.startswith(prefix) and entry.name.endswith(".json"):
+                yield f"{directory}/{entry.name}"
+
+
+def _existing(
+    connection: Connection,
+    column,  # noqa: ANN001
+    keys: set[uuid.UUID],
+) -> set[uuid.UUID]:
+    """Return the keys stored in the column."""
+    found = set()
+    keys = list(keys)
+    for start in range(0, len(keys), LOOKUP_CHUNK):
+        found.update(
+            connection.execute(
+                select(column).where(column.in_(keys[start : start + LOOKUP_CHUNK])),
+            ).scalars(),
+        )
+    return found
+
+
+def _renamed(table: Table, column: str, value: str, key: uuid.UUID) -> str:
+    """Return the value suffixed with the start of the key, within the column length."""
+    suffix = f" ({key.hex[:8]})"
+    length = getattr(table.c[column].type, "length", None)
+    return f"{value[: length - len(suffix)] if length else value}{suffix}"
+
+
+def _owners(
+    connection: Connection,
+    table: Table,
+    columns: tuple[str, ...],
+    values: set[tuple],
+) -> dict[tuple, uuid.UUID]:
+    """Return the id of the row holding each of the values of the unique columns."""
+    owners = {}
+    values = list(values)
+    chunk = LOOKUP_CHUNK // len(columns)
+    key = tuple_(*(table.c[column] for column in columns))
+    for start in range(0, len(values), chunk):
+        owners.update(
+            (tuple(row[:-1]), row[-1])
+            for row in connection.execute(
+                select(*(table.c[column] for column in columns), table.c.id).where(
+                    key.in_(values[start : start + chunk]),
+                ),
+            )
+        )
+    return owners
+
+
+def _rename_clashes(
+    connection: Connection,
+    table: Table,
+    rows: list[dict],
+    stats: ImportStats,
+) -> None:
+    """Rename the new rows whose unique values are taken by another row."""
+    unique = [
+        tuple(column.name for column in index.columns)
+        for index in table.indexes
+        if index.unique
+    ]
+    if not unique:
+        return
+    # rows imported before keep the name they were imported under
+    imported = _existing(connection, table.c.id, {row["id"] for row in rows})
+    new = [row for row in rows if row["id"] not in imported]
+    for columns in unique:
+        owners = _owners(
+            connection,
+            table,
+            columns,
+            {tuple(row[column] for column in columns) for row in new},
+        )
+        renamed = columns[-1]
+        for row in new:
+            value = tuple(row[column] for column in columns)
+            owner = owners.setdefault(value, row["id"])
+            if owner == row["id"]:
+                continue
+            name = _renamed(table, renamed, row[renamed], row["id"])
+            log.warning(
+                "Importing %s %s as %s %r, %r is taken by %s",
+                table.name,
+                row["id"],
+                renamed,
+                name,
+                row[renamed],
+                owner,
+            )
+            row[renamed] = name
+            owners[tuple(row[column] for column in columns)] = row["id"]
+            stats.renamed += 1
+
+
+def _insert(
+    connection: Connection,
+    model: type,
+    rows: list[dict],
+    stats: ImportStats,
+) -> None:
+    if not rows:
+        return
+    table = model.__table__
+    _rename_clashes(connection, table, rows, stats)
+    # only rows imported before are skipped, any other conflict raises
+    statement = sqlite_insert(table).on_conflict_do_nothing(
+        index_elements=[column.name for column in table.primary_key],
+    )
+    inserted = connection.execute(statement, rows).rowcount
+    stats.inserted += inserted
+    stats.skipped += len(rows) - inserted
+
+
+def item_row(record: dict, stats: ImportStats) -> dict:
+    """Map an entry of the items file onto the item table."""
+    requirements = record.get("requirements", {})
+    damage = record.get("base_damage", {})
+    return {
+        "id": uuid.UUID(record["id"]),
+        "name": record["name"],
+        "type": record["type"],
+        "description": record["description"],
+        "stackable": bool(record["stackable"]),
+        "max_stack": stats.at_least(record["max_stack"]),
+        "unique_store": bool(record["unique_store"]),
+        "unique_equipped": bool(record["unique_equipped"]),
+        "icon": record.get("icon", ""),
+        "damage_fire": stats.at_least(damage.get("fire", {}).get("max", 1)),
+        "damage_physical": stats.at_least(damage.get("physical", {}).get("max", 1)),
+        "requirement_dexterity": stats.at_least(requirements.get("dexterity", 1)),
+        "requirement_intelligence": stats.at_least(
+            requirements.get("intelligence", 1),
+        ),
+        "requirement_level": stats.at_least(requirements.get("level", 1)),
+        "requirement_strength": stats.at_least(requirements.get("strength", 1)),
+    }
+
+
+def monster_row(record: dict, stats: ImportStats) -> dict:
+    """Map an entry of the monsters file onto the monster table."""
+    return {
+        "id": uuid.UUID(str(record["id"])),
+        "name": record["name"],
+        "description": record["description"],
+        "level": stats.at_least(record["level"]),
+        "base_damage": stats.at_least(record["base_damage"]),
+        "icon": record.get("icon", ""),
+    }
+
+
+def _stored_items(items: dict | list | None) -> Iterator[tuple[str, dict]]:
+    """Yield the id and entry of every item stored in an inventory file."""
+    if not items:
+        return
+    # files written before the items were keyed by their id hold a list of the
+    # entries, which is empty in practice
+    if isinstance(items, list):
+        for stored in items:
+            yield stored["item_id"], stored
+        return
+    yield from items.items()
+
+
+def inventory_rows(record: dict, stats: ImportStats) -> tuple[dict, list[dict]]:
+    """Map an inventory file onto the inventory and its item links."""
+    inventory_id = uuid.UUID(record["inventory_id"])
+    links = [
+        {
+            "inventory_id": inventory_id,
+            "item_id": uuid.UUID(str(item_id)),
+            "item_count": stats.at_least(stored["amount"]),
+        }
+        for item_id, stored in _stored_items(record.get("items"))
+    ]
+    inventory = {
+        "id": inventory_id,
+        "slots": stats.at_least(record.get("slots", 10), 0),
+        "gold": stats.at_least(record.get("gold", 0), 0),
+    }
+    return inventory, links
+
+
+def character_row(record: dict, species: Species, stats: ImportStats) -> dict:
+    """Map an entry of a characters file onto the character table."""
+    base_stats = record.get("base_stats", {})
+    inventory_id = record.get("inventory")
+    return {
+        "id": uuid.UUID(record["character_id"]),
+        "species": species.id,
+        "name": record["name"],
+        "surname": record["surname"],
+        "level": stats.at_least(record["level"]),
+        "experience": stats.at_least(record["experience"]),
+        "energy": stats.at_least(record["energy"]),
+        "inventory_id": uuid.UUID(inventory_id) if inventory_id else None,
+        "strength": stats.at_least(base_stats.get("strength", 1)),
+        "dexterity": stats.at_least(base_stats.get("dexterity", 1)),
+        "intelligence": stats.at_least(base_stats.get("intelligence", 1)),
+        **{
+            stat: getattr(species, stat)
+            for stat in (
+                "stat_combat",
+                "stat_dodge_rating",
+                "stat_hit_rating",
+                "stat_intelligence",
+                "stat_luck",
+                "stat_vitality",
+            )
+        },
+    }
+
+
+def _records(
+    file_name: str,
+    mapper: Callable[[dict], object],
+    stats: ImportStats,
+) -> Iterator:
+    """
+    Yield the mapped entries of a file.
+
+    Entries that do not map are skipped and counted, so is the rest of a file
+    that cannot be read any further.
+    """
+    try:
+        for key, record in files.iter_entries(file_name):
+            try:
+                yield mapper(record)
+            except (KeyError, TypeError, ValueError, AttributeError) as error:
+                stats.invalid += 1
+                log.warning("Skipping %s in %s: %r", key, file_name, error)
+    except (OSError, ValueError) as error:
+        stats.invalid += 1
+        log.warning("Skipping the rest of %s: %r", file_name, error)
+
+
+def _read(file_name: str, stats: ImportStats) -> dict | None:
+    try:
+        return dict(files.iter_entries(file_name))
+    except (OSError, ValueError) as error:
+        stats.invalid += 1
+        log.warning("Skipping %s: %r", file_name, error)
+        return None
+
+
+class Importer:
+    """
+    Resumable import of all data files.
+
+    Attributes
+        engine (Engine): The database to import into.
+        species (Species): The species of the imported characters.
+        batch (int): The files or entries per transaction.
+        stats (ImportStats): The counts of this run.
+        checkpoint (dict): The phase in progress and the files or entries done in it.
+
+    """
+
+    def __init__(  # noqa: D107
+        self: Self,
+        engine: Engine,
+        species: Species,
+        batch: int,
+    ) -> None:
+        self.engine = engine
+        self.species = species
+        self.batch = batch
+        self.stats = ImportStats()
+        self.checkpoint = self._load_checkpoint()
+
+    @staticmethod
+    def _load_checkpoint() -> dict:
+        path = f"{files.pyphoria_path}/{CHECKPOINT_FILE}"
+        if not os.path.exists(path):  # noqa: PTH110
+            return {"phase": PHASES[0], "done": 0}
+        with open(path, "rb") as file:
+            return serializer.loads(file.read())
+
+    def _save_checkpoint(self: Self) -> None:
+        path = f"{files.pyphoria_path}/{CHECKPOINT_FILE}"
+        os.makedirs(os.path.dirname(path), exist_ok=True)  # noqa: PTH103, PTH120
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(serializer.dumps(self.checkpoint))
+        os.replace(temporary, path)  # noqa: PTH105
+
+    def _run_phase(
+        self: Self,
+        phase: str,
+        units: Iterable,
+        load: Callable[[Connection, list], None],
+    ) -> None:
+        """Load the units of a phase batch by batch, skipping the ones done before."""
+        if PHASES.index(phase) < PHASES.index(self.checkpoint["phase"]):
+            return
+        if phase != self.checkpoint["phase"]:
+            self.checkpoint = {"phase": phase, "done": 0}
+        done = self.checkpoint["done"]
+        start = time.perf_counter()
+        imported = 0
+        for batch in _batches(islice(units, done, None), self.batch):
+            with self.engine.begin() as connection:
+                load(connection, batch)
+            # a crash before this line imports the batch again, which is harmless
+            done += len(batch)
+            imported += len(batch)
+            self.checkpoint["done"] = done
+            self._save_checkpoint()
+            log.info(
+                "%s: %d done, %.0f/s",
+                phase,
+                done,
+                imported / (time.perf_counter() - start),
+            )
+
+    def _load_items(self: Self, connection: Connection, rows: list) -> None:
+        _insert(connection, Item, rows, self.stats)
+
+    def _load_monsters(self: Self, connection: Connection, rows: list) -> None:
+        _insert(connection, Monster, rows, self.stats)
+
+    def _load_inventories(
+        self: Self,
+        connection: Connection,
+        file_names: list[str],
+    ) -> None:
+        inventories, links = [], []
+        for file_name in file_names:
+            record = _read(file_name, self.stats)
+            if not record:
+                continue
+            try:
+                inventory, inventory_links = inventory_rows(record, self.stats)
+            except (KeyError, TypeError, ValueError, AttributeError) as error:
+                self.stats.invalid += 1
+                log.warning("Skipping %s: %r", file_name, error)
+                continue
+            inventories.append(inventory)
+            links += inventory_links
+        _insert(connection, Inventory, inventories, self.stats)
+        # the foreign keys are enforced, links to unknown items are left out
+        items = _existing(connection, Item.id, {link["item_id"] for link in links})
+        kept = [link for link in links if link["item_id"] in items]
+        self.stats.skipped += len(links) - len(kept)
+        _insert(connection, InventoryItemLink, kept, self.stats)
+
+    def _load_characters(
+        self: Self,
+        connection: Connection,
+        file_names: list[str],
+    ) -> None:
+        characters = []
+        for file_name in file_names:
+            characters += _records(
+                file_name,
+                lambda record: character_row(record, self.species, self.stats),
+                self.stats,
+            )
+        inventories = _existing(
+            connection,
+            Inventory.id,
+            {row["inventory_id"] for row in characters if row["inventory_id"]},
+        )
+        for row in characters:
+            # like a deleted inventory, a missing one leaves the character without
+            if row["inventory_id"] not in inventories:
+                row["inventory_id"] = None
+        _insert(connection, Character, characters, self.stats)
+
+    def run(self: Self) -> ImportStats:
+        """Import everything not imported yet and return the counts of this run."""
+        self._run_phase(
+            "items",
+            _records(ITEMS_FILE, lambda r: item_row(r, self.stats), self.stats)
+            if os.path.exists(f"{files.pyphoria_path}/{ITEMS_FILE}")  # noqa: PTH110
+            else (),
+            self._load_items,
+        )
+        self._run_phase(
+            "monsters",
+            _records(MONSTERS_FILE, lambda r: monster_row(r, self.stats), self.stats)
+            if os.path.exists(f"{files.pyphoria_path}/{MONSTERS_FILE}")  # noqa: PTH110
+            else (),
+            self._load_monsters,
+        )
+        self._run_phase(
+            "inventories",
+            _data_files(INVENTORIES_DIRECTORY, "inventory-"),
+            self._load_inventories,
+        )
+        self._run_phase(
+            "characters",
+            _data_files(CHARACTERS_DIRECTORY, "characters-"),
+            self._load_characters,
+        )
+        return self.stats
+
+
+def import_species(engine: Engine, name: str) -> Species:
+    """Return the species of the imported characters, created if it is missing."""
+    with engine.begin() as connection:
+        row = (
+            connection.execute(
+                select(Species.__table__).where(Species.name == name),
+            )
+            .mappings()
+            .one_or_none()
+        )
+        if row is None:
+            species = Species(
+                name=name,
+                description="Characters imported from the data files.",
+                icon="",
+                base_strength=1,
+                base_dexterity=1,
+                base_intelligence=1,
+                stat_combat=1,
+                stat_dodge_rating=1,
+                stat_hit_rating=1,
+                stat_intelligence=1,
+                stat_luck=1,
+                stat_vitality=1,
+            )
+            connection.execute(insert(Species.__table__), [species.model_dump()])
+            return species
+    return Species.model_construct(**row)
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--species",
+        default="Human",
+        help="species of the imported characters, created if it does not exist",
+    )
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH)
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="ignore the checkpoint of an earlier run",
+    )
+    args = parser.parse_args()
+
+    from pyphoria.helper.database import engine  # noqa: PLC0415
+    from pyphoria.helper.migrations import check  # noqa: PLC0415
+
+    logging.basicConfig(level=logging.INFO)
+    check(engine)
+    if args.restart:
+        checkpoint = f"{files.pyphoria_path}/{CHECKPOINT_FILE}"
+        if os.path.exists(checkpoint):  # noqa: PTH110
+            os.remove(checkpoint)  # noqa: PTH107
+    importer = Importer(engine, import_species(engine, args.species), args.batch)
+    start = time.perf_counter()
+    stats = importer.run()
+    print(  # noqa: T201
+        f"Imported {stats.inserted} rows in {time.perf_counter() - start:.1f} s, "
+        f"skipped {stats.skipped}, invalid {stats.invalid}, adjusted {stats.adjusted}, "
+        f"renamed {stats.renamed}",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Atomic, stack aware changes of inventory contents."""
+
+import uuid
+from collections.abc import Sequence
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from pyphoria.helper.identifiers import from_db, to_db
+from pyphoria.models import InventoryItemLink
+
+# items per statement, each one binds two parameters
+MAX_BATCH = 1000
+
+# The whole batch is a single statement, so concurrent adds to the same inventory
+# can neither lose counts nor take the same free slot twice.
+# - wanted: the requested counts summed up per item, in order of first request
+# - candidate: existing items only, capped at their stack size, non-stackable
+#   and unique_store items stack up to 1, and whether the inventory holds the
+#   item already
+# - ranked: the number of free slots the items up to this one need
+# Items that do not fit into the free slots are skipped, stored ones are stacked
+# up to their max_stack by the upsert. A stack never spills into a second slot,
+# what does not fit is dropped, and a stack that is full already is left alone,
+# so it is not returned.
+_ADD_ITEMS = """
+WITH request(item_id, item_count, position) AS (VALUES {values}),
+wanted AS (
+    SELECT item_id, sum(item_count) AS item_count, min(position) AS position
+    FROM request
+    GROUP BY item_id
+),
+candidate AS (
+    SELECT
+        item.id AS item_id,
+        min(
+            wanted.item_count,
+            CASE
+                WHEN item.stackable AND NOT item.unique_store THEN item.max_stack
+                ELSE 1
+            END
+        ) AS item_count,
+        link.item_id IS NOT NULL AS stored,
+        wanted.position AS position
+    FROM wanted
+    JOIN item ON item.id = wanted.item_id
+    LEFT JOIN inventoryitemlink AS link
+        ON link.inventory_id = :inventory_id AND link.item_id = wanted.item_id
+),
+ranked AS (
+    SELECT *, sum(NOT stored) OVER (ORDER BY position) AS slots_needed
+    FROM candidate
+)
+INSERT INTO inventoryitemlink (inventory_id, item_id, item_count)
+SELECT :inventory_id, ranked.item_id, ranked.item_count
+FROM ranked
+JOIN inventory ON inventory.id = :inventory_id
+WHERE ranked.stored OR ranked.slots_needed + (
+    SELECT count(*) FROM inventoryitemlink WHERE inventory_id = :inventory_id
+) <= inventory.slots
+ON CONFLICT (inventory_id, item_id) DO UPDATE SET item_count = min(
+    item_count + excluded.item_count,
+    ({stack_size})
+)
+WHERE item_count < ({stack_size})
+RETURNING item_id, item_count
+"""
+_STACK_SIZE = """
+    SELECT CASE WHEN stackable AND NOT unique_store THEN max_stack ELSE 1 END
+    FROM item
+    WHERE id = excluded.item_id
+"""
+
+
+def add_items(
+    session: Session,
+    inventory_id: uuid.UUID,
+    counts: Sequence[tuple[uuid.UUID, int]],
+) -> list[InventoryItemLink]:
+    """
+    Add the (item_id, count) pairs to the inventory in a single statement.
+
+    Returns the links of the items that were added or stacked with their new counts.
+    Unknown items, new items without a free slot and stored items whose stack is
+    full, like every stored item that does not stack, are left out.
+    """
+    if not counts:
+        return []
+    if len(counts) > MAX_BATCH:
+        msg = f"Cannot add more than {MAX_BATCH} items at once"
+        raise ValueError(msg)
+    # parameters of text statements skip the column type, they are bound stored
+    parameters = {"inventory_id": to_db(inventory_id)}
+    values = []
+    for position, (item_id, count) in enumerate(counts):
+        parameters[f"item_{position}"] = to_db(item_id)
+        parameters[f"count_{position}"] = count
+        values.append(f"(:item_{position}, :count_{position}, {position})")
+    statement = text(
+        _ADD_ITEMS.format(values=", ".join(values), stack_size=_STACK_SIZE),
+    )
+    return [
+        InventoryItemLink(
+            inventory_id=inventory_id,
+            item_id=from_db(item_id),
+            item_count=item_count,
+        )
+        for item_id, item_count in session.execute(statement, parameters).all()
+    ]
@@ -0,0 +1,268 @@
+"""Per-route request metrics in the Prometheus text format."""
+
+import logging
+import os
+import time
+from bisect import bisect_left
+from collections.abc import Awaitable, Callable, Sequence
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Self
+
+from sqlalchemy import Engine, event
+
+log = logging.getLogger(__name__)
+
+# in debug mode requests over either budget are logged as warnings
+METRICS_DEBUG = os.environ.get("PYPHORIA_METRICS_DEBUG", "0") == "1"
+QUERY_BUDGET = int(os.environ.get("PYPHORIA_QUERY_BUDGET", "10"))
+LATENCY_BUDGET = float(os.environ.get("PYPHORIA_LATENCY_BUDGET_MS", "500")) / 1000
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+# requests that match no route share one label, so unknown paths cannot grow the
+# number of series without bound
+UNMATCHED = "unmatched"
+
+Scope = dict
+Receive = Callable[[], Awaitable[dict]]
+Send = Callable[[dict], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+@dataclass
+class RequestStats:
+    """
+    SQL work done for a single request.
+
+    Attributes
+        queries (int): The number of statements executed.
+        query_seconds (float): The time spent executing them.
+
+    """
+
+    queries: int = 0
+    query_seconds: float = 0.0
+
+
+# the stats of the current request, the threads running sync routes copy the
+# context, so they count into the same object
+_request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats",
+    default=None,
+)
+
+
+@dataclass
+class Histogram:
+    """
+    Observations counted into cumulative buckets.
+
+    Attributes
+        buckets (Sequence[float]): The upper bounds of the buckets.
+        counts (list[int]): The observations per bucket, the last one is +Inf.
+        total (float): The sum of all observations.
+
+    """
+
+    buckets: Sequence[float]
+    counts: list[int] = field(default_factory=list)
+    total: float = 0.0
+
+    def __post_init__(self: Self) -> None:  # noqa: D105
+        self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self: Self, value: float) -> None:  # noqa: D102
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def samples(self: Self, name: str, labels: str) -> list[str]:
+        """Return the bucket, sum and count lines of the histogram."""
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts, strict=True):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.total}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class Metrics:
+    """
+    Request and SQL metrics of the worker process.
+
+    Every observation happens on the event loop once a response is sent, so the
+    counters need no lock as long as they are rendered on the event loop too.
+    Every worker process keeps its own metrics.
+
+    Attributes
+        requests (dict[tuple[str, str, int], int]): The requests by method, route and status.
+        in_progress (dict[str, int]): The requests being handled by method.
+        latency (dict[tuple[str, str], Histogram]): The request seconds by method and route.
+        queries (dict[tuple[str, str], Histogram]): The statements per request by method and route.
+        query_seconds (dict[tuple[str, str], Histogram]): The SQL seconds per request by method and route.
+
+    """
+
+    def __init__(self: Self) -> None:  # noqa: D107
+        self.requests: dict[tuple[str, str, int], int] = {}
+        self.in_progress: dict[str, int] = {}
+        self.latency: dict[tuple[str, str], Histogram] = {}
+        self.queries: dict[tuple[str, str], Histogram] = {}
+        self.query_seconds: dict[tuple[str, str], Histogram] = {}
+
+    def observe(
+        self: Self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        stats: RequestStats,
+    ) -> None:
+        """Record a finished request."""
+        key = (method, route)
+        self.requests[(*key, status)] = self.requests.get((*key, status), 0) + 1
+        if key not in self.latency:
+            self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.queries[key] = Histogram(QUERY_BUCKETS)
+            self.query_seconds[key] = Histogram(LATENCY_BUCKETS)
+        self.latency[key].observe(seconds)
+        self.queries[key].observe(stats.queries)
+        self.query_seconds[key].observe(stats.query_seconds)
+
+    def render(self: Self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP pyphoria_requests_total Requests handled.",
+            "# TYPE pyphoria_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(self.requests.items()):
+            lines.append(
+                f'pyphoria_requests_total{{method="{method}",route="{route}",'
+                f'status="{status}"}} {count}',
+            )
+        lines += [
+            "# HELP pyphoria_requests_in_progress Requests being handled.",
+            "# TYPE pyphoria_requests_in_progress gauge",
+        ]
+        for method, count in sorted(self.in_progress.items()):
+            lines.append(f'pyphoria_requests_in_progress{{method="{method}"}} {count}')
+        for name, help_text, histograms in (
+            (
+                "pyphoria_request_duration_seconds",
+                "Time to handle a request.",
+                self.latency,
+            ),
+            (
+                "pyphoria_request_queries",
+                "SQL statements executed per request.",
+                self.queries,
+            ),
+            (
+                "pyphoria_request_query_seconds",
+                "Time spent executing SQL per request.",
+                self.query_seconds,
+            ),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (method, route), histogram in sorted(histograms.items()):
+                lines += histogram.samples(name, f'method="{method}",route="{route}"')
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def _count_query(context) -> None:  # noqa: ANN001
+    """Count the statement of the execution context into the current request."""
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += time.perf_counter() - context.pyphoria_query_start
+
+
+def instrument(engine: Engine) -> None:
+    """
+    Count the statements and their time into the stats of the current request.
+
+    The start of a statement is kept on its execution context, which goes away with
+    the statement, so a failing statement leaves nothing behind on the connection.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001, ARG001, PLR0913, PLR0917
+        context.pyphoria_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def end_query(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001, ARG001, PLR0913, PLR0917
+        _count_query(context)
+
+    @event.listens_for(engine, "handle_error")
+    def failed_query(exception_context) -> None:  # noqa: ANN001
+        context = exception_context.execution_context
+        if context is not None and hasattr(context, "pyphoria_query_start"):
+            _count_query(context)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the latency and SQL work of every request by route.
+
+    Requests are labelled with the path template of the route that handled them,
+    like ``/character/{character_id}``, never with the raw path.
+    """
+
+    def __init__(self: Self, app: ASGIApp) -> None:  # noqa: D107
+        self.app = app
+        self._templates: dict[Callable, str] = {}
+
+    def _route(self: Self, scope: Scope) -> str:
+        """Return the path template of the route the router matched."""
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED
+        if not self._templates:
+            for route in scope["app"].routes:
+                if hasattr(route, "endpoint"):
+                    self._templates[route.endpoint] = route.path
+        return self._templates.get(endpoint, UNMATCHED)
+
+    async def __call__(self: Self, scope: Scope, receive: Receive, send: Send) -> None:  # noqa: D102
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+
+        async def send_status(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.in_progress[method] = metrics.in_progress.get(method, 0) + 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            seconds = time.perf_counter() - start
+            metrics.in_progress[method] -= 1
+            _request_stats.reset(token)
+            route = self._route(scope)
+            metrics.observe(method, route, status, seconds, stats)
+            if METRICS_DEBUG and (
+                stats.queries > QUERY_BUDGET or seconds > LATENCY_BUDGET
+            ):
+                log.warning(
+                    "%s %s took %.1f ms with %d queries in %.1f ms",
+                    method,
+                    route,
+                    seconds * 1000,
+                    stats.queries,
+                    stats.query_seconds * 1000,
+                )
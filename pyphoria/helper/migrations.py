@@ -0,0 +1,483 @@
+"""
+Versioned schema migrations of the database.
+
+The applied version is stored in the ``schema_version`` table. Migrations run
+once, in order, from an explicit command
+
+    python -m pyphoria.helper.migrations
+
+and the server only checks the version on startup, so booting a worker is a
+single query instead of reflecting every table, and several workers booting at
+once never race on DDL.
+
+Every migration is idempotent. The first one creates the tables of the current
+models, so on a new database the later ones find nothing left to do, while
+databases created before versioning are brought up to date by them.
+
+How UUIDs are stored is chosen per database with PYPHORIA_UUID_STORAGE, after
+changing it ``--convert-uuids`` rewrites the stored keys.
+"""
+
+import argparse
+import logging
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from typing import NamedTuple
+
+from sqlalchemy import Connection, Engine, Index, Table, text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import SQLModel
+
+from pyphoria.helper.identifiers import (
+    SQLITE_TYPE,
+    UUID_STORAGE,
+    UUIDType,
+    from_db,
+    to_db,
+)
+
+log = logging.getLogger(__name__)
+
+# rows listed in the error of a migration the data does not allow
+REPORT_ROWS = 20
+
+_CREATE_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER NOT NULL PRIMARY KEY,
+    description TEXT NOT NULL,
+    applied_at TEXT NOT NULL
+)
+"""
+
+
+class Migration(NamedTuple):
+    """
+    A step from the previous schema version to ``version``.
+
+    Attributes
+        version (int): The schema version after the migration.
+        description (str): What the migration changes.
+        apply (Callable[[Connection], None]): Changes the schema, must be idempotent.
+
+    """
+
+    version: int
+    description: str
+    apply: Callable[[Connection], None]
+
+
+def _tables() -> dict[str, Table]:
+    """Return the tables of the models by name."""
+    # registers the tables with the metadata
+    import pyphoria.models  # noqa: F401, PLC0415
+
+    return SQLModel.metadata.tables
+
+
+def _create_tables(connection: Connection) -> None:
+    SQLModel.metadata.create_all(connection, tables=list(_tables().values()))
+
+
+class MigrationError(RuntimeError):
+    """The data in the database keeps a migration from being applied."""
+
+
+def _report(problem: str, rows: list[str], total: int) -> MigrationError:
+    """Return the error of ``total`` offending rows, listing the first of them."""
+    listed = "\n".join(f"  {row}" for row in rows[:REPORT_ROWS])
+    more = f"\n  and {total - REPORT_ROWS} more" if total > REPORT_ROWS else ""
+    return MigrationError(
+        f"{problem}, fix them and run the migrations again:\n{listed}{more}",
+    )
+
+
+def _check_unique(connection: Connection, index: Index) -> None:
+    """Raise listing the rows that would break the new unique index."""
+    columns = ", ".join(f'"{column.name}"' for column in index.columns)
+    present = " AND ".join(f'"{column.name}" IS NOT NULL' for column in index.columns)
+    duplicates = connection.exec_driver_sql(
+        f'SELECT {columns}, count(*) FROM "{index.table.name}" '  # noqa: S608
+        f"WHERE {present} GROUP BY {columns} HAVING count(*) > 1",
+    ).all()
+    if duplicates:
+        table = index.table.name
+        msg = f"{len(duplicates)} values of {table} ({columns}) are not unique"
+        raise _report(
+            msg,
+            [
+                f"{', '.join(map(str, row[:-1]))} ({row[-1]} rows)"
+                for row in duplicates[:REPORT_ROWS]
+            ],
+            len(duplicates),
+        )
+
+
+def _create_indexes(connection: Connection) -> None:
+    # create_all skips tables that exist already, and with them their new indexes
+    for table in _tables().values():
+        for index in table.indexes:
+            if index.unique and not _has_index(connection, index.name):
+                _check_unique(connection, index)
+            index.create(connection, checkfirst=True)
+
+
+def _has_index(connection: Connection, name: str) -> bool:
+    return (
+        connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?",
+            (name,),
+        ).first()
+        is not None
+    )
+
+
+def _has_foreign_key(
+    connection: Connection,
+    table: str,
+    column: str,
+    on_delete: str,
+) -> bool:
+    foreign_keys = connection.exec_driver_sql(
+        f'PRAGMA foreign_key_list("{table}")',
+    ).mappings()
+    return any(
+        key["from"] == column and key["on_delete"] == on_delete for key in foreign_keys
+    )
+
+
+def _check_foreign_keys(connection: Connection, table: str) -> None:
+    """Raise listing the rows of the table that reference missing rows."""
+    violations = connection.exec_driver_sql(
+        f'PRAGMA foreign_key_check("{table}")',
+    ).all()
+    if not violations:
+        return
+    keys = {
+        key["id"]: key["from"]
+        for key in connection.exec_driver_sql(
+            f'PRAGMA foreign_key_list("{table}")',
+        ).mappings()
+    }
+    rows = []
+    for _, rowid, parent, key in violations[:REPORT_ROWS]:
+        column = keys[key]
+        value = connection.exec_driver_sql(
+            f'SELECT "{column}" FROM "{table}" WHERE rowid = ?',  # noqa: S608
+            (rowid,),
+        ).scalar()
+        rows.append(f"row {rowid}: {column} {value} is not in {parent}")
+    msg = f"{len(violations)} rows of {table} reference missing rows"
+    raise _report(
+        msg,
+        rows,
+        len(violations),
+    )
+
+
+def _rebuild(connection: Connection, table: Table) -> None:
+    """Recreate the table from the model, SQLite cannot alter its constraints."""
+    # the copy enforces the foreign keys, report the rows it would fail on
+    _check_foreign_keys(connection, table.name)
+    old = f"{table.name}_old"
+    # index names are global, the new table creates them again
+    indexes = connection.execute(
+        text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' "
+            "AND tbl_name = :table AND sql IS NOT NULL",
+        ),
+        {"table": table.name},
+    ).scalars()
+    for index in indexes.all():
+        connection.exec_driver_sql(f'DROP INDEX "{index}"')
+    connection.exec_driver_sql(f'ALTER TABLE "{table.name}" RENAME TO "{old}"')
+    table.create(connection)
+    existing = {
+        row["name"]
+        for row in connection.exec_driver_sql(f'PRAGMA table_info("{old}")').mappings()
+    }
+    columns = ", ".join(
+        f'"{column.name}"' for column in table.columns if column.name in existing
+    )
+    connection.exec_driver_sql(
+        f'INSERT INTO "{table.name}" ({columns}) SELECT {columns} FROM "{old}"',  # noqa: S608
+    )
+    connection.exec_driver_sql(f'DROP TABLE "{old}"')
+
+
+def _add_delete_actions(connection: Connection) -> None:
+    tables = _tables()
+    if not _has_foreign_key(connection, "inventoryitemlink", "inventory_id", "CASCADE"):
+        # the rows the missing actions would have removed
+        connection.exec_driver_sql(
+            "DELETE FROM inventoryitemlink "
+            "WHERE inventory_id NOT IN (SELECT id FROM inventory) "
+            "OR item_id NOT IN (SELECT id FROM item)",
+        )
+        _rebuild(connection, tables["inventoryitemlink"])
+    if not _has_foreign_key(connection, "character", "inventory_id", "SET NULL"):
+        connection.exec_driver_sql(
+            "UPDATE character SET inventory_id = NULL "
+            "WHERE inventory_id NOT IN (SELECT id FROM inventory)",
+        )
+        _rebuild(connection, tables["character"])
+
+
+def _drop_primary_key_indexes(connection: Connection) -> None:
+    # the primary keys are indexed already, these only doubled the size of the keys
+    for index in ("ix_species_id", "ix_character_id"):
+        connection.exec_driver_sql(f'DROP INDEX IF EXISTS "{index}"')
+
+
+# Every change of a character's level or experience is logged with the values
+# before and after (NULL for a character that is new or deleted), a row without
+# either asks every worker to reload its leaderboard. The log keeps its last rows.
+CHANGE_LOG = "leaderboard_change"
+CHANGE_LOG_KEEP = 100_000
+_CREATE_CHANGE_LOG = f"""
+CREATE TABLE IF NOT EXISTS {CHANGE_LOG} (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    old_level INTEGER,
+    old_experience INTEGER,
+    level INTEGER,
+    experience INTEGER
+)
+"""
+_CHANGE_TRIGGERS = {
+    "leaderboard_insert": f"""
+        AFTER INSERT ON character BEGIN
+            INSERT INTO {CHANGE_LOG} (level, experience)
+            VALUES (NEW.level, NEW.experience);
+        END""",  # noqa: S608
+    "leaderboard_update": f"""
+        AFTER UPDATE OF level, experience ON character
+        WHEN OLD.level IS NOT NEW.level OR OLD.experience IS NOT NEW.experience
+        BEGIN
+            INSERT INTO {CHANGE_LOG} (old_level, old_experience, level, experience)
+            VALUES (OLD.level, OLD.experience, NEW.level, NEW.experience);
+        END""",  # noqa: S608
+    "leaderboard_delete": f"""
+        AFTER DELETE ON character BEGIN
+            INSERT INTO {CHANGE_LOG} (old_level, old_experience)
+            VALUES (OLD.level, OLD.experience);
+        END""",  # noqa: S608
+    "leaderboard_prune": f"""
+        AFTER INSERT ON {CHANGE_LOG} BEGIN
+            DELETE FROM {CHANGE_LOG} WHERE seq <= NEW.seq - {CHANGE_LOG_KEEP};
+        END""",  # noqa: S608
+}
+
+
+def _create_change_triggers(connection: Connection) -> None:
+    for name, body in _CHANGE_TRIGGERS.items():
+        connection.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def _add_leaderboard(connection: Connection) -> None:
+    _create_indexes(connection)
+    connection.exec_driver_sql(_CREATE_CHANGE_LOG)
+    _create_change_triggers(connection)
+
+
+def change_log_position(connection: Connection) -> int:
+    """Return the number of the last change ever logged, deleted rows included."""
+    return connection.exec_driver_sql(
+        "SELECT coalesce(max(seq), 0) FROM sqlite_sequence WHERE name = ?",
+        (CHANGE_LOG,),
+    ).scalar_one()
+
+
+def request_reload(connection: Connection, after: int = 0) -> None:
+    """
+    Make every worker reload its leaderboard, after changes the log missed.
+
+    ``after`` numbers the request past a position of another copy of the database,
+    which a worker may have read before the copy replaced this one.
+    """
+    position = max(change_log_position(connection), after) + 1
+    connection.exec_driver_sql(
+        f"INSERT INTO {CHANGE_LOG} (seq) VALUES (?)",  # noqa: S608
+        (position,),
+    )
+
+
+@contextmanager
+def change_log_suspended(connection: Connection) -> Iterator[None]:
+    """
+    Leave bulk changes of the characters out of the leaderboard change log.
+
+    The triggers are dropped for the duration, so loading or deleting millions of
+    characters neither writes a log entry per row nor keeps SQLite from truncating
+    the table. Afterwards the workers reload their leaderboards. The connection must
+    not be in a transaction.
+    """
+    with connection.begin():
+        for name in _CHANGE_TRIGGERS:
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+    try:
+        yield
+    finally:
+        with connection.begin():
+            _create_change_triggers(connection)
+            request_reload(connection)
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(1, "Create the tables", _create_tables),
+    Migration(
+        2,
+        "Index character names, item links and character inventories",
+        _create_indexes,
+    ),
+    Migration(
+        3,
+        "Cascade inventory and item deletes, character inventories are optional",
+        _add_delete_actions,
+    ),
+    Migration(
+        4,
+        "Drop the indexes duplicating primary keys",
+        _drop_primary_key_indexes,
+    ),
+    Migration(
+        5,
+        "Index character levels and log their changes for the leaderboard",
+        _add_leaderboard,
+    ),
+)
+LATEST = MIGRATIONS[-1].version
+
+
+class SchemaOutdatedError(RuntimeError):
+    """The database is not at the schema version the code expects."""
+
+
+def current_version(connection: Connection) -> int:
+    """Return the applied schema version, 0 for a database without versioning."""
+    try:
+        version = connection.exec_driver_sql(
+            "SELECT max(version) FROM schema_version",
+        ).scalar()
+    except OperationalError:
+        return 0
+    return version or 0
+
+
+def check(engine: Engine) -> None:
+    """Raise unless the database is at the latest schema version and UUID storage."""
+    with engine.connect() as connection:
+        try:
+            version, stored = connection.exec_driver_sql(
+                "SELECT (SELECT max(version) FROM schema_version), "
+                "(SELECT typeof(id) FROM inventory LIMIT 1)",
+            ).one()
+        except OperationalError:
+            version, stored = 0, None
+    if version != LATEST:
+        msg = (
+            f"Database schema is at version {version}, the code needs {LATEST}, "
+            "run python -m pyphoria.helper.migrations"
+        )
+        raise SchemaOutdatedError(msg)
+    if stored is not None and stored != SQLITE_TYPE:
+        msg = (
+            f"Database stores UUIDs as {stored}, PYPHORIA_UUID_STORAGE is "
+            f"{UUID_STORAGE}, run python -m pyphoria.helper.migrations --convert-uuids"
+        )
+        raise SchemaOutdatedError(msg)
+
+
+def migrate(engine: Engine) -> int:
+    """Apply the pending migrations and return the schema version."""
+    with engine.connect() as connection:
+        # one writer at a time, a concurrent run waits and then finds nothing to do
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        connection.exec_driver_sql(_CREATE_VERSION_TABLE)
+        version = current_version(connection)
+        if version > LATEST:
+            connection.rollback()
+            msg = f"Database schema version {version} is newer than the code ({LATEST})"
+            raise SchemaOutdatedError(msg)
+        for migration in MIGRATIONS:
+            if migration.version <= version:
+                continue
+            log.info("Migrating to version %d: %s", *migration[:2])
+            migration.apply(connection)
+            connection.execute(
+                text(
+                    "INSERT INTO schema_version (version, description, applied_at) "
+                    "VALUES (:version, :description, :applied_at)",
+                ),
+                {
+                    "version": migration.version,
+                    "description": migration.description,
+                    "applied_at": datetime.now(UTC).isoformat(),
+                },
+            )
+        # DDL is transactional in SQLite, a failed migration leaves no trace
+        connection.commit()
+    return LATEST
+
+
+def convert_uuids(engine: Engine, batch: int = 10_000) -> int:
+    """
+    Rewrite every stored UUID in the configured PYPHORIA_UUID_STORAGE.
+
+    Returns the number of values converted. Keys already stored that way are
+    left alone, so an interrupted conversion can simply be run again.
+    """
+    converted = 0
+    with engine.connect() as connection:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        # parents and children are converted one after the other
+        connection.exec_driver_sql("PRAGMA defer_foreign_keys = ON")
+        for table in _tables().values():
+            for column in table.columns:
+                if not isinstance(column.type, UUIDType):
+                    continue
+                rows = connection.exec_driver_sql(
+                    f'SELECT rowid, "{column.name}" FROM "{table.name}" '  # noqa: S608
+                    f"WHERE typeof(\"{column.name}\") NOT IN (?, 'null')",
+                    (SQLITE_TYPE,),
+                ).all()
+                for start in range(0, len(rows), batch):
+                    connection.exec_driver_sql(
+                        f'UPDATE "{table.name}" SET "{column.name}" = ? '  # noqa: S608
+                        "WHERE rowid = ?",
+                        [
+                            (to_db(from_db(value)), rowid)
+                            for rowid, value in rows[start : start + batch]
+                        ],
+                    )
+                converted += len(rows)
+        connection.commit()
+    return converted
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--convert-uuids",
+        action="store_true",
+        help="store every UUID the way PYPHORIA_UUID_STORAGE asks for",
+    )
+    args = parser.parse_args()
+
+    from pyphoria.helper.database import engine  # noqa: PLC0415
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        version = migrate(engine)
+    except MigrationError as error:
+        parser.exit(1, f"{error}\n")
+    print(f"Database schema is at version {version}")  # noqa: T201
+    if args.convert_uuids:
+        converted = convert_uuids(engine)
+        print(f"Converted {converted} UUIDs to {UUID_STORAGE} storage")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
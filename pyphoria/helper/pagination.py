@@ -0,0 +1,144 @@
+"""Keyset pagination and field projection for the list routes."""
+
+import base64
+import binascii
+import uuid
+from collections.abc import Sequence
+from typing import Annotated, Self
+
+from fastapi import Depends, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse
+from sqlmodel import Session, SQLModel, select
+
+from pyphoria.helper import readmodel
+from pyphoria.helper.serializer import FastJSONResponse
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(key: uuid.UUID) -> str:
+    """Return the opaque cursor pointing after the row with the key."""
+    return base64.urlsafe_b64encode(key.bytes).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> uuid.UUID:
+    """Return the key the cursor points after."""
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        return uuid.UUID(bytes=base64.urlsafe_b64decode(cursor + padding))
+    except (binascii.Error, ValueError):
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid cursor",
+        ) from None
+
+
+class Page:
+    """Query parameters of a page of a list route."""
+
+    def __init__(
+        self: Self,
+        limit: Annotated[int, Query(ge=1, le=MAX_LIMIT)] = DEFAULT_LIMIT,
+        cursor: Annotated[
+            str | None,
+            Query(description=f"The {NEXT_CURSOR_HEADER} of the previous page"),
+        ] = None,
+        fields: Annotated[
+            str | None,
+            Query(description="Comma separated columns to return, id is always sent"),
+        ] = None,
+    ) -> None:
+        """Store the page parameters, the cursor is decoded right away."""
+        self.limit = limit
+        self.after = decode_cursor(cursor) if cursor else None
+        self.fields = (
+            [name.strip() for name in fields.split(",") if name.strip()]
+            if fields
+            else None
+        )
+
+
+PageDep = Annotated[Page, Depends()]
+
+
+def selected_columns(model: type[SQLModel], page: Page) -> list[str] | None:
+    """
+    Return the columns to send for the page, None to send validated model instances.
+
+    Without ``fields`` every column is sent, unless trusted reads are turned off.
+    """
+    if page.fields:
+        return projected_columns(model, page.fields)
+    if readmodel.TRUSTED_READS:
+        return readmodel.table_columns(model)
+    return None
+
+
+def projected_columns(model: type[SQLModel], fields: Sequence[str]) -> list[str]:
+    """Return the id and the requested columns of the model, rejecting unknown ones."""
+    table_columns = model.__table__.columns
+    unknown = [name for name in fields if name not in table_columns]
+    if unknown:
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown fields: {', '.join(unknown)}",
+        )
+    return ["id", *(name for name in dict.fromkeys(fields) if name != "id")]
+
+
+def page_response(
+    rows: Sequence,
+    page: Page,
+    response: Response,
+    columns: Sequence[str] | None = None,
+) -> Sequence[SQLModel] | JSONResponse:
+    """
+    Turn up to ``limit + 1`` fetched rows into the response of the page.
+
+    The extra row only tells whether there is a next page. Rows are model instances,
+    or tuples of the ``columns`` starting with the id, which are sent as JSON objects
+    without going through the response model.
+    """
+    headers = {}
+    if len(rows) > page.limit:
+        rows = rows[: page.limit]
+        last = rows[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(last[0] if columns else last.id)
+
+    if columns:
+        # the serializer encodes the UUID and datetime columns itself
+        return FastJSONResponse(
+            [dict(zip(columns, row, strict=True)) for row in rows],
+            headers=headers,
+        )
+    response.headers.update(headers)
+    return rows
+
+
+def paginate(
+    session: Session,
+    model: type[SQLModel],
+    page: Page,
+    response: Response,
+) -> Sequence[SQLModel] | JSONResponse:
+    """
+    Return one page of the table ordered by its primary key.
+
+    Rows are fetched with ``id > cursor`` on the primary key index, so every page
+    costs the same no matter how deep into the table it is. The cursor of the next
+    page is sent in the ``X-Next-Cursor`` header, which is missing on the last page.
+    The columns are streamed to JSON as plain tuples, with ``fields`` only the
+    requested ones are selected.
+    """
+    key = model.id
+    columns = selected_columns(model, page)
+    if columns:
+        statement = select(*(getattr(model, name) for name in columns))
+    else:
+        statement = select(model)
+    if page.after is not None:
+        statement = statement.where(key > page.after)
+    rows = session.exec(statement.order_by(key).limit(page.limit + 1)).all()
+    return page_response(rows, page, response, columns)
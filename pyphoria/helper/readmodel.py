@@ -0,0 +1,33 @@
+"""Trusted construction of responses from rows of our own database."""
+
+import os
+from typing import TypeVar
+
+from pydantic import BaseModel
+from sqlmodel import SQLModel
+
+# Rows read back from the database were validated when they were written, with
+# trusted reads they are sent without validating them against the response model
+# again. PYPHORIA_TRUSTED_READS=0 validates every row like FastAPI does by default.
+TRUSTED_READS = os.environ.get("PYPHORIA_TRUSTED_READS", "1") == "1"
+
+ReadModel = TypeVar("ReadModel", bound=BaseModel)
+
+
+def table_columns(model: type[SQLModel]) -> list[str]:
+    """Return the column names of the model's table, the id first."""
+    return ["id", *(c.name for c in model.__table__.columns if c.name != "id")]
+
+
+def construct(read_model: type[ReadModel], row: SQLModel) -> ReadModel:
+    """
+    Build the read model from a row without validating it again.
+
+    FastAPI accepts an instance of the response model as is, so the row is neither
+    validated nor copied field by field once more before it is serialized.
+    """
+    if not TRUSTED_READS:
+        return read_model.model_validate(row, from_attributes=True)
+    return read_model.model_construct(
+        **{name: getattr(row, name) for name in read_model.model_fields},
+    )
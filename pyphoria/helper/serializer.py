@@ -0,0 +1,85 @@
+"""JSON encoding with the fastest installed backend."""
+
+import datetime as dt
+import json
+import os
+from typing import Any, Self
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover
+    msgspec = None
+
+BACKENDS = tuple(
+    name
+    for name, module in (("orjson", orjson), ("msgspec", msgspec), ("json", json))
+    if module is not None
+)
+# PYPHORIA_JSON forces a backend, by default the first installed one is used
+BACKEND = os.environ.get("PYPHORIA_JSON", BACKENDS[0])
+if BACKEND not in BACKENDS:
+    msg = f"JSON backend {BACKEND!r} is not installed, choose one of {BACKENDS}"
+    raise ValueError(msg)
+
+
+def _default(obj: Any) -> Any:  # noqa: ANN401
+    """Encode the values the backends do not know natively."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, dt.date | dt.time):
+        return obj.isoformat()
+    if isinstance(obj, set | frozenset):
+        return list(obj)
+    # UUIDs and anything else end up as their string, like json.dump(default=str)
+    return str(obj)
+
+
+if BACKEND == "orjson":
+    DecodeError = orjson.JSONDecodeError
+    _options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(obj: Any) -> bytes:  # noqa: ANN401
+        """Return the compact JSON encoding of the object."""
+        return orjson.dumps(obj, default=_default, option=_options)
+
+    loads = orjson.loads
+
+elif BACKEND == "msgspec":
+    DecodeError = msgspec.DecodeError
+    _encoder = msgspec.json.Encoder(enc_hook=_default, decimal_format="number")
+    _decoder = msgspec.json.Decoder()
+
+    def dumps(obj: Any) -> bytes:  # noqa: ANN401
+        """Return the compact JSON encoding of the object."""
+        return _encoder.encode(obj)
+
+    loads = _decoder.decode
+
+else:
+    DecodeError = json.JSONDecodeError
+
+    def dumps(obj: Any) -> bytes:  # noqa: ANN401
+        """Return the compact JSON encoding of the object."""
+        return json.dumps(
+            obj,
+            default=_default,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode()
+
+    loads = json.loads
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by the selected backend, the app's default response."""
+
+    def render(self: Self, content: Any) -> bytes:  # noqa: ANN401, D102
+        return dumps(content)
@@ -1,221 +1,126 @@
-""""Interface!!!!!! to sqlite."""
+"""Interface!!!!!! to sqlite."""
 
-import contextlib
+import argparse
 import logging
-
-import sqlalchemy
-from sqlmodel import Session, SQLModel, create_engine, select
-
-from pyphoria.models import Character, Inventory, Item, Monster, Planet, Species
-
-SQLITE_DB = "database.db"
-sqlite_url = f"sqlite:///{SQLITE_DB}"
-
+import sqlite3
+import time
+from pathlib import Path
+
+from sqlalchemy import Engine
+from sqlmodel import SQLModel
+
+from pyphoria.helper.database import engine
+from pyphoria.helper.generator import Counts, generate
+from pyphoria.helper.migrations import (
+    CHANGE_LOG,
+    change_log_position,
+    change_log_suspended,
+    migrate,
+    request_reload,
+)
 
 log = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
 
-engine = create_engine(sqlite_url, echo=False)
-
-
-def clear_db():  # noqa: ANN201, D103
-    with Session(engine) as session, contextlib.suppress(
-        sqlalchemy.exc.OperationalError,
-    ):
-        planets = session.exec(select(Planet))
-        for planet in planets:
-            session.delete(planet)
-
-        monsters = session.exec(select(Monster))
-        for monster in monsters:
-            session.delete(monster)
-
-        items = session.exec(select(Item))
-        for item in items:
-            session.delete(item)
-
-        species = session.exec(select(Species))
-        for specie in species:
-            session.delete(specie)
-
-        characters = session.exec(select(Character))
-        for character in characters:
-            session.delete(character)
-
-        inventories = session.exec(select(Inventory))
-        for inventory in inventories:
-            session.delete(inventory)
-
-        session.commit()
-
-
-def create_db_and_tables():  # noqa: ANN201, D103
-    SQLModel.metadata.create_all(engine)
-
 
-def create_planets():  # noqa: ANN201, D103
-    earth = Planet(
-        name="Earth",
-        description="The third planet from the Sun and the only astronomical object known to harbor life.",
-        icon="earth.png",
+def clear_db(bind: Engine = engine) -> None:
+    """
+    Delete every row of the game tables, keeping the schema.
+
+    One DELETE per table, children first. With the foreign keys and the leaderboard
+    triggers switched off for the connection SQLite truncates each table in one go,
+    instead of checking every row against the tables referencing it.
+    """
+    with bind.connect() as connection:
+        # only outside of a transaction does SQLite change the setting
+        connection.exec_driver_sql("PRAGMA foreign_keys = OFF")
+        connection.commit()
+        try:
+            with change_log_suspended(connection), connection.begin():
+                for table in reversed(SQLModel.metadata.sorted_tables):
+                    name = table.name
+                    connection.exec_driver_sql(f'DELETE FROM "{name}"')  # noqa: S608
+                connection.exec_driver_sql(f"DELETE FROM {CHANGE_LOG}")  # noqa: S608
+        finally:
+            connection.exec_driver_sql("PRAGMA foreign_keys = ON")
+            connection.commit()
+
+
+def snapshot(bind: Engine = engine, target: str = ":memory:") -> sqlite3.Connection:
+    """
+    Copy the whole database into the target file, in memory by default.
+
+    Returns the connection of the copy, an in-memory snapshot lives as long as it
+    is open. The copy is taken page by page with the SQLite backup API, so it is
+    consistent even while the app keeps writing.
+    """
+    copy = sqlite3.connect(target, check_same_thread=False)
+    source = bind.raw_connection()
+    try:
+        source.driver_connection.backup(copy)
+    finally:
+        source.close()
+    return copy
+
+
+def restore(source: sqlite3.Connection | str, bind: Engine = engine) -> None:
+    """
+    Replace the content of the database with a snapshot or a template file.
+
+    The pages are copied over the live database, so the engine and its pooled
+    connections keep working. The leaderboards reload, other data cached by the
+    app, like the catalog, does not. A template file is opened read only, a missing
+    one raises instead of restoring an empty database.
+    """
+    snapshot_connection = (
+        sqlite3.connect(f"{Path(source).resolve().as_uri()}?mode=ro", uri=True)
+        if isinstance(source, str)
+        else source
     )
-    with Session(engine) as session:
-        session.add(earth)
-        session.commit()
+    with bind.connect() as connection:
+        position = change_log_position(connection)
+    target = bind.raw_connection()
+    try:
+        snapshot_connection.backup(target.driver_connection)
+    finally:
+        target.close()
+        if isinstance(source, str):
+            snapshot_connection.close()
+    with bind.begin() as connection:
+        request_reload(connection, after=position)
 
 
-def create_stuff():
-
-    session = Session(engine)
+def create_db_and_tables():  # noqa: ANN201, D103
+    migrate(engine)
 
-    # def create_monsters():
-    goblin = Monster(
-        name="Goblin",
-        description="A small, grotesque, greedy, and evil creature that does evil things.",
-        level=1,
-        base_damage=1,
-        icon="goblin.png",
-    )
-    session.add(goblin)
-    session.commit()
-
-    # def create_items():
-    gun = Item(
-        name="Gun",
-        description="A weapon consisting of a metal tube, with mechanical attachments, from which projectiles are shot by the force of an explosive.",
-        type="weapon",
-        stackable=False,
-        max_stack=1,
-        unique_store=False,
-        unique_equipped=False,
-        requirement_level=1,
-        requirement_strength=2,
-        requirement_dexterity=1,
-        requirement_intelligence=2,
-        damage_fire=1,
-        damage_physical=1,
-        icon="gun.png",
-    )
-    sword = Item(
-        name="Sword",
-        description="A weapon consisting typically of a long, straight or slightly curved blade, sharp-edged on one or both sides, with one end pointed and the other fixed in a hilt or handle.",
-        type="weapon",
-        stackable=False,
-        max_stack=1,
-        unique_store=False,
-        unique_equipped=False,
-        requirement_level=1,
-        requirement_strength=2,
-        requirement_dexterity=1,
-        requirement_intelligence=1,
-        damage_fire=0,
-        damage_physical=2,
-        icon="sword.png",
-    )
-    session.add(gun)
-    session.add(sword)
-    session.commit()
-
-    # def create_species():
-    human = Species(
-        name="Human",
-        description="Yknow, humans.",
-        icon="human.png",
-        base_strength=1,
-        base_dexterity=1,
-        base_intelligence=1,
-        stat_combat=1,
-        stat_dodge_rating=1,
-        stat_hit_rating=13,
-        stat_intelligence=1,
-        stat_luck=1,
-        stat_vitality=1,
-    )
-    alien = Species(
-        name="Alien",
-        description="Yknow, aliens.",
-        icon="alien.png",
-        base_strength=1,
-        base_dexterity=1,
-        base_intelligence=1,
-        stat_combat=1,
-        stat_dodge_rating=1,
-        stat_hit_rating=1,
-        stat_intelligence=3,
-        stat_luck=1,
-        stat_vitality=1,
-    )
-    session.add(human)
-    session.add(alien)
-    session.commit()
 
-    peter_inventory = Inventory(
-        slots=10,
-        gold=110,
-    )
-    jaqueline_inventory = Inventory(
-        slots=10,
-        gold=120,
-    )
-
-    peter = Character(
-        species=human.id,
-        name="Peter",
-        surname="Parker",
-        level=1,
-        experience=1,
-        energy=10,
-        inventory_id=peter_inventory.id,
-        strength=1,
-        dexterity=1,
-        intelligence=1,
-        stat_combat=1,
-        stat_dodge_rating=1,
-        stat_hit_rating=13,
-        stat_intelligence=1,
-        stat_luck=1,
-        stat_vitality=1,
+def main():  # noqa: ANN201, D103
+    parser = argparse.ArgumentParser(
+        description="Reset the database and fill it with generated data.",
     )
-    jaqueline = Character(
-        species=alien.id,
-        name="Jaqueline",
-        surname="Smith",
-        level=1,
-        experience=1,
-        energy=10,
-        inventory_id=jaqueline_inventory.id,
-        strength=1,
-        dexterity=1,
-        intelligence=1,
-        stat_combat=1,
-        stat_dodge_rating=1,
-        stat_hit_rating=13,
-        stat_intelligence=1,
-        stat_luck=1,
-        stat_vitality=1,
+    parser.add_argument("--characters", type=int, default=Counts().characters)
+    parser.add_argument("--empty", action="store_true", help="only reset")
+    parser.add_argument("--snapshot", help="copy the result into this file")
+    parser.add_argument(
+        "--restore",
+        help="replace the database with this snapshot instead",
     )
-    session.add(peter_inventory)
-    session.add(jaqueline_inventory)
-    session.add(peter)
-    session.add(jaqueline)
-    peter_inventory.items.append(gun)
-    jaqueline_inventory.items = [sword, gun]
-    print("Jaqueline inventory items:")
-    for _item in jaqueline_inventory.items:
-        print("- " + _item.name)
-    session.commit()
-
+    args = parser.parse_args()
 
-def main():  # noqa: ANN201, D103
-    clear_db()
+    start = time.perf_counter()
+    if args.restore:
+        restore(args.restore)
+        log.info("Restored %s in %.3f s", args.restore, time.perf_counter() - start)
+        return
     create_db_and_tables()
-    create_planets()
-    create_stuff()
-    # create_monsters()
-    # create_items()
-    # create_species()
-    # create_characters()
+    clear_db()
+    if not args.empty:
+        # python -m pyphoria.helper.generator creates data of any size
+        generate(engine, Counts(characters=args.characters))
+    log.info("Reset the database in %.3f s", time.perf_counter() - start)
+    if args.snapshot:
+        snapshot(target=args.snapshot).close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,195 @@
+"""Write-behind coalescing of the saves of the JSON file models."""
+
+import atexit
+import copy
+import os
+import threading
+from collections import Counter
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from typing import NamedTuple, Self
+
+from pyphoria.helper import files
+
+WRITE_BEHIND = os.environ.get("PYPHORIA_WRITE_BEHIND", "0") == "1"
+FLUSH_INTERVAL = float(os.environ.get("PYPHORIA_FLUSH_INTERVAL", "1.0"))
+FLUSH_MAX_PENDING = int(os.environ.get("PYPHORIA_FLUSH_MAX_PENDING", "100"))
+
+
+class PendingWrite(NamedTuple):
+    """
+    The writes a dirty file waits for.
+
+    Attributes
+        data (dict | None): The data to write as a whole, before the entries.
+        entries (dict[tuple, dict]): The journal entries to append, by their path.
+
+    """
+
+    data: dict | None
+    entries: dict[tuple, dict]
+
+
+class WriteBehind:
+    """
+    Buffer of dirty JSON files that are written out together.
+
+    Models call ``mark_dirty`` instead of writing their file. A file marked dirty
+    several times before the next flush is written only once, with the data of its
+    last mark. A mark naming the changed paths of the data journals only the
+    values at those paths, a mark without writes all of it. Outside of write-behind
+    mode every mark is written right away,
+    except inside a ``batch`` scope, which always defers the writes to its end.
+    The end of a scope writes the files marked in it, flushes in between leave
+    them dirty, so the scopes of other threads write only their own files.
+    Deferred values are copied when marked, the models keep changing theirs while
+    another thread writes the copy. A write that fails leaves its file and the
+    ones not written yet dirty.
+
+    Attributes
+        enabled (bool): Whether marks are buffered until the next flush.
+        interval (float): The seconds a dirty file waits for the timed flush.
+        max_pending (int): The number of dirty files that trigger a flush right away.
+        writes (int): The number of files written so far.
+        marks (int): The number of times a file was marked dirty so far.
+
+    """
+
+    def __init__(
+        self: Self,
+        *,
+        enabled: bool = WRITE_BEHIND,
+        interval: float = FLUSH_INTERVAL,
+        max_pending: int = FLUSH_MAX_PENDING,
+    ) -> None:
+        """Create an empty buffer, the flush timer only runs while files are dirty."""
+        self.enabled = enabled
+        self.interval = interval
+        self.max_pending = max_pending
+        self.writes = 0
+        self.marks = 0
+        self._pending: dict[str, PendingWrite] = {}
+        self._lock = threading.RLock()
+        self._timer: threading.Timer | None = None
+        self._scope = threading.local()
+        # the files marked in the open batch scopes of all threads
+        self._held: Counter[str] = Counter()
+
+    def __len__(self: Self) -> int:  # noqa: D105
+        return len(self._pending)
+
+    @property
+    def batching(self: Self) -> bool:
+        """Return whether the calling thread is inside a ``batch`` scope."""
+        return getattr(self._scope, "depth", 0) > 0
+
+    def mark_dirty(
+        self: Self,
+        file_name: str,
+        data: dict,
+        changed: Iterable[Sequence[str]] | None = None,
+    ) -> None:
+        """Schedule the values at the changed paths, or all data, to be written."""
+        batching = self.batching
+        deferred = self.enabled or batching
+        with self._lock:
+            self.marks += 1
+            if changed is None:
+                data = copy.deepcopy(data) if deferred else data
+                self._pending[file_name] = PendingWrite(data, {})
+            else:
+                pending = self._pending.setdefault(file_name, PendingWrite(None, {}))
+                for entry in files.journal_entries(data, changed, copy_values=deferred):
+                    # the last value of a path is written after the earlier ones
+                    path = tuple(entry["path"])
+                    pending.entries.pop(path, None)
+                    pending.entries[path] = entry
+            if batching and file_name not in self._scope.files:
+                self._scope.files[file_name] = None
+                self._held[file_name] += 1
+            if len(self._pending) >= self.max_pending:
+                self.flush()
+            elif batching:
+                return
+            elif not self.enabled:
+                self.flush(file_name)
+            else:
+                self._schedule()
+
+    def _schedule(self: Self) -> None:
+        """Start the timer of the next flush, unless it is running already."""
+        if self._timer is None:
+            self._timer = threading.Timer(self.interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self: Self, file_name: str | None = None, *, held: bool = False) -> int:
+        """
+        Write the dirty file, or every dirty file, and return the number written.
+
+        The files of open ``batch`` scopes are left to the end of their scopes,
+        unless ``held`` is set.
+        """
+        with self._lock:
+            if file_name is None:
+                names = [name for name in self._pending if held or not self._held[name]]
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            else:
+                names = [file_name]
+            return self._write(names)
+
+    def _write(self: Self, names: list[str]) -> int:
+        """Write the pending files of the names, call with the lock held."""
+        pending = {
+            name: self._pending.pop(name) for name in names if name in self._pending
+        }
+        written = 0
+        try:
+            for name, write in pending.items():
+                if write.data is not None:
+                    files.write_json(name, write.data)
+                files.write_journal(name, list(write.entries.values()))
+                written += 1
+        finally:
+            if written < len(pending):
+                # the failed file and the rest are tried again by the next flush
+                unwritten = dict(list(pending.items())[written:])
+                self._pending = {**unwritten, **self._pending}
+                if self.enabled:
+                    self._schedule()
+            self.writes += written
+        return written
+
+    def read(self: Self, file_name: str) -> dict:
+        """Return the content of the file, including writes that are still pending."""
+        with self._lock:
+            self.flush(file_name)
+            return files.read_json(file_name)
+
+    @contextmanager
+    def batch(self: Self) -> Iterator[Self]:
+        """Defer the writes of the enclosed saves and flush them once at the end."""
+        if not self.batching:
+            self._scope.files = {}
+        self._scope.depth = getattr(self._scope, "depth", 0) + 1
+        try:
+            yield self
+        finally:
+            self._scope.depth -= 1
+            if not self._scope.depth:
+                self._release(self._scope.files)
+
+    def _release(self: Self, names: dict[str, None]) -> None:
+        """Write the files of an ended scope that no other open scope holds."""
+        with self._lock:
+            for name in names:
+                self._held[name] -= 1
+                if not self._held[name]:
+                    del self._held[name]
+            self._write([name for name in names if name not in self._held])
+
+
+write_behind = WriteBehind()
+atexit.register(write_behind.flush, held=True)
@@ -1,107 +1,431 @@
-""""FastAPI yolo."""
+"""FastAPI yolo."""
 
 import logging
+import os
 import uuid
-from collections.abc import Sequence
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
 from contextlib import asynccontextmanager
-
-from fastapi import FastAPI, HTTPException, status
-from fastapi.exceptions import ResponseValidationError
+from typing import Annotated
+
+from anyio import CancelScope, CapacityLimiter, to_thread
+from fastapi import (
+    Body,
+    Depends,
+    FastAPI,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import PositiveInt
-from sqlalchemy import Engine
-from sqlmodel import Session, SQLModel, create_engine, select
-
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, SQLModel, select
+from starlette.concurrency import iterate_in_threadpool
+
+from pyphoria.helper.bulk import ConflictMode, bulk_insert
+from pyphoria.helper.catalog import Catalog, CatalogTable
+from pyphoria.helper.database import engine
+from pyphoria.helper.export import (
+    NDJSON_MEDIA_TYPE,
+    TABLES,
+    ExportTable,
+    accepts_gzip,
+    gzip_chunks,
+    ndjson_chunks,
+)
+from pyphoria.helper.identifiers import new_id
+from pyphoria.helper.inventory import MAX_BATCH, add_items
+from pyphoria.helper.leaderboard import Leaderboard
+from pyphoria.helper.metrics import MetricsMiddleware, instrument, metrics
+from pyphoria.helper.migrations import check, migrate
+from pyphoria.helper.pagination import PageDep, paginate
+from pyphoria.helper.readmodel import construct
+from pyphoria.helper.serializer import FastJSONResponse
 from pyphoria.models import (
+    BulkResult,
     Character,
     CharacterCreate,
     CharacterRead,
     HTTPError,
     Inventory,
+    InventoryCreate,
+    InventoryItemCount,
     InventoryItemLink,
     Item,
+    ItemCreate,
+    LeaderboardEntry,
+    LeaderboardRank,
+    Monster,
+    MonsterCreate,
+    Planet,
+    PlanetCreate,
     Species,
+    SpeciesCreate,
     SpeciesRead,
 )
 
-SQLITE_DB = "database.db"
-sqlite_url = f"sqlite:///{SQLITE_DB}"
-
-
 log = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
 
-connect_args = {"check_same_thread": False}
-engine: Engine = create_engine(sqlite_url, echo=False, connect_args=connect_args)
+# size of the thread pool the routes run their blocking database work in
+DB_THREADS = int(os.environ.get("PYPHORIA_DB_THREADS", "40"))
+
+# characters returned by GET /leaderboard/ at most
+MAX_LEADERBOARD = 1000
+
+# ids bound per statement, twice this stays below SQLite's 32766 parameters
+BULK_CHUNK = 10000
+
+_session_limiter: CapacityLimiter | None = None
+
+# species, items, monsters and planets are served from memory
+catalog = Catalog(engine, (Species, Item, Monster, Planet))
+leaderboard = Leaderboard(engine)
 
 
 def create_db_and_tables():  # noqa: ANN201, D103
-    SQLModel.metadata.create_all(engine)
+    migrate(engine)
+
+
+def session_limiter() -> CapacityLimiter:
+    """Return the limiter handing out the pooled connections to the requests."""
+    global _session_limiter  # noqa: PLW0603
+    if _session_limiter is None:
+        _session_limiter = CapacityLimiter(engine.pool.size())
+    return _session_limiter
+
+
+async def get_session() -> AsyncIterator[Session]:
+    """
+    Yield a database session for a single request.
+
+    Requests wait for a free session on the event loop instead of in a worker thread.
+    There are never more sessions than pooled connections, so no thread blocks on the
+    connection pool while the requests holding the connections wait for a thread to
+    serialize their responses.
+    """
+    async with session_limiter():
+        with Session(engine) as session:
+            yield session
+
+
+# Routes using the session are plain functions, FastAPI runs them in the bounded
+# anyio thread pool so blocking SQLite I/O never stalls the event loop.
+SessionDep = Annotated[Session, Depends(get_session)]
+
+
+def catalog_table(model: type[SQLModel]) -> Callable[[], Awaitable[CatalogTable]]:
+    """Return the dependency yielding the catalog snapshot of the model's table."""
+
+    async def snapshot() -> CatalogTable:
+        cached = catalog.cached(model)
+        if cached is not None:
+            return cached
+        # a miss reads the table through a pooled connection, taken like a session
+        async with session_limiter():
+            return await to_thread.run_sync(catalog.table, model)
+
+    return snapshot
+
+
+SpeciesTableDep = Annotated[CatalogTable, Depends(catalog_table(Species))]
+ItemTableDep = Annotated[CatalogTable, Depends(catalog_table(Item))]
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    create_db_and_tables()
+    to_thread.current_default_thread_limiter().total_tokens = DB_THREADS
+    # a single query, the migrations run once through their own command
+    check(engine)
     yield
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+app.add_middleware(MetricsMiddleware)
+instrument(engine)
+
 
+# async, so the metrics are read on the event loop that writes them
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics() -> PlainTextResponse:
+    """Return the request and query metrics in the Prometheus text format."""
+    return PlainTextResponse(
+        metrics.render(),
+        media_type="text/plain; version=0.0.4",
+    )
 
-@app.get("/species/")
-async def get_species() -> Sequence[SpeciesRead]:
-    with Session(engine) as session:
-        species = session.exec(select(Species)).all()
-        return species
+
+@app.get(
+    "/export/{table}",
+    response_class=StreamingResponse,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
+async def export_table(
+    table: ExportTable,
+    accept_encoding: Annotated[str | None, Header()] = None,
+) -> StreamingResponse:
+    """
+    Stream every row of the table as one JSON object per line.
+
+    The response is gzip compressed when the client accepts it. The export holds
+    one of the pooled connections until the last row is sent.
+    """
+
+    async def stream() -> AsyncIterator[bytes]:
+        # not a session dependency, those are closed before the body is sent
+        async with session_limiter():
+            rows = ndjson_chunks(engine, TABLES[table])
+            try:
+                async for chunk in iterate_in_threadpool(
+                    gzip_chunks(rows) if compress else rows,
+                ):
+                    yield chunk
+            finally:
+                # a client going away mid export returns the connection right away,
+                # the shield keeps the cancellation from skipping the close
+                with CancelScope(shield=True):
+                    await to_thread.run_sync(rows.close)
+
+    compress = accepts_gzip(accept_encoding)
+    headers = {"Vary": "Accept-Encoding"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(stream(), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+
+@app.get("/catalog/stats")
+def get_catalog_stats() -> dict:
+    """Return the hit and miss counters of the catalog."""
+    return catalog.stats()
+
+
+@app.get("/species/", response_model=list[SpeciesRead])
+def get_species(
+    species: SpeciesTableDep,
+    page: PageDep,
+    request: Request,
+    response: Response,
+) -> Sequence[SpeciesRead] | Response:
+    return catalog.page(Species, page, request, response, species)
+
+
+@app.post("/species/bulk")
+def create_species_bulk(
+    species: list[SpeciesCreate],
+    session: SessionDep,
+    on_conflict: ConflictMode = ConflictMode.error,
+) -> BulkResult:
+    """Insert many species at once, see ``bulk_insert`` for the conflicts."""
+    count = bulk_insert(
+        session,
+        Species,
+        [{"id": new_id(), **specie.model_dump()} for specie in species],
+        on_conflict,
+    )
+    session.commit()
+    catalog.invalidate(Species)
+    return BulkResult(count=count)
 
 
 @app.get("/character/", response_model=list[CharacterRead])
-async def get_characters() -> Sequence[CharacterRead]:
-    with Session(engine) as session:
-        characters = session.exec(select(Character)).all()
-        return characters
+def get_characters(
+    session: SessionDep,
+    page: PageDep,
+    response: Response,
+) -> Sequence[CharacterRead] | JSONResponse:
+    return paginate(session, Character, page, response)
 
 
-@app.post("/character/", response_model=CharacterRead)
-async def create_character(character: CharacterCreate) -> CharacterCreate:
-    with Session(engine) as session:
-        db_character: CharacterCreate = CharacterCreate.model_validate(character)
-        session.add(db_character)
+@app.post(
+    "/character/",
+    responses={
+        409: {
+            "model": HTTPError,
+            "description": "A character with the name and surname already exists",
+        },
+    },
+)
+def create_character(
+    character: CharacterCreate,
+    session: SessionDep,
+) -> CharacterRead:
+    # the body is validated by FastAPI already, the rows are built without a
+    # second validation and the response without reading the row back
+    inventory = Inventory()
+    db_character = Character(**character.model_dump(), inventory_id=inventory.id)
+    created = construct(CharacterRead, db_character)
+    # no lookup beforehand, the unique index on (name, surname) decides atomically
+    session.add(inventory)
+    # the models have no relationship to order the inserts by, the foreign key
+    # needs the inventory first
+    session.flush()
+    session.add(db_character)
+    try:
         session.commit()
-        session.refresh(db_character)
-        return db_character
-
-
-@app.get("/character/{character_id}")
-async def get_character(character_id: uuid.UUID) -> CharacterRead:
-    with Session(engine) as session:
-        try:
-            character = session.get(Character, character_id)
-            return character
-        except ResponseValidationError:
-            return HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Character not found",
-            )
-        if not character:
-            return HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Character not found",
+    except IntegrityError as error:
+        session.rollback()
+        if "FOREIGN KEY" in str(error.orig):
+            raise HTTPException(
+                status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Species {character.species} does not exist",
+            ) from None
+        raise HTTPException(
+            status.HTTP_409_CONFLICT,
+            detail=f"Character {character.name} {character.surname} already exists",
+        ) from None
+    return created
+
+
+@app.post("/character/bulk")
+def create_characters(
+    characters: list[CharacterCreate],
+    session: SessionDep,
+    on_conflict: ConflictMode = ConflictMode.error,
+) -> BulkResult:
+    """Insert many characters at once, each with a new inventory."""
+    # every character gets a fresh inventory
+    inventory = InventoryCreate().model_dump()
+    inventories = [{"id": new_id(), **inventory} for _ in characters]
+    bulk_insert(session, Inventory, inventories)
+    count = bulk_insert(
+        session,
+        Character,
+        [
+            {
+                "id": new_id(),
+                "inventory_id": inventory["id"],
+                **character.model_dump(),
+            }
+            for character, inventory in zip(characters, inventories, strict=True)
+        ],
+        on_conflict,
+        conflict_columns=("name", "surname"),
+        keep_columns=("inventory_id",),
+    )
+    if on_conflict != ConflictMode.error:
+        # characters that already existed keep their inventory, drop the new ones,
+        # in chunks that stay below the SQLite limit of bound parameters
+        for start in range(0, len(inventories), BULK_CHUNK):
+            new_ids = [
+                inventory["id"] for inventory in inventories[start : start + BULK_CHUNK]
+            ]
+            session.execute(
+                delete(Inventory).where(
+                    Inventory.id.in_(new_ids),
+                    Inventory.id.not_in(
+                        select(Character.inventory_id).where(
+                            Character.inventory_id.in_(new_ids),
+                        ),
+                    ),
+                ),
             )
+    session.commit()
+    return BulkResult(count=count)
 
 
-@app.put("/character/{character_id}")
-async def update_character(
+@app.get(
+    "/character/{character_id}",
+    responses={
+        404: {
+            "model": HTTPError,
+            "description": "Character not found",
+        },
+    },
+)
+def get_character(character_id: uuid.UUID, session: SessionDep) -> CharacterRead:
+    character = session.get(Character, character_id)
+    if not character:
+        raise HTTPException(
+            status.HTTP_404_NOT_FOUND,
+            detail="Character not found",
+        )
+    return construct(CharacterRead, character)
+
+
+@app.put(
+    "/character/{character_id}",
+    responses={
+        404: {
+            "model": HTTPError,
+            "description": "Character not found",
+        },
+        409: {
+            "model": HTTPError,
+            "description": "A character with the name and surname already exists",
+        },
+    },
+)
+def update_character(
     character_id: uuid.UUID,
     character: CharacterRead,
-) -> Character:
-    with Session(engine) as session:
-        character = session.get(Character, character_id)
-        character.update(character)
-        session.add(character)
+    session: SessionDep,
+) -> CharacterRead:
+    db_character = session.get(Character, character_id)
+    if not db_character:
+        raise HTTPException(
+            status.HTTP_404_NOT_FOUND,
+            detail="Character not found",
+        )
+    # the key comes from the path, a changed level or experience reaches the
+    # leaderboards through the change log
+    db_character.sqlmodel_update(character.model_dump(exclude={"id"}))
+    updated = construct(CharacterRead, db_character)
+    try:
         session.commit()
-        session.refresh(character)
-        return character
+    except IntegrityError as error:
+        session.rollback()
+        if "FOREIGN KEY" in str(error.orig):
+            raise HTTPException(
+                status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Species or inventory does not exist",
+            ) from None
+        raise HTTPException(
+            status.HTTP_409_CONFLICT,
+            detail=f"Character {character.name} {character.surname} already exists",
+        ) from None
+    return updated
+
+
+# the leaderboard reads through a pooled connection of its own, taken like a session
+@app.get("/leaderboard/")
+async def get_leaderboard(
+    limit: Annotated[int, Query(ge=1, le=MAX_LEADERBOARD)] = 10,
+) -> list[LeaderboardEntry]:
+    """Return the best characters by level and then experience."""
+    async with session_limiter():
+        return await to_thread.run_sync(leaderboard.top, limit)
+
+
+@app.get("/leaderboard/stats")
+def get_leaderboard_stats() -> dict:
+    """Return the load and change counters of the leaderboard."""
+    return leaderboard.stats()
+
+
+@app.get(
+    "/leaderboard/{character_id}",
+    responses={
+        404: {
+            "model": HTTPError,
+            "description": "Character not found",
+        },
+    },
+)
+async def get_leaderboard_rank(character_id: uuid.UUID) -> LeaderboardRank:
+    """Return the rank of the character among all characters."""
+    async with session_limiter():
+        rank = await to_thread.run_sync(leaderboard.rank, character_id)
+    if rank is None:
+        raise HTTPException(
+            status.HTTP_404_NOT_FOUND,
+            detail="Character not found",
+        )
+    return rank
 
 
 @app.get(
@@ -114,158 +438,307 @@ async def update_character(
         },
     },
 )
-async def get_character_inventory(
+def get_character_inventory(
     character_id: uuid.UUID,
+    session: SessionDep,
 ) -> Inventory | None:
-    with Session(engine) as session:
-        character = session.get(Character, character_id)
-        if not character:
-            raise HTTPException(
-                status.HTTP_404_NOT_FOUND,
-                detail="Character not found",
-            )
-        return session.get(Inventory, character.inventory_id)
+    character = session.get(Character, character_id)
+    if not character:
+        raise HTTPException(
+            status.HTTP_404_NOT_FOUND,
+            detail="Character not found",
+        )
+    if character.inventory_id is None:
+        return None
+    return session.get(Inventory, character.inventory_id)
 
 
-@app.get("/inventory/")
-async def get_inventories() -> Sequence[Inventory]:
-    with Session(engine) as session:
-        inventories = session.exec(select(Inventory)).all()
-        return inventories
+@app.get("/inventory/", response_model=list[Inventory])
+def get_inventories(
+    session: SessionDep,
+    page: PageDep,
+    response: Response,
+) -> Sequence[Inventory] | JSONResponse:
+    return paginate(session, Inventory, page, response)
 
 
 @app.get("/inventory/{inventory_id}")
-async def get_inventory(
+def get_inventory(
     inventory_id: uuid.UUID,
+    session: SessionDep,
 ) -> Inventory | None:
-    with Session(engine) as session:
-        return session.get(Inventory, inventory_id)
+    return session.get(Inventory, inventory_id)
 
 
 @app.post("/inventory/")
-async def create_inventory(inventory: Inventory) -> Inventory:
-    with Session(engine) as session:
-        session.add(inventory)
-        session.commit()
-        session.refresh(inventory)
-        return inventory
+def create_inventory(inventory: Inventory, session: SessionDep) -> Inventory:
+    session.add(inventory)
+    session.commit()
+    session.refresh(inventory)
+    return inventory
 
 
-@app.put("/inventory/{inventory_id}")
-async def update_inventory(inventory_id: uuid.UUID, inventory: Inventory) -> Inventory:
-    with Session(engine) as session:
-        inventory = session.get(Inventory, inventory_id)
-        inventory.update(inventory)
-        session.add(inventory)
-        session.commit()
-        session.refresh(inventory)
-        return inventory
+@app.put(
+    "/inventory/{inventory_id}",
+    responses={
+        404: {
+            "model": HTTPError,
+            "description": "Inventory not found",
+        },
+    },
+)
+def update_inventory(
+    inventory_id: uuid.UUID,
+    inventory: Inventory,
+    session: SessionDep,
+) -> Inventory:
+    db_inventory = session.get(Inventory, inventory_id)
+    if not db_inventory:
+        raise HTTPException(
+            status.HTTP_404_NOT_FOUND,
+            detail=f"Inventory with id {inventory_id} not found",
+        )
+    # the key comes from the path
+    db_inventory.sqlmodel_update(inventory.model_dump(exclude={"id"}))
+    session.commit()
+    session.refresh(db_inventory)
+    return db_inventory
 
 
 @app.delete("/inventory/{inventory_id}")
-async def delete_inventory(inventory_id: uuid.UUID) -> Inventory | None:
-    with Session(engine) as session:
-        inventory: Inventory | None = session.get(Inventory, inventory_id)
-        if not inventory:
-            return None
-        character: Character | None = session.exec(
-            select(Character).where(Character.inventory_id == inventory_id),
-        ).one_or_none()
-        if character:
-            character.inventory_id = None
-            session.add(character)
-            session.commit()
-        session.delete(inventory)
-        session.commit()
-        return inventory
+def delete_inventory(
+    inventory_id: uuid.UUID,
+    session: SessionDep,
+) -> Inventory | None:
+    # the foreign keys drop the item links and unset the character's inventory,
+    # the explicit statements keep it a fixed number of queries on databases
+    # created before the foreign keys had their ON DELETE actions
+    session.execute(
+        delete(InventoryItemLink).where(InventoryItemLink.inventory_id == inventory_id),
+    )
+    session.execute(
+        update(Character)
+        .where(Character.inventory_id == inventory_id)
+        .values(inventory_id=None),
+    )
+    deleted = session.execute(
+        delete(Inventory)
+        .where(Inventory.id == inventory_id)
+        .returning(*Inventory.__table__.columns),
+    ).one_or_none()
+    session.commit()
+    if deleted is None:
+        return None
+    return Inventory(**deleted._mapping)  # noqa: SLF001
 
 
 @app.post("/item/")
-async def create_item(item: Item) -> Item:
-    with Session(engine) as session:
-        session.add(item)
-        session.commit()
-        session.refresh(item)
-        return item
-
-
-@app.get("/item/")
-async def get_items() -> Sequence[Item]:
-    with Session(engine) as session:
-        items: Sequence[Item] = session.exec(select(Item)).all()
-        return items
-
-
-@app.get("/item/{item_id}")
-async def get_item(item_id: uuid.UUID) -> Item | None:
-    with Session(engine) as session:
-        item: Item | None = session.get(Item, item_id)
-        return item
+def create_item(item: Item, session: SessionDep) -> Item:
+    session.add(item)
+    session.commit()
+    session.refresh(item)
+    catalog.invalidate(Item)
+    return item
+
+
+@app.post("/item/bulk")
+def create_items(
+    items: list[ItemCreate],
+    session: SessionDep,
+    on_conflict: ConflictMode = ConflictMode.error,
+) -> BulkResult:
+    """Insert many items at once, see ``bulk_insert`` for the conflicts."""
+    count = bulk_insert(
+        session,
+        Item,
+        [{"id": new_id(), **item.model_dump()} for item in items],
+        on_conflict,
+    )
+    session.commit()
+    catalog.invalidate(Item)
+    return BulkResult(count=count)
+
+
+@app.get("/item/", response_model=list[Item])
+def get_items(
+    items: ItemTableDep,
+    page: PageDep,
+    request: Request,
+    response: Response,
+) -> Sequence[Item] | Response:
+    return catalog.page(Item, page, request, response, items)
+
+
+@app.get("/item/{item_id}", response_model=Item | None)
+def get_item(
+    item_id: uuid.UUID,
+    items: ItemTableDep,
+    request: Request,
+    response: Response,
+) -> Item | Response | None:
+    return catalog.lookup(Item, item_id, request, response, items)
 
 
-@app.put("/item/{item_id}")
-async def update_item(item_id: uuid.UUID, item: Item) -> Item:
-    with Session(engine) as session:
-        item = session.get(Item, item_id)
-        item.update(item)
-        session.add(item)
+@app.put(
+    "/item/{item_id}",
+    responses={
+        404: {
+            "model": HTTPError,
+            "description": "Item not found",
+        },
+        409: {
+            "model": HTTPError,
+            "description": "An item with the name already exists",
+        },
+    },
+)
+def update_item(item_id: uuid.UUID, item: Item, session: SessionDep) -> Item:
+    db_item = session.get(Item, item_id)
+    if not db_item:
+        raise HTTPException(
+            status.HTTP_404_NOT_FOUND,
+            detail=f"Item with id {item_id} not found",
+        )
+    # the key comes from the path
+    db_item.sqlmodel_update(item.model_dump(exclude={"id"}))
+    try:
         session.commit()
-        session.refresh(item)
-        return item
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(
+            status.HTTP_409_CONFLICT,
+            detail=f"Item {item.name} already exists",
+        ) from None
+    session.refresh(db_item)
+    catalog.invalidate(Item)
+    return db_item
 
 
 @app.delete("/item/{item_id}")
-async def delete_item(item_id: uuid.UUID) -> Item:
-    with Session(engine) as session:
-        item: Item | None = session.get(Item, item_id)
-        if not item:
-            log.info("Item %s not found", item_id)
-            return None
-        inventories_with_item: Sequence[InventoryItemLink] = session.exec(
-            select(InventoryItemLink).where(InventoryItemLink.item_id == item_id),
-        ).all()
-        for inventory in inventories_with_item:
-            log.info(
-                "Removing item %s from inventory %s",
-                item_id,
-                inventory.inventory_id,
+def delete_item(item_id: uuid.UUID, session: SessionDep) -> Item | None:
+    # a fixed number of statements no matter how many inventories hold the item
+    session.execute(
+        delete(InventoryItemLink).where(InventoryItemLink.item_id == item_id),
+    )
+    deleted = session.execute(
+        delete(Item).where(Item.id == item_id).returning(*Item.__table__.columns),
+    ).one_or_none()
+    session.commit()
+    if deleted is None:
+        log.info("Item %s not found", item_id)
+        return None
+    log.info("Deleted item %s", item_id)
+    catalog.invalidate(Item)
+    return Item(**deleted._mapping)  # noqa: SLF001
+
+
+@app.post(
+    "/inventory/{inventory_id}/item/{item_id}/{item_count}",
+    responses={
+        404: {
+            "model": HTTPError,
+            "description": "Inventory or item not found",
+        },
+        409: {
+            "model": HTTPError,
+            "description": "No free slot for the item, or its stack is full",
+        },
+    },
+)
+def add_item_to_inventory(
+    inventory_id: uuid.UUID,
+    item_id: uuid.UUID,
+    item_count: PositiveInt,
+    session: SessionDep,
+) -> InventoryItemLink:
+    links = add_items(session, inventory_id, [(item_id, item_count)])
+    if not links:
+        # only a failed add pays for finding out why
+        session.rollback()
+        if session.get(Inventory, inventory_id) is None:
+            raise HTTPException(
+                status.HTTP_404_NOT_FOUND,
+                detail=f"Inventory with id {inventory_id} not found",
             )
-            _inventory: Inventory | None = session.get(
-                Inventory,
-                inventory.inventory_id,
+        if catalog.get(Item, item_id, session) is None:
+            raise HTTPException(
+                status.HTTP_404_NOT_FOUND,
+                detail=f"Item with id {item_id} not found",
             )
-            if _inventory:
-                _inventory.items.remove(item_id)
-                session.add(_inventory)
-
-        log.info("Deleting item %s", item_id)
-        session.delete(item)
-        session.commit()
-        return item
+        if session.get(InventoryItemLink, (inventory_id, item_id)) is not None:
+            raise HTTPException(
+                status.HTTP_409_CONFLICT,
+                detail=f"The stack of item {item_id} is full",
+            )
+        raise HTTPException(
+            status.HTTP_409_CONFLICT,
+            detail=f"Inventory with id {inventory_id} has no free slot",
+        )
+    session.commit()
+    return links[0]
 
 
-@app.post("/inventory/{inventory_id}/item/{item_id}/{item_count}")
-async def add_item_to_inventory(
+@app.post(
+    "/inventory/{inventory_id}/items",
+    responses={
+        404: {
+            "model": HTTPError,
+            "description": "Inventory not found",
+        },
+    },
+)
+def add_items_to_inventory(
     inventory_id: uuid.UUID,
-    item_id: uuid.UUID,
-    item_count: PositiveInt,
-) -> Inventory:
-    with Session(engine) as session:
-        inventory: Inventory | None = session.get(Inventory, inventory_id)
-        if not inventory:
-            return ValueError(f"Inventory with id {inventory_id} not found")
-        item: Item | None = session.get(Item, item_id)
-        if not item:
-            return ValueError(f"Item with id {item_id} not found")
-        if item_id in inventory.items:
-            return ValueError(f"Item with id {item_id} already in inventory")
-        inventory.items.append(item_id)
-        session.add(inventory)
-        inventory_item_link = InventoryItemLink(
-            inventory_id=inventory_id,
-            item_id=item_id,
-            item_count=item_count,
+    items: Annotated[list[InventoryItemCount], Body(max_length=MAX_BATCH)],
+    session: SessionDep,
+) -> list[InventoryItemLink]:
+    """Add many items at once, items that do not fit are left out of the result."""
+    links = add_items(
+        session,
+        inventory_id,
+        [(item.item_id, item.item_count) for item in items],
+    )
+    if not links and session.get(Inventory, inventory_id) is None:
+        session.rollback()
+        raise HTTPException(
+            status.HTTP_404_NOT_FOUND,
+            detail=f"Inventory with id {inventory_id} not found",
         )
-        session.add(inventory_item_link)
-        session.commit()
-        return inventory
+    session.commit()
+    return links
+
+
+@app.post("/monster/bulk")
+def create_monsters(
+    monsters: list[MonsterCreate],
+    session: SessionDep,
+    on_conflict: ConflictMode = ConflictMode.error,
+) -> BulkResult:
+    """Insert many monsters at once, see ``bulk_insert`` for the conflicts."""
+    count = bulk_insert(
+        session,
+        Monster,
+        [{"id": new_id(), **monster.model_dump()} for monster in monsters],
+        on_conflict,
+    )
+    session.commit()
+    catalog.invalidate(Monster)
+    return BulkResult(count=count)
+
+
+@app.post("/planet/bulk")
+def create_planets(
+    planets: list[PlanetCreate],
+    session: SessionDep,
+    on_conflict: ConflictMode = ConflictMode.error,
+) -> BulkResult:
+    """Insert many planets at once, see ``bulk_insert`` for the conflicts."""
+    count = bulk_insert(
+        session,
+        Planet,
+        [{"id": new_id(), **planet.model_dump()} for planet in planets],
+        on_conflict,
+    )
+    session.commit()
+    catalog.invalidate(Planet)
+    return BulkResult(count=count)
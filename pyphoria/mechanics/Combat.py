@@ -0,0 +1,285 @@
+"""Round based combat between characters and monsters."""  # noqa: N999
+
+import random
+from collections.abc import Sequence
+from itertools import chain
+from typing import NamedTuple, Self
+
+import numpy as np
+
+from pyphoria.models import CharacterStats, MonsterBase
+
+# a fight ends after MAX_ROUNDS rounds even if both sides are still standing
+MAX_ROUNDS = 50
+# characters get BASE_HEALTH plus HEALTH_PER_VITALITY for every point of vitality
+BASE_HEALTH = 50.0
+HEALTH_PER_VITALITY = 10.0
+DAMAGE_PER_COMBAT = 2.0
+# monsters scale their health, ratings and damage with their level
+MONSTER_HEALTH_PER_LEVEL = 30.0
+MONSTER_RATING_PER_LEVEL = 5.0
+MONSTER_DAMAGE_PER_LEVEL = 0.1
+MONSTER_CRIT_CHANCE = 0.05
+# the chance to hit is hit rating / (hit rating + dodge rating), within these bounds
+MIN_HIT_CHANCE = 0.05
+MAX_HIT_CHANCE = 0.95
+# luck raises the crit chance towards MAX_CRIT_CHANCE, CRIT_LUCK_SCALE luck is half way
+CRIT_LUCK_SCALE = 100.0
+MAX_CRIT_CHANCE = 0.5
+CRIT_MULTIPLIER = 2.0
+
+
+class Combatant(NamedTuple):
+    """
+    Combat values of one side of a fight.
+
+    Attributes
+        health (float): The health at the start of the fight.
+        damage (float): The damage of a regular hit.
+        hit_rating (float): Raises the chance to hit the opponent.
+        dodge_rating (float): Lowers the chance to be hit by the opponent.
+        crit_chance (float): The chance of a hit to deal CRIT_MULTIPLIER times the damage.
+
+    """
+
+    health: float
+    damage: float
+    hit_rating: float
+    dodge_rating: float
+    crit_chance: float
+
+
+class Combatants(NamedTuple):
+    """
+    Combat values of many combatants, one array entry per combatant.
+
+    Attributes
+        health (np.ndarray): The health at the start of the fight.
+        damage (np.ndarray): The damage of a regular hit.
+        hit_rating (np.ndarray): Raises the chance to hit the opponent.
+        dodge_rating (np.ndarray): Lowers the chance to be hit by the opponent.
+        crit_chance (np.ndarray): The chance of a hit to deal CRIT_MULTIPLIER times the damage.
+
+    """
+
+    health: np.ndarray
+    damage: np.ndarray
+    hit_rating: np.ndarray
+    dodge_rating: np.ndarray
+    crit_chance: np.ndarray
+
+    def __len__(self: Self) -> int:  # noqa: D105
+        return self.health.shape[0]
+
+    @classmethod
+    def pack(cls: type[Self], combatants: Sequence[Combatant]) -> Self:
+        """Pack the combatants into arrays."""
+        width = len(cls._fields)
+        rows = np.fromiter(
+            chain.from_iterable(combatants),
+            dtype=np.float64,
+            count=len(combatants) * width,
+        ).reshape(-1, width)
+        return cls(*(np.ascontiguousarray(column) for column in rows.T))
+
+
+class FightResult(NamedTuple):
+    """
+    Outcome of a fight.
+
+    Attributes
+        won (bool): Whether the character defeated the monster.
+        rounds (int): The number of rounds fought.
+        character_health (float): The health the character has left, 0 if defeated.
+        monster_health (float): The health the monster has left, 0 if defeated.
+
+    """
+
+    won: bool
+    rounds: int
+    character_health: float
+    monster_health: float
+
+
+class FightBatch(NamedTuple):
+    """
+    Outcome of many fights, one array entry per fight.
+
+    Attributes
+        won (np.ndarray): Whether the character defeated the monster.
+        rounds (np.ndarray): The number of rounds fought.
+        character_health (np.ndarray): The health the character has left, 0 if defeated.
+        monster_health (np.ndarray): The health the monster has left, 0 if defeated.
+
+    """
+
+    won: np.ndarray
+    rounds: np.ndarray
+    character_health: np.ndarray
+    monster_health: np.ndarray
+
+
+def crit_chance(luck: float) -> float:
+    """Return the crit chance of a character with the luck."""
+    return MAX_CRIT_CHANCE * luck / (luck + CRIT_LUCK_SCALE)
+
+
+def hit_chance(hit_rating: float, dodge_rating: float) -> float:
+    """Return the chance of an attacker with the hit rating to hit the defender."""
+    chance = hit_rating / (hit_rating + dodge_rating)
+    return min(MAX_HIT_CHANCE, max(MIN_HIT_CHANCE, chance))
+
+
+def character_combatant(stats: CharacterStats) -> Combatant:
+    """Return the combat values of a character or species."""
+    return Combatant(
+        health=BASE_HEALTH + HEALTH_PER_VITALITY * stats.stat_vitality,
+        damage=DAMAGE_PER_COMBAT * stats.stat_combat,
+        hit_rating=float(stats.stat_hit_rating),
+        dodge_rating=float(stats.stat_dodge_rating),
+        crit_chance=crit_chance(stats.stat_luck),
+    )
+
+
+def monster_combatant(monster: MonsterBase) -> Combatant:
+    """Return the combat values of a monster."""
+    return Combatant(
+        health=MONSTER_HEALTH_PER_LEVEL * monster.level,
+        damage=monster.base_damage * (1 + MONSTER_DAMAGE_PER_LEVEL * monster.level),
+        hit_rating=MONSTER_RATING_PER_LEVEL * monster.level,
+        dodge_rating=MONSTER_RATING_PER_LEVEL * monster.level,
+        crit_chance=MONSTER_CRIT_CHANCE,
+    )
+
+
+def _attack(
+    attacker: Combatant,
+    defender: Combatant,
+    rng: random.Random,
+) -> float:
+    """Roll an attack and return the damage it deals."""
+    if rng.random() >= hit_chance(attacker.hit_rating, defender.dodge_rating):
+        return 0.0
+    if rng.random() < attacker.crit_chance:
+        return attacker.damage * CRIT_MULTIPLIER
+    return attacker.damage
+
+
+def fight(
+    character: Combatant,
+    monster: Combatant,
+    rng: random.Random = random,
+) -> FightResult:
+    """
+    Resolve a fight round by round.
+
+    Every round the character attacks first, a monster that survives strikes back.
+    Each attack rolls to hit and then to crit.
+    """
+    character_health, monster_health = character.health, monster.health
+    rounds = 0
+    while rounds < MAX_ROUNDS:
+        rounds += 1
+        monster_health -= _attack(character, monster, rng)
+        if monster_health <= 0:
+            break
+        character_health -= _attack(monster, character, rng)
+        if character_health <= 0:
+            break
+    return FightResult(
+        won=monster_health <= 0,
+        rounds=rounds,
+        character_health=max(0.0, character_health),
+        monster_health=max(0.0, monster_health),
+    )
+
+
+def _hit_chances(attacker: Combatants, defender: Combatants) -> np.ndarray:
+    """Return the chance of every attacker to hit its defender."""
+    return np.clip(
+        attacker.hit_rating / (attacker.hit_rating + defender.dodge_rating),
+        MIN_HIT_CHANCE,
+        MAX_HIT_CHANCE,
+    )
+
+
+def fight_batch(
+    characters: Combatants,
+    monsters: Combatants,
+    rng: np.random.Generator | None = None,
+) -> FightBatch:
+    """
+    Resolve many fights at once.
+
+    Fight ``i`` is ``characters[i]`` against ``monsters[i]``. Every round rolls the
+    attacks of all fights still going with NumPy, so the cost is a few array
+    operations per round instead of Python code per attack. The outcomes follow the
+    same distribution as ``fight``, the rolls of a monster that did not survive the
+    character's attack are drawn but ignored.
+    """
+    size = len(characters)
+    if len(monsters) != size:
+        msg = "characters and monsters must have the same length"
+        raise ValueError(msg)
+    rng = rng if rng is not None else np.random.default_rng()
+
+    character_health = characters.health.astype(np.float64)
+    monster_health = monsters.health.astype(np.float64)
+    rounds = np.full(size, MAX_ROUNDS, dtype=np.int64)
+
+    # the values of the fights still going, compacted whenever fights finish
+    fights = np.arange(size)
+    health = character_health.copy()
+    opponent_health = monster_health.copy()
+    hit = _hit_chances(characters, monsters)
+    crit = characters.crit_chance
+    damage = characters.damage
+    opponent_hit = _hit_chances(monsters, characters)
+    opponent_crit = monsters.crit_chance
+    opponent_damage = monsters.damage
+    for round_number in range(1, MAX_ROUNDS + 1):
+        rolls = rng.random((4, fights.size))
+        opponent_health -= np.where(
+            rolls[0] < hit,
+            np.where(rolls[1] < crit, damage * CRIT_MULTIPLIER, damage),
+            0.0,
+        )
+        # only monsters that survived the character's attack strike back
+        standing = opponent_health > 0
+        health -= np.where(
+            standing & (rolls[2] < opponent_hit),
+            np.where(
+                rolls[3] < opponent_crit,
+                opponent_damage * CRIT_MULTIPLIER,
+                opponent_damage,
+            ),
+            0.0,
+        )
+        going = standing & (health > 0)
+        if going.all():
+            continue
+        done = fights[~going]
+        rounds[done] = round_number
+        character_health[done] = health[~going]
+        monster_health[done] = opponent_health[~going]
+        if not going.any():
+            break
+        fights = fights[going]
+        health, opponent_health = health[going], opponent_health[going]
+        hit, crit, damage = hit[going], crit[going], damage[going]
+        opponent_hit, opponent_crit, opponent_damage = (
+            opponent_hit[going],
+            opponent_crit[going],
+            opponent_damage[going],
+        )
+    else:
+        # the fights that lasted all rounds
+        character_health[fights] = health
+        monster_health[fights] = opponent_health
+
+    return FightBatch(
+        won=monster_health <= 0,
+        rounds=rounds,
+        character_health=np.maximum(character_health, 0.0),
+        monster_health=np.maximum(monster_health, 0.0),
+    )
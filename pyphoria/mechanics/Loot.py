@@ -1,12 +1,167 @@
-import uuid  # noqa: N999, D100
-from typing import Self
+import random  # noqa: N999, D100
+import uuid
+from collections.abc import Sequence
+from itertools import count
+from operator import attrgetter
+from typing import NamedTuple, Self
 
-import pyphoria
-import random
+import numpy as np
+
+from pyphoria.mechanics.Sampler import AliasSampler, LootPoolCache
+
+# monsters have a 20% chance to drop 1 item, 10% chance to drop 2 items, 5% chance to drop 3 items
+# the weights of the non-zero drop counts are raised by the character loot chance modifier
+BASE_DROP_WEIGHTS = (100, 20, 10, 5)
+# 1 in LOOT_EXPLOSION_ODDS drops explode into up to LOOT_EXPLOSION_MAX times the items
+LOOT_EXPLOSION_ODDS = 100
+LOOT_EXPLOSION_MAX = 3
+
+# compiled samplers of the merged loot pools, keyed by (planet_id, area_id, monster type)
+loot_pool_cache = LootPoolCache()
+
+
+class DropTable(NamedTuple):
+    """
+    How many items monsters drop and how often the drops explode.
+
+    Attributes
+        weights (tuple[float, ...]): The weight of dropping n items at index n.
+        explosion_odds (int): 1 in this many drops explode.
+        explosion_max (int): The highest explosion multiplier without modifiers.
+
+    """
+
+    weights: tuple[float, ...] = BASE_DROP_WEIGHTS
+    explosion_odds: int = LOOT_EXPLOSION_ODDS
+    explosion_max: int = LOOT_EXPLOSION_MAX
+
+    def explosion_limit(self: Self, character_loot_chance_modifier: float) -> int:
+        """Return the highest explosion multiplier for the loot chance modifier."""
+        return max(
+            1,
+            int(self.explosion_max * (1 + character_loot_chance_modifier / 100)),
+        )
+
+
+DEFAULT_DROP_TABLE = DropTable()
+
+
+class DropRolls(NamedTuple):
+    """
+    Rolled drops of many kills.
+
+    Attributes
+        counts (np.ndarray): The final number of items dropped per kill.
+        explosions (np.ndarray): The loot explosion multiplier per kill, 1 if none.
+        exploded (np.ndarray): Whether the drop of the kill exploded, an explosion
+            may still roll a multiplier of 1.
+
+    """
+
+    counts: np.ndarray
+    explosions: np.ndarray
+    exploded: np.ndarray
+
+
+class LootBatch(NamedTuple):
+    """
+    Loot of many kills in a compressed sparse row layout.
+
+    The drops of kill ``i`` are ``items[offsets[i]:offsets[i + 1]]``, each entry being
+    an index into ``base_ids``.
+
+    Attributes
+        counts (np.ndarray): The number of items dropped per kill.
+        explosions (np.ndarray): The loot explosion multiplier per kill, 1 if none.
+        exploded (np.ndarray): Whether the drop of the kill exploded.
+        offsets (np.ndarray): The start of each kill's drops in ``items``, length n + 1.
+        items (np.ndarray): The dropped items as indices into ``base_ids``.
+        base_ids (tuple[str, ...]): The item bases referenced by ``items``.
+
+    """
+
+    counts: np.ndarray
+    explosions: np.ndarray
+    exploded: np.ndarray
+    offsets: np.ndarray
+    items: np.ndarray
+    base_ids: tuple[str, ...]
+
+    def drops(self: Self, kill: int) -> list[str]:
+        """Return the item bases dropped by the kill at position ``kill``."""
+        start, stop = self.offsets[kill], self.offsets[kill + 1]
+        return [self.base_ids[i] for i in self.items[start:stop]]
+
+
+def roll_drop_counts(
+    character_loot_chance_modifiers: np.ndarray,
+    rng: np.random.Generator,
+    table: DropTable = DEFAULT_DROP_TABLE,
+) -> DropRolls:
+    """
+    Roll drop counts and loot explosions for a batch of kills at once.
+
+    Matches the distribution of the scalar rolls in ``Loot.generate`` with the
+    same drop table.
+    """
+    modifiers = np.asarray(character_loot_chance_modifiers, dtype=np.float64)
+    size = modifiers.shape[0]
+
+    weights = np.empty((size, len(table.weights)))
+    weights[:] = table.weights
+    weights[:, 1:] += modifiers[:, None]
+    cumulative = np.cumsum(weights, axis=1)
+    # same as bisect_right(cum_weights, random() * total) in random.choices
+    rolls = rng.random(size) * cumulative[:, -1]
+    counts = np.minimum(
+        (cumulative <= rolls[:, None]).sum(axis=1),
+        len(table.weights) - 1,
+    ).astype(np.int64)
+
+    explosions = np.ones(size, dtype=np.int64)
+    exploded = (counts > 0) & (rng.integers(1, table.explosion_odds + 1, size) == 1)
+    if exploded.any():
+        explosion_max = np.maximum(
+            1,
+            np.floor(table.explosion_max * (1 + modifiers[exploded] / 100)),
+        ).astype(np.int64)
+        explosions[exploded] = rng.integers(1, explosion_max + 1)
+
+    # np.round rounds half to even, just like round()
+    counts += np.round(counts * (modifiers / 100)).astype(np.int64) * explosions
+    return DropRolls(counts, explosions, exploded)
+
+
+def _factorize(values: Sequence[uuid.UUID]) -> tuple[list[uuid.UUID], np.ndarray]:
+    """Return the unique values in order of appearance and the index of each value."""
+    # hash the plain integers, UUID.__hash__ is too slow for millions of kills
+    first_seen: dict[int, int] = {}
+    positions = np.fromiter(
+        map(first_seen.setdefault, map(attrgetter("int"), values), count()),
+        dtype=np.intp,
+        count=len(values),
+    )
+    unique_positions, codes = np.unique(positions, return_inverse=True)
+    return [values[i] for i in unique_positions], codes
+
+
+def _factorize_types(monster_types: list[str]) -> tuple[list[str], np.ndarray]:
+    """Return the unique monster types and the index of each monster's type."""
+    index: dict[str, int] = {}
+    codes = np.array(
+        [index.setdefault(monster_type, len(index)) for monster_type in monster_types],
+        dtype=np.intp,
+    )
+    return list(index), codes
 
 
 class Loot:
-    def __init__(self: Self, planet_id: uuid.UUID, area_id: uuid.UUID) -> None:
+    def __init__(
+        self: Self,
+        planet_id: uuid.UUID,
+        area_id: uuid.UUID,
+        drop_table: DropTable = DEFAULT_DROP_TABLE,
+    ) -> None:
         """Loot should be considered temporary and should be bound short term to a specific character.
         It will not be stored in the database. The loot will be none to many items.
         Planet, Area and Monster type will be used to determine the possible implicit of the base as well as well as possible stats of the items.
@@ -17,23 +172,22 @@ class Loot:
         The monster level may prevent some items from dropping.
         Unique items will not be affected by the character level but only the monster level.
         """
+        self.planet_id = planet_id
+        self.area_id = area_id
+        self.drop_table = drop_table
         self._load_loot_pool(planet_id, area_id)
 
     def _load_loot_pool(self: Self, planet_id: uuid.UUID, area_id: uuid.UUID) -> None:
         """Load the loot pool for the area."""
         # load the area loot pool list
         # self.area_loot_pool = pyphoria.models.AreaLootPool.load(planet_id, area_id)
-        self.area_loot_pool = [("item", 1500)]
-        pass
+        self.area_loot_pool = (("item", 1500),)
 
-    def generate(
+    def _load_character_modifiers(
         self: Self,
         character_id: uuid.UUID,
-        monster_id: uuid.UUID,
-        monster_level: int,
-    ) -> None:
-        """Generate loot for the character."""
-        # TODO: save the loot temporarily in some way
+    ) -> tuple[int, float, float]:
+        """Return the level, loot chance modifier and loot quality modifier of the character."""
         # load the character and character specific modifiers
         # character = pyphoria.models.Character.load(character_id)
         # character_level = character["level"]
@@ -41,45 +195,137 @@ class Loot:
         # character specific percentage modifiers
         # character_loot_chance_modifier = character.get("loot_chance_modifier", 0.0)
         # character_loot_quality_modifier = character.get("loot_quality_modifier", 0.0)
-
         character_loot_chance_modifier = 20.3
         character_loot_quality_modifier = 10.3
+        return (
+            character_level,
+            character_loot_chance_modifier,
+            character_loot_quality_modifier,
+        )
+
+    def _load_monster_type(self: Self, monster_id: uuid.UUID) -> str:
+        """Return the type of the monster."""
+        # monster_type = pyphoria.models.Monster.load(monster_id)["type"]
+        return "default"
 
-        # load monster specific loot pool list
-        # monster_type_loot_pool = pyphoria.models.MonsterTypeLootPool.load(monster_id)
-        monster_type_loot_pool = [("other item", 500)]
+    def _load_monster_type_loot_pool(
+        self: Self,
+        monster_type: str,  # noqa: ARG002
+    ) -> tuple[tuple[str, int], ...]:
+        """Load the loot pool for the monster type."""
+        # monster_type_loot_pool = pyphoria.models.MonsterTypeLootPool.load(monster_type)
+        return (("other item", 500),)
 
-        # merge monster and area loot pool lists
-        loot_pool = self.area_loot_pool + monster_type_loot_pool
+    def _loot_pool_sampler(self: Self, monster_type: str) -> AliasSampler:
+        """Return the compiled sampler over the area and monster type loot pools."""
+        return loot_pool_cache.get(
+            (self.planet_id, self.area_id, monster_type),
+            self.area_loot_pool,
+            self._load_monster_type_loot_pool(monster_type),
+        )
+
+    def generate(
+        self: Self,
+        character_id: uuid.UUID,
+        monster_id: uuid.UUID,
+        monster_level: int,
+    ) -> list[str]:
+        """Generate loot for the character and return the dropped item bases."""
+        # TODO: save the loot temporarily in some way
+        (
+            character_level,  # noqa: RUF059
+            character_loot_chance_modifier,
+            character_loot_quality_modifier,  # noqa: RUF059
+        ) = self._load_character_modifiers(character_id)
 
         # determine the number of items to drop
-        # monthers have a 20% chance to drop 1 item, 10% chance to drop 2 items, 5% chance to drop 3 items
-        weight = {
-            "0": 100,
-            "1": 20 + character_loot_chance_modifier,
-            "2": 10 + character_loot_chance_modifier,
-            "3": 5 + character_loot_chance_modifier,
-        }
-
-        number_of_items = random.choices(
-            [0, 1, 2, 3], [weight["0"], weight["1"], weight["2"], weight["3"]]
-        )[0]
+        table = self.drop_table
+        weights = [table.weights[0]] + [
+            weight + character_loot_chance_modifier for weight in table.weights[1:]
+        ]
+        number_of_items = random.choices(range(len(weights)), weights)[0]
 
         if number_of_items == 0:
-            return
+            return []
         # chance for loot explosion, chance is 1/100 which multiplies the number of items dropped by n, while n is a random number between 1 and 3, modified by character specific modifiers
         loot_explosion = 1
-        if random.randint(1, 100) == 1:
+        if random.randint(1, table.explosion_odds) == 1:
             loot_explosion = random.randint(
-                1, 3 * (character_loot_chance_modifier / 100)
+                1,
+                table.explosion_limit(character_loot_chance_modifier),
             )
         number_of_items += (
             round(number_of_items * (character_loot_chance_modifier / 100))
             * loot_explosion
         )
 
-        # loot_pool = [(base_id, weight), ...]
-        # determine the items to drop
+        # loot_pool = [(base_id, weight), ...]  # noqa: ERA001
+        # determine the items to drop from the merged monster type and area loot pool
         # weights are modified by character specific modifiers by evening out the weights
+        loot_pool = self._loot_pool_sampler(self._load_monster_type(monster_id))
+        return loot_pool.choices(number_of_items)
+
+    def generate_batch(
+        self: Self,
+        character_ids: Sequence[uuid.UUID],
+        monster_ids: Sequence[uuid.UUID],
+        monster_levels: Sequence[int],
+        rng: np.random.Generator | None = None,
+    ) -> LootBatch:
+        """
+        Generate loot for many kills at once.
+
+        Kill ``i`` is made by ``character_ids[i]`` on ``monster_ids[i]``. Drop counts,
+        loot explosions and item picks are rolled for the whole batch with NumPy and
+        follow the same distributions as ``generate``.
+        """
+        size = len(character_ids)
+        if not len(monster_ids) == len(monster_levels) == size:
+            msg = "character_ids, monster_ids and monster_levels must have the same length"
+            raise ValueError(msg)
+        rng = rng if rng is not None else np.random.default_rng()
 
-        pass
+        characters, character_index = _factorize(character_ids)
+        chance_modifiers = np.array(
+            [self._load_character_modifiers(c)[1] for c in characters],
+            dtype=np.float64,
+        )
+        counts, explosions, exploded = roll_drop_counts(
+            chance_modifiers[character_index],
+            rng,
+            self.drop_table,
+        )
+
+        offsets = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        items = np.empty(offsets[-1], dtype=np.int32)
+
+        # pick the items per monster type, each type has its own merged loot pool
+        vocabulary: dict[str, int] = {}
+        monsters, monster_index = _factorize(monster_ids)
+        monster_types, type_of_monster = _factorize_types(
+            [self._load_monster_type(monster_id) for monster_id in monsters],
+        )
+        type_of_item = np.repeat(type_of_monster[monster_index], counts)
+        for position, monster_type in enumerate(monster_types):
+            loot_pool = self._loot_pool_sampler(monster_type)
+            pool_index = np.array(
+                [
+                    vocabulary.setdefault(base_id, len(vocabulary))
+                    for base_id in loot_pool.outcomes
+                ],
+                dtype=np.int32,
+            )
+            selected = type_of_item == position
+            items[selected] = pool_index[
+                loot_pool.sample_indices(np.count_nonzero(selected), rng)
+            ]
+
+        return LootBatch(
+            counts=counts,
+            explosions=explosions,
+            exploded=exploded,
+            offsets=offsets,
+            items=items,
+            base_ids=tuple(vocabulary),
+        )
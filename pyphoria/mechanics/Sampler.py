@@ -0,0 +1,147 @@
+"""Weighted samplers for loot pools."""  # noqa: N999
+
+import random
+from collections import OrderedDict
+from collections.abc import Hashable, Sequence
+from operator import is_
+from typing import Self
+
+import numpy as np
+
+
+class AliasSampler:
+    """
+    Walker/Vose alias table over a weighted pool.
+
+    Building the table is O(n), every draw afterwards is O(1) regardless of the size
+    of the pool.
+
+    Attributes
+        pool (tuple[tuple[str, float], ...]): The (outcome, weight) pairs the table was built from.
+        outcomes (tuple[str, ...]): The outcomes of the pool.
+
+    """
+
+    def __init__(self: Self, pool: Sequence[tuple[str, float]]) -> None:
+        """Build the alias table for the (outcome, weight) pairs of the pool."""
+        if not pool:
+            msg = "Cannot build a sampler for an empty pool"
+            raise ValueError(msg)
+        self.pool = tuple(pool)
+        self.outcomes = tuple(outcome for outcome, _ in self.pool)
+
+        size = len(self.pool)
+        total = sum(weight for _, weight in self.pool)
+        if total <= 0:
+            msg = "The weights of a pool must sum up to a positive number"
+            raise ValueError(msg)
+        scaled = [weight * size / total for _, weight in self.pool]
+        probability = [1.0] * size
+        alias = list(range(size))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probability[less] = scaled[less]
+            alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # whatever is left over is 1.0 up to floating point error
+
+        self._probability = probability
+        self._alias = alias
+        self._probability_array = np.asarray(probability, dtype=np.float64)
+        self._alias_array = np.asarray(alias, dtype=np.intp)
+
+    def __len__(self: Self) -> int:  # noqa: D105
+        return len(self.outcomes)
+
+    def sample_index(self: Self, rng: random.Random = random) -> int:
+        """Draw the index of a single outcome."""
+        column = rng.random() * len(self._alias)
+        index = int(column)
+        if column - index < self._probability[index]:
+            return index
+        return self._alias[index]
+
+    def choices(self: Self, k: int, rng: random.Random = random) -> list[str]:
+        """Draw ``k`` outcomes with replacement, like ``random.choices``."""
+        return [self.outcomes[self.sample_index(rng)] for _ in range(k)]
+
+    def sample_indices(self: Self, size: int, rng: np.random.Generator) -> np.ndarray:
+        """Draw the indices of ``size`` outcomes at once."""
+        column = rng.random(size) * len(self._alias)
+        index = column.astype(np.intp)
+        keep = (column - index) < self._probability_array[index]
+        return np.where(keep, index, self._alias_array[index])
+
+
+class LootPoolCache:
+    """
+    LRU cache of compiled samplers for merged loot pools.
+
+    A sampler is rebuilt whenever the pools passed for its key differ from the
+    pools it was built from, so a changed pool never serves stale weights.
+
+    Attributes
+        maxsize (int): The number of samplers kept before the least recently used is evicted.
+        hits (int): The number of lookups served by a cached sampler.
+        misses (int): The number of lookups that had to build a sampler.
+
+    """
+
+    def __init__(self: Self, maxsize: int = 1024) -> None:  # noqa: D107
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._samplers: OrderedDict[Hashable, tuple[tuple, AliasSampler]] = (
+            OrderedDict()
+        )
+
+    def __len__(self: Self) -> int:  # noqa: D105
+        return len(self._samplers)
+
+    def get(
+        self: Self,
+        key: Hashable,
+        *pools: Sequence[tuple[str, float]],
+    ) -> AliasSampler:
+        """
+        Return the sampler over the concatenated pools, building it if needed.
+
+        Pools are compared by identity first and by content second, so loaders that
+        hand out the same tuples get their sampler back in O(1).
+        """
+        cached = self._samplers.get(key)
+        if (
+            cached is not None
+            and len(cached[0]) == len(pools)
+            and all(map(is_, cached[0], pools))
+        ):
+            self._samplers.move_to_end(key)
+            self.hits += 1
+            return cached[1]
+        # lists could be mutated in place later on, only keep tuples by reference
+        source = tuple(
+            pool if isinstance(pool, tuple) else tuple(pool) for pool in pools
+        )
+        if cached is not None and cached[0] == source:
+            self._samplers[key] = (source, cached[1])
+            self._samplers.move_to_end(key)
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        sampler = AliasSampler([entry for pool in source for entry in pool])
+        self._samplers[key] = (source, sampler)
+        self._samplers.move_to_end(key)
+        while len(self._samplers) > self.maxsize:
+            self._samplers.popitem(last=False)
+        return sampler
+
+    def invalidate(self: Self, key: Hashable | None = None) -> None:
+        """Drop the sampler for the key, or every sampler if no key is given."""
+        if key is None:
+            self._samplers.clear()
+        else:
+            self._samplers.pop(key, None)
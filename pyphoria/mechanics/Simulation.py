@@ -0,0 +1,228 @@
+"""
+Monte Carlo simulation of loot drops for balancing.
+
+Rolls the drop counts and loot explosions of ``Loot.generate`` for every
+combination of character loot chance modifier and monster level, spread over a
+process pool, for example
+
+    python -m pyphoria.mechanics.Simulation --modifiers 0 20 50 --kills 1000000
+
+Every chunk of kills gets its own random stream spawned from the seed, in a fixed
+order, so the results only depend on the seed and the chunk size, never on the
+number of workers or the order they finish in.
+"""  # noqa: N999
+
+import argparse
+import json
+import os
+import time
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import NamedTuple, Self
+
+import numpy as np
+
+from pyphoria.mechanics.Loot import DEFAULT_DROP_TABLE, DropTable, roll_drop_counts
+
+DEFAULT_CHUNK = 1_000_000
+
+
+class Scenario(NamedTuple):
+    """
+    A character loot chance modifier fighting monsters of a level.
+
+    Attributes
+        modifier (float): The character loot chance modifier in percent.
+        monster_level (int): The level of the monsters killed.
+
+    """
+
+    modifier: float
+    monster_level: int
+
+
+class Tally(NamedTuple):
+    """
+    Aggregated rolls of many kills.
+
+    Attributes
+        drop_counts (np.ndarray): The number of kills that dropped n items at index n.
+        explosions (np.ndarray): The number of kills with loot explosion multiplier n at index n.
+        exploded (int): The number of kills whose drop exploded, of any multiplier.
+
+    """
+
+    drop_counts: np.ndarray
+    explosions: np.ndarray
+    exploded: int
+
+    def __add__(self: Self, other: "Tally") -> "Tally":  # noqa: D105
+        return Tally(
+            _add_histograms(self.drop_counts, other.drop_counts),
+            _add_histograms(self.explosions, other.explosions),
+            self.exploded + other.exploded,
+        )
+
+    @property
+    def kills(self: Self) -> int:  # noqa: D102
+        return int(self.drop_counts.sum())
+
+    def summary(self: Self) -> dict:
+        """Return the expected items per kill, explosion rate and histograms."""
+        kills = self.kills
+        items = int(np.dot(np.arange(self.drop_counts.size), self.drop_counts))
+        return {
+            "kills": kills,
+            "items_per_kill": items / kills,
+            "explosion_rate": self.exploded / kills,
+            "drop_counts": {n: int(c) for n, c in enumerate(self.drop_counts) if c},
+            "explosions": {n: int(c) for n, c in enumerate(self.explosions) if c},
+        }
+
+
+def _add_histograms(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Add two histograms of possibly different lengths."""
+    if left.size < right.size:
+        left, right = right, left
+    total = left.copy()
+    total[: right.size] += right
+    return total
+
+
+def simulate_chunk(
+    scenario: Scenario,
+    kills: int,
+    seed: np.random.SeedSequence,
+    table: DropTable = DEFAULT_DROP_TABLE,
+) -> Tally:
+    """Roll the loot of ``kills`` kills of the scenario."""
+    rng = np.random.default_rng(seed)
+    # drop counts do not depend on the monster level yet, it is kept in the
+    # scenario so balancing runs can sweep it once Loot uses it
+    counts, explosions, exploded = roll_drop_counts(
+        np.full(kills, scenario.modifier),
+        rng,
+        table,
+    )
+    return Tally(
+        np.bincount(counts),
+        np.bincount(explosions),
+        int(np.count_nonzero(exploded)),
+    )
+
+
+def simulate(  # noqa: PLR0913
+    scenarios: Sequence[Scenario],
+    kills: int,
+    seed: int = 0,
+    workers: int | None = None,
+    chunk: int = DEFAULT_CHUNK,
+    *,
+    table: DropTable = DEFAULT_DROP_TABLE,
+) -> dict[Scenario, Tally]:
+    """Roll ``kills`` kills per scenario on a process pool and tally the results."""
+    tasks = [
+        (scenario, min(chunk, kills - start))
+        for scenario in scenarios
+        for start in range(0, kills, chunk)
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+    tallies: dict[Scenario, Tally] = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            simulate_chunk,
+            *zip(*tasks, strict=True),
+            seeds,
+            repeat(table),
+        )
+        for (scenario, _), tally in zip(tasks, results, strict=True):
+            previous = tallies.get(scenario)
+            tallies[scenario] = tally if previous is None else previous + tally
+    return tallies
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--modifiers", type=float, nargs="+", default=[0, 20.3, 50])
+    parser.add_argument("--monster-levels", type=int, nargs="+", default=[1])
+    parser.add_argument("--kills", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK)
+    parser.add_argument(
+        "--drop-weights",
+        type=float,
+        nargs="+",
+        default=DEFAULT_DROP_TABLE.weights,
+        help="weight of dropping 0, 1, 2, ... items",
+    )
+    parser.add_argument(
+        "--explosion-odds",
+        type=int,
+        default=DEFAULT_DROP_TABLE.explosion_odds,
+        help="1 in this many drops explode",
+    )
+    parser.add_argument(
+        "--explosion-max",
+        type=int,
+        default=DEFAULT_DROP_TABLE.explosion_max,
+        help="highest explosion multiplier without modifiers",
+    )
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    scenarios = [
+        Scenario(modifier, monster_level)
+        for modifier in args.modifiers
+        for monster_level in args.monster_levels
+    ]
+    table = DropTable(
+        tuple(args.drop_weights),
+        args.explosion_odds,
+        args.explosion_max,
+    )
+    start = time.perf_counter()
+    tallies = simulate(
+        scenarios,
+        args.kills,
+        args.seed,
+        args.workers,
+        args.chunk,
+        table=table,
+    )
+    elapsed = time.perf_counter() - start
+
+    results = []
+    print(  # noqa: T201
+        f"{'modifier':>9} {'level':>6} {'items/kill':>11} {'explosions':>11}"
+        "  drop counts",
+    )
+    for scenario, tally in tallies.items():
+        summary = tally.summary()
+        results.append({**scenario._asdict(), **summary})
+        shares = " ".join(
+            f"{n}:{count / summary['kills']:.4f}"
+            for n, count in summary["drop_counts"].items()
+        )
+        print(  # noqa: T201
+            f"{scenario.modifier:>9} {scenario.monster_level:>6}"
+            f" {summary['items_per_kill']:>11.4f} {summary['explosion_rate']:>11.4%}"
+            f"  {shares}",
+        )
+    rolls = args.kills * len(scenarios)
+    print(f"{rolls} kills in {elapsed:.2f} s, {rolls / elapsed:,.0f} kills/s")  # noqa: T201
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(
+                {"seed": args.seed, "table": table._asdict(), "results": results},
+                file,
+                indent=4,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 import uuid as uuid_pkg
 from typing import Self
 
-import pyphoria
-from pyphoria.models import Inventory
+from pyphoria.helper import files
+from pyphoria.helper.writeback import write_behind
+from pyphoria.models.Inventory import Model as Inventory
+
+
+class NameTakenError(ValueError):
+    """Another character of the account has the name and surname already."""
 
 
 class Model:
@@ -10,8 +15,8 @@ class Model:
         """Initialize the class with the account_id and the data_file_name. If the file does not exist, create it."""
         self.account_id: uuid_pkg.UUID = account_id
         self.data_file_name: str = f"data/characters/characters-{self.account_id}.json"
-        pyphoria.helper.files.create_path_and_file(self.data_file_name)
-        self.data = pyphoria.helper.files.read_json(self.data_file_name)
+        files.create_path_and_file(self.data_file_name)
+        self.data = write_behind.read(self.data_file_name)
         self.base_character_data = {
             "account_id": self.account_id,
             "level": 1,
@@ -19,47 +24,73 @@ class Model:
             "energy": 10,
             "base_stats": {"strength": 1, "dexterity": 1, "intelligence": 1},
         }
+        # (name, surname) -> character_id of every character in the file
+        self.full_names: dict[tuple[str, str], str] = {
+            (character["name"], character["surname"]): character_id
+            for character_id, character in self.data.items()
+        }
 
     def check_name_available(self: Self, name: str, surname: str) -> bool:
-        """Iterate over the items in the dictionary and check if the full name of the character is equal to the name and surname passed as arguments. If it is, return False. If the loop finishes, return True."""
-        for character_id in self.data.items():
-            if (
-                f"{self.get_full_name(character_id=character_id)}"
-                == f"{name} {surname}"
-            ):
-                return False
-        return True
+        """Return whether no character of the account has the name and surname."""
+        return (name, surname) not in self.full_names
 
     def create(self: Self, name: str, surname: str) -> None:
-        """Create a new character."""
+        """Create a new character, raise NameTakenError if the full name is taken."""
         if not self.check_name_available(name, surname):
-            print("Name already taken.")
-            return
+            msg = f"{name} {surname} is taken already"
+            raise NameTakenError(msg)
         character_id = str(uuid_pkg.uuid4())
-        inventory = Inventory(character_id)
-        self.data[character_id] = {
-            "character_id": character_id,
-            "name": name,
-            "surname": surname,
-            "inventory": inventory.data["inventory_id"],
-            **self.base_character_data,
-        }
-        self.save()
+        # the new inventory file and the character file are written together
+        with write_behind.batch():
+            inventory = Inventory(character_id)
+            self.data[character_id] = {
+                "character_id": character_id,
+                "name": name,
+                "surname": surname,
+                "inventory": inventory.data["inventory_id"],
+                **self.base_character_data,
+            }
+            self.full_names[(name, surname)] = character_id
+            self.save((character_id,))
 
     def modify(self: Self, character_id: uuid_pkg.UUID, character_data: dict) -> None:
-        """Modify the character with the character_id passed as argument."""
+        """
+        Modify the character with the character_id passed as argument.
+
+        Raises NameTakenError if the new full name is taken, nothing is changed then.
+        """
         # TODO add data verfication using pydantic  # noqa: FIX002, TD002, TD003, TD004
-        character_data.delete("character_id")
-        self.data[character_id].update(character_data)
-        self.save()
+        character_data.pop("character_id", None)
+        character = self.data[character_id]
+        full_name = (
+            character_data.get("name", character["name"]),
+            character_data.get("surname", character["surname"]),
+        )
+        if full_name != (character["name"], character["surname"]):
+            if not self.check_name_available(*full_name):
+                msg = f"{full_name[0]} {full_name[1]} is taken already"
+                raise NameTakenError(msg)
+            del self.full_names[(character["name"], character["surname"])]
+            self.full_names[full_name] = character_id
+        character.update(character_data)
+        self.save((character_id,))
 
     def load(self: Self, character_id: uuid_pkg.UUID) -> dict:
         """Return the character with the character_id passed as argument."""
         return self.data[character_id]
 
-    def save(self: Self) -> None:
-        """Save the data to the file."""
-        pyphoria.helper.files.write_json(self.data_file_name, self.data)
+    def save(self: Self, *changed: tuple[str, ...]) -> None:
+        """
+        Mark the data to be saved to the file, see ``write_behind``.
+
+        Only the values at the changed paths of keys are written, all of the data
+        when there are none.
+        """
+        write_behind.mark_dirty(self.data_file_name, self.data, changed or None)
+
+    def flush(self: Self) -> None:
+        """Write the data to the file now if it has unsaved changes."""
+        write_behind.flush(self.data_file_name)
 
     def get_full_name(self: Self, character_id: uuid_pkg.UUID) -> str:
         """Return the full name of the character with the character_id passed as argument."""
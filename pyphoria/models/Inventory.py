@@ -1,8 +1,9 @@
 import uuid
 from typing import Self
 
-import pyphoria
-from pyphoria.models import Item
+from pyphoria.helper import files
+from pyphoria.helper.writeback import write_behind
+from pyphoria.models.Item import Model as Item
 
 
 class Model:
@@ -10,11 +11,11 @@ class Model:
         """Initialize the class with the data_file_name. If the file does not exist, create it."""
         self.data_file_name: str = f"data/inventories/inventory-{character_id}.json"
         self.character_id: uuid = character_id
-        pyphoria.helper.files.create_path_and_file(self.data_file_name)
-        self.data = pyphoria.helper.files.read_json(self.data_file_name)
+        files.create_path_and_file(self.data_file_name)
+        self.data = write_behind.read(self.data_file_name)
         self.base_inventory_data = {
             "slots": 10,
-            "items": [],
+            "items": {},
             "gold": 0,
         }
         if self.data == {}:
@@ -38,18 +39,18 @@ class Model:
             if item["stackable"]:
                 if self.data["items"][item_id]["amount"] + amount < item["max_stack"]:
                     self.data["items"][item_id]["amount"] += amount
-                    self.save()
+                    self.save(("items", item_id, "amount"))
                     return
                 else:
                     self.data["items"][item_id]["amount"] = item["max_stack"]
-                    self.save()
+                    self.save(("items", item_id, "amount"))
                     return
             elif item["unique_store"]:
                 print("Item is unique.")
 
         if self.check_open_slots():
             self.data["items"][item_id] = {"item_id": item_id, "amount": amount}
-        self.save()
+            self.save(("items", item_id))
 
     def check_stored(self: Self, item_id: uuid) -> bool:
         """Check if the item is stored in the inventory."""
@@ -61,6 +62,15 @@ class Model:
         """Return the monster with the monster_id passed as argument."""
         return self.data
 
-    def save(self: Self) -> None:
-        """Save the data to the file."""
-        pyphoria.helper.files.write_json(self.data_file_name, self.data)
+    def save(self: Self, *changed: tuple[str, ...]) -> None:
+        """
+        Mark the data to be saved to the file, see ``write_behind``.
+
+        Only the values at the changed paths of keys are written, all of the data
+        when there are none.
+        """
+        write_behind.mark_dirty(self.data_file_name, self.data, changed or None)
+
+    def flush(self: Self) -> None:
+        """Write the data to the file now if it has unsaved changes."""
+        write_behind.flush(self.data_file_name)
@@ -1,15 +1,16 @@
 import uuid  # noqa: N999, D100
 from typing import Self
 
-import pyphoria
+from pyphoria.helper import files
+from pyphoria.helper.writeback import write_behind
 
 
 class Model:
     def __init__(self: Self) -> None:
         """Initialize the class with the data_file_name. If the file does not exist, create it."""
         self.data_file_name: str = "data/items.json"
-        pyphoria.helper.files.create_path_and_file(self.data_file_name)
-        self.data = pyphoria.helper.files.read_json(self.data_file_name)
+        files.create_path_and_file(self.data_file_name)
+        self.data = write_behind.read(self.data_file_name)
         self.base_item_data = {
             "type": "weapon",
             "stackable": False,
@@ -42,19 +43,28 @@ class Model:
             "description": description,
             **_item_data,
         }
-        self.save()
+        self.save((item_id,))
 
     def modify(self: Self, item_id: uuid, item_data: dict) -> None:
         """Modify the item with the item_id passed as argument."""
         # TODO add data verfication using pydantic  # noqa: FIX002, TD002, TD003, TD004
         item_data.delete("item_id")
         self.data[item_id].update(item_data)
-        self.save()
+        self.save((item_id,))
 
     def load(self: Self, item_id: uuid) -> dict:
         """Return the Item with the item_id passed as argument."""
         return self.data[item_id]
 
-    def save(self: Self) -> None:
-        """Save the data to the file."""
-        pyphoria.helper.files.write_json(self.data_file_name, self.data)
+    def save(self: Self, *changed: tuple[str, ...]) -> None:
+        """
+        Mark the data to be saved to the file, see ``write_behind``.
+
+        Only the values at the changed paths of keys are written, all of the data
+        when there are none.
+        """
+        write_behind.mark_dirty(self.data_file_name, self.data, changed or None)
+
+    def flush(self: Self) -> None:
+        """Write the data to the file now if it has unsaved changes."""
+        write_behind.flush(self.data_file_name)
@@ -1,7 +1,8 @@
 import uuid
 from typing import Self
 
-import pyphoria
+from pyphoria.helper import files
+from pyphoria.helper.writeback import write_behind
 from pyphoria.models import Monster
 
 
@@ -13,8 +14,8 @@ class Model:
         If the file does not exist, create it.
         """
         self.data_file_name: str = "data/monsters.json"
-        pyphoria.helper.files.create_path_and_file(self.data_file_name)
-        self.data = pyphoria.helper.files.read_json(self.data_file_name)
+        files.create_path_and_file(self.data_file_name)
+        self.data = write_behind.read(self.data_file_name)
 
     def create(
         self: Self,
@@ -36,22 +37,31 @@ class Model:
             type=type,
             icon=icon,
         ).model_dump()
-        self.save()
+        self.save((str(monster_id),))
 
     def modify(self: Self, id: uuid, monster_data: dict) -> None:
         """Modify the monster with the monster_id passed as argument."""
         Monster(id=id, **monster_data)
         self.data.pop(str(id), None)
         self.data[str(id)] = monster_data
-        self.save()
+        self.save((str(id),))
 
     def load(self: Self, monster_id: uuid) -> dict:
         """Return the monster with the monster_id passed as argument."""
         return self.data[monster_id]
 
-    def save(self: Self) -> None:
-        """Save the data to the file."""
-        pyphoria.helper.files.write_json(self.data_file_name, self.data)
+    def save(self: Self, *changed: tuple[str, ...]) -> None:
+        """
+        Mark the data to be saved to the file, see ``write_behind``.
+
+        Only the values at the changed paths of keys are written, all of the data
+        when there are none.
+        """
+        write_behind.mark_dirty(self.data_file_name, self.data, changed or None)
+
+    def flush(self: Self) -> None:
+        """Write the data to the file now if it has unsaved changes."""
+        write_behind.flush(self.data_file_name)
 
     def list(self: Self) -> dict:
         """Return the list of monsters."""
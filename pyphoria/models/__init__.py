@@ -7,8 +7,11 @@ from pydantic import (
     NonNegativeInt,
     PositiveInt,
 )
+from sqlalchemy import ForeignKey, Index
 from sqlmodel import Field, Relationship, SQLModel
 
+from pyphoria.helper.identifiers import UUIDType, new_id
+
 if TYPE_CHECKING:
     from pyphoria.models.Item import Item
 
@@ -31,6 +34,19 @@ class HTTPError(BaseModel):
         }
 
 
+class BulkResult(BaseModel):
+    """Result of a bulk route."""
+
+    count: NonNegativeInt
+
+
+class InventoryItemCount(BaseModel):
+    """An item and how many of it to add to an inventory."""
+
+    item_id: uuid.UUID
+    item_count: PositiveInt
+
+
 class CharacterStats(SQLModel):
     """Character stats model."""
 
@@ -70,10 +86,10 @@ class Species(SpeciesBase, table=True):
     """Species model."""
 
     id: uuid.UUID | None = Field(
-        default_factory=uuid.uuid4,
+        default_factory=new_id,
         primary_key=True,
-        index=True,
         nullable=False,
+        sa_type=UUIDType,
     )
 
 
@@ -108,7 +124,7 @@ class CharacterBase(CharacterStats):
     """
 
     # account_id: uuid.UUID = Field(default=None, foreign_key="accounts.id")  # noqa: ERA001
-    species: uuid.UUID = Field(foreign_key="species.id")
+    species: uuid.UUID = Field(foreign_key="species.id", sa_type=UUIDType)
     name: str
     surname: str
     level: PositiveInt
@@ -120,13 +136,26 @@ class CharacterBase(CharacterStats):
 
 
 class Character(CharacterBase, table=True):  # noqa: D101
+    # full names are unique, the index also serves the name lookups
+    __table_args__ = (
+        Index("ix_character_name_surname", "name", "surname", unique=True),
+        # the leaderboard order, read backwards for the top characters
+        Index("ix_character_level_experience", "level", "experience"),
+    )
+
     id: uuid.UUID = Field(
-        default_factory=uuid.uuid4,
+        default_factory=new_id,
         primary_key=True,
-        index=True,
         nullable=False,
+        sa_type=UUIDType,
+    )
+    # a deleted inventory leaves its character without one
+    inventory_id: uuid.UUID | None = Field(
+        default=None,
+        index=True,
+        sa_type=UUIDType,
+        sa_column_args=(ForeignKey("inventory.id", ondelete="SET NULL"),),
     )
-    inventory_id: uuid.UUID = Field(foreign_key="inventory.id")
 
 
 class CharacterCreate(CharacterBase):
@@ -139,14 +168,36 @@ class CharacterRead(CharacterBase):
     """Character read model."""
 
     id: uuid.UUID
-    inventory_id: uuid.UUID
+    inventory_id: uuid.UUID | None
+
+
+class LeaderboardEntry(BaseModel):
+    """A character on the leaderboard, equal level and experience share a rank."""
+
+    rank: PositiveInt
+    id: uuid.UUID
+    name: str
+    surname: str
+    level: PositiveInt
+    experience: PositiveInt
+
+
+class LeaderboardRank(BaseModel):
+    """Where a character stands among all ``characters``."""
+
+    id: uuid.UUID
+    rank: PositiveInt
+    level: PositiveInt
+    experience: PositiveInt
+    characters: NonNegativeInt
 
 
 class InventoryExtension(SQLModel, table=True):  # noqa: D101
     id: uuid.UUID = Field(
-        default_factory=uuid.uuid4,
+        default_factory=new_id,
         primary_key=True,
         unique=True,
+        sa_type=UUIDType,
     )
     slots: PositiveInt
     name: str = Field(max_length=50, unique=True, index=True)
@@ -155,8 +206,18 @@ class InventoryExtension(SQLModel, table=True):  # noqa: D101
 
 
 class InventoryItemLink(SQLModel, table=True):
-    inventory_id: uuid.UUID = Field(foreign_key="inventory.id", primary_key=True)
-    item_id: uuid.UUID = Field(foreign_key="item.id", primary_key=True)
+    # links go away with their inventory or item, the database deletes them in bulk
+    inventory_id: uuid.UUID = Field(
+        primary_key=True,
+        sa_type=UUIDType,
+        sa_column_args=(ForeignKey("inventory.id", ondelete="CASCADE"),),
+    )
+    item_id: uuid.UUID = Field(
+        primary_key=True,
+        index=True,
+        sa_type=UUIDType,
+        sa_column_args=(ForeignKey("item.id", ondelete="CASCADE"),),
+    )
     item_count: PositiveInt
 
 
@@ -176,9 +237,10 @@ class InventoryRead(InventoryBase):  # noqa: D101
 
 class Inventory(InventoryBase, table=True):  # noqa: D101
     id: uuid.UUID = Field(
-        default_factory=uuid.uuid4,
+        default_factory=new_id,
         primary_key=True,
         unique=True,
+        sa_type=UUIDType,
     )
     items: list["Item"] = Relationship(
         back_populates="inventories",
@@ -203,8 +265,7 @@ class ItemRequirements(SQLModel, table=False):  # noqa: D101
     requirement_strength: PositiveInt
 
 
-class Item(ItemDamage, ItemRequirements, table=True):  # noqa: D101
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+class ItemBase(ItemDamage, ItemRequirements):  # noqa: D101
     name: str = Field(max_length=50, unique=True, index=True)
     type: str
     description: str
@@ -213,18 +274,21 @@ class Item(ItemDamage, ItemRequirements, table=True):  # noqa: D101
     unique_store: bool
     unique_equipped: bool
     icon: str
+
+
+class Item(ItemBase, table=True):  # noqa: D101
+    id: uuid.UUID = Field(default_factory=new_id, primary_key=True, sa_type=UUIDType)
     inventories: list["Inventory"] = Relationship(
         back_populates="items",
         link_model=InventoryItemLink,
     )
 
 
-class Monster(SQLModel, table=True):  # noqa: D101
-    id: uuid.UUID = Field(
-        default_factory=uuid.uuid4,
-        primary_key=True,
-        unique=True,
-    )
+class ItemCreate(ItemBase):
+    """Item create model."""
+
+
+class MonsterBase(SQLModel):  # noqa: D101
     name: str = Field(max_length=50, unique=True, index=True)
     description: str
     level: PositiveInt
@@ -232,14 +296,35 @@ class Monster(SQLModel, table=True):  # noqa: D101
     icon: str
 
 
-class Planet(SQLModel, table=True):
-    """Planet model."""  # noqa: D203
-
+class Monster(MonsterBase, table=True):  # noqa: D101
     id: uuid.UUID = Field(
-        default_factory=uuid.uuid4,
+        default_factory=new_id,
         primary_key=True,
         unique=True,
+        sa_type=UUIDType,
     )
+
+
+class MonsterCreate(MonsterBase):
+    """Monster create model."""
+
+
+class PlanetBase(SQLModel):  # noqa: D101
     name: str = Field(max_length=50, unique=True, index=True)
     description: str
     icon: str
+
+
+class Planet(PlanetBase, table=True):
+    """Planet model."""
+
+    id: uuid.UUID = Field(
+        default_factory=new_id,
+        primary_key=True,
+        unique=True,
+        sa_type=UUIDType,
+    )
+
+
+class PlanetCreate(PlanetBase):
+    """Planet create model."""
@@ -0,0 +1 @@
+"""Tests of pyphoria."""
@@ -0,0 +1,39 @@
+"""Fixtures of the tests, every test gets its own database and data directory."""
+
+import os
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Engine
+
+# the app binds its engine on import, point it away from the working directory
+os.environ.setdefault(
+    "PYPHORIA_SQLITE_DB",
+    f"{tempfile.mkdtemp(prefix='pyphoria-tests-')}/app.db",
+)
+
+from pyphoria.helper import files
+from pyphoria.helper.database import create_engine
+from pyphoria.helper.migrations import migrate
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Iterator[Engine]:
+    """Return an engine of a new, migrated database."""
+    engine = create_engine(f"sqlite:///{tmp_path}/test.db")
+    migrate(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def data_root(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    """Point the data files at an empty directory and forget what was cached."""
+    root = tmp_path / "pyphoria"
+    root.mkdir()
+    monkeypatch.setattr(files, "pyphoria_path", str(root))
+    files.forget()
+    yield root
+    files.forget()
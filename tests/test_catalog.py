@@ -0,0 +1,70 @@
+"""Tests of the in-memory catalog of the static game data."""
+
+import threading
+
+import pytest
+from sqlalchemy import Engine
+
+from pyphoria.helper.catalog import Catalog
+from pyphoria.helper.generator import Counts, generate
+from pyphoria.models import Item, Species
+
+
+@pytest.fixture
+def catalog(engine: Engine) -> Catalog:
+    generate(engine, Counts(characters=5, items=5))
+    return Catalog(engine, (Species, Item))
+
+
+def _blocking_load(
+    catalog: Catalog,
+    monkeypatch: pytest.MonkeyPatch,
+) -> tuple[threading.Event, threading.Event]:
+    """Make the loads wait until released, return the started and release events."""
+    started, release = threading.Event(), threading.Event()
+    load = catalog._load  # noqa: SLF001
+
+    def blocking(*args: object) -> object:
+        started.set()
+        release.wait(5)
+        return load(*args)
+
+    monkeypatch.setattr(catalog, "_load", blocking)
+    return started, release
+
+
+def test_a_load_does_not_block_the_other_tables(
+    catalog: Catalog,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    species = catalog.table(Species)
+    started, release = _blocking_load(catalog, monkeypatch)
+    loader = threading.Thread(target=catalog.table, args=(Item,))
+    loader.start()
+    started.wait(5)
+
+    # served and invalidated while the items are being read
+    assert catalog.table(Species) is species
+    catalog.invalidate(Species)
+    assert loader.is_alive()
+    release.set()
+    loader.join(5)
+
+    assert catalog.stats()["tables"] == {"item": 5}
+
+
+def test_a_snapshot_invalidated_during_its_load_is_not_cached(
+    catalog: Catalog,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    started, release = _blocking_load(catalog, monkeypatch)
+    loader = threading.Thread(target=catalog.table, args=(Item,))
+    loader.start()
+    started.wait(5)
+
+    catalog.invalidate(Item)
+    release.set()
+    loader.join(5)
+
+    assert catalog.cached(Item) is None
+    assert catalog.misses == 1
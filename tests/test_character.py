@@ -0,0 +1,25 @@
+"""Tests of the characters kept in the JSON files of the accounts."""
+
+import pytest
+
+
+@pytest.mark.usefixtures("data_root")
+def test_taken_full_names_raise() -> None:
+    # importing the file models replaces the table models of the same name on
+    # pyphoria.models, so only once the other test modules are collected
+    from pyphoria.models.Character import Model, NameTakenError  # noqa: PLC0415
+
+    characters = Model("account")
+    characters.create("Ada", "Lovelace")
+    characters.create("Ada", "Byron")
+    character_id = characters.full_names[("Ada", "Byron")]
+
+    with pytest.raises(NameTakenError, match="Ada Lovelace"):
+        characters.create("Ada", "Lovelace")
+    with pytest.raises(NameTakenError, match="Ada Lovelace"):
+        characters.modify(character_id, {"surname": "Lovelace", "level": 2})
+
+    assert characters.load(character_id)["surname"] == "Byron"
+    assert characters.load(character_id)["level"] == 1
+    characters.modify(character_id, {"surname": "King"})
+    assert characters.check_name_available("Ada", "Byron")
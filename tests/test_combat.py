@@ -0,0 +1,112 @@
+"""Tests of the round based combat and its NumPy batch mode."""
+
+import math
+import random
+from typing import Self
+
+import numpy as np
+import pytest
+
+from pyphoria.mechanics.Combat import (
+    MAX_HIT_CHANCE,
+    MAX_ROUNDS,
+    MIN_HIT_CHANCE,
+    Combatant,
+    Combatants,
+    fight,
+    fight_batch,
+    hit_chance,
+)
+
+# the hit chances are 0.95 for the character and 0.05 for the monster, no crits
+STRONG = Combatant(
+    health=30,
+    damage=4,
+    hit_rating=1000,
+    dodge_rating=1000,
+    crit_chance=0,
+)
+WEAK = Combatant(health=10, damage=5, hit_rating=1, dodge_rating=1, crit_chance=0)
+HARMLESS = Combatant(health=10, damage=0, hit_rating=1, dodge_rating=1, crit_chance=0)
+
+
+class _Rolls:
+    """Rolls the same number every time, for Random as well as for Generator."""
+
+    def __init__(self: Self, roll: float) -> None:
+        self.roll = roll
+
+    def random(self: Self, size: tuple | None = None) -> float | np.ndarray:
+        return self.roll if size is None else np.full(size, self.roll)
+
+
+def _pack(*combatants: Combatant) -> Combatants:
+    return Combatants.pack(combatants)
+
+
+def test_hit_chance_is_bounded() -> None:
+    assert hit_chance(1000, 1) == MAX_HIT_CHANCE
+    assert hit_chance(1, 1000) == MIN_HIT_CHANCE
+
+
+def test_known_outcome() -> None:
+    # a roll of 0.5 is below the hit chance of 0.95 and above the one of 0.05
+    result = fight(STRONG, WEAK, _Rolls(0.5))
+    batch = fight_batch(_pack(STRONG), _pack(WEAK), _Rolls(0.5))
+
+    assert result == (True, 3, 30, 0)
+    assert batch.won.tolist() == [True]
+    assert batch.rounds.tolist() == [3]
+    assert batch.character_health.tolist() == [30]
+    assert batch.monster_health.tolist() == [0]
+
+
+def test_fights_without_damage_last_all_rounds() -> None:
+    result = fight(HARMLESS, HARMLESS, random.Random(0))
+    batch = fight_batch(
+        _pack(HARMLESS, HARMLESS),
+        _pack(HARMLESS, HARMLESS),
+        np.random.default_rng(0),
+    )
+
+    assert result == (False, MAX_ROUNDS, 10, 10)
+    assert batch.rounds.tolist() == [MAX_ROUNDS] * 2
+    assert not batch.won.any()
+    assert batch.monster_health.tolist() == [10] * 2
+
+
+def test_fight_batch_needs_a_monster_per_character() -> None:
+    with pytest.raises(ValueError, match="same length"):
+        fight_batch(_pack(STRONG, STRONG), _pack(WEAK))
+
+
+def test_fight_batch_follows_the_distribution_of_fight() -> None:
+    fights = 20_000
+    character = Combatant(
+        health=50,
+        damage=10,
+        hit_rating=10,
+        dodge_rating=10,
+        crit_chance=0.1,
+    )
+    monster = Combatant(
+        health=50,
+        damage=10,
+        hit_rating=10,
+        dodge_rating=10,
+        crit_chance=0.05,
+    )
+    rng = random.Random(0)
+    results = [fight(character, monster, rng) for _ in range(fights)]
+    batch = fight_batch(
+        _pack(*[character] * fights),
+        _pack(*[monster] * fights),
+        np.random.default_rng(0),
+    )
+
+    won = np.array([result.won for result in results])
+    rounds = np.array([result.rounds for result in results])
+    for scalar, batched in ((won, batch.won), (rounds, batch.rounds)):
+        # four standard errors of the difference of the means
+        error = math.sqrt((scalar.var() + batched.var()) / fights)
+        assert abs(scalar.mean() - batched.mean()) < 4 * error
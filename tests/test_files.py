@@ -0,0 +1,122 @@
+"""Tests of the JSON files with a journal of their changes."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from pyphoria.helper import files, serializer
+
+NAME = "data/inventory.json"
+
+
+def _journal(root: Path) -> list[dict]:
+    path = root / f"{NAME}{files.JOURNAL_SUFFIX}"
+    return [serializer.loads(line) for line in path.read_bytes().splitlines()]
+
+
+def test_nested_changes_journal_their_path(data_root: Path) -> None:
+    files.create_path_and_file(NAME)
+    data = {"gold": 1, "items": {"sword": {"amount": 1}, "shield": {"amount": 1}}}
+    files.write_json(NAME, data)
+    written = len(_journal(data_root))
+
+    data["items"]["sword"]["amount"] = 2
+    del data["items"]["shield"]
+    files.write_json(NAME, data, [("items", "sword", "amount"), ("items", "shield")])
+
+    assert _journal(data_root)[written:] == [
+        {"op": "set", "path": ["items", "sword", "amount"], "value": 2},
+        {"op": "del", "path": ["items", "shield"]},
+    ]
+    files.forget()
+    assert files.read_json(NAME) == data
+    assert dict(files.iter_entries(NAME)) == data
+
+
+def test_crash_after_compaction_keeps_the_new_data(
+    data_root: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    files.create_path_and_file(NAME)
+    files.write_json(NAME, {"a": 1})
+    files.write_json(NAME, {"a": 2}, [("a",)])
+    # another process compacts the file, unaware of the journal left behind
+    files.forget()
+    replace = os.replace
+
+    def crash(source: str, destination: str) -> None:
+        replace(source, destination)
+        raise OSError(destination)
+
+    monkeypatch.setattr(files.os, "replace", crash)
+    with pytest.raises(OSError, match="inventory"):
+        files.compact(NAME, {"b": 3})
+    assert _journal(data_root)[-1] == {"op": "set", "path": [], "value": {"b": 3}}
+
+    assert dict(files.iter_entries(NAME)) == {"b": 3}
+    files.forget()
+    assert files.read_json(NAME) == {"b": 3}
+
+
+def test_saves_journal_without_reading_the_file(
+    data_root: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    files.create_path_and_file(NAME)
+    data = {"items": {str(n): {"amount": n} for n in range(1000)}}
+    files.write_json(NAME, data)
+    files.forget()
+
+    def read_json(file_name: str) -> dict:
+        raise AssertionError(file_name)
+
+    monkeypatch.setattr(files, "read_json", read_json)
+    data["items"]["7"]["amount"] = 8
+    files.write_json(NAME, data, [("items", "7", "amount")])
+
+    assert _journal(data_root) == [
+        {"op": "set", "path": ["items", "7", "amount"], "value": 8},
+    ]
+
+
+def test_a_partial_last_entry_is_cut_off_before_appending(data_root: Path) -> None:
+    files.create_path_and_file(NAME)
+    files.write_json(NAME, {"a": 1})
+    journal = data_root / f"{NAME}{files.JOURNAL_SUFFIX}"
+    journal.write_bytes(b'{"op": "set", "path": ["b"], "value": 2}\n{"op": "se')
+    files.forget()
+
+    files.write_json(NAME, {"a": 1, "c": 3}, [("c",)])
+
+    files.forget()
+    assert files.read_json(NAME) == {"a": 1, "b": 2, "c": 3}
+
+
+def test_large_files_are_decoded_in_chunks(
+    data_root: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(files, "READ_CHUNK", 16)
+    data = {
+        f"key {n}": {"amount": 123456789 * n, "ratio": n / 7, "tags": ["a"] * n}
+        for n in range(20)
+    }
+    (data_root / "large.json").write_bytes(serializer.dumps(data))
+
+    assert dict(files.iter_entries("large.json")) == data
+
+
+def test_malformed_files_stop_at_the_entry_limit(
+    data_root: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(files, "READ_CHUNK", 16)
+    monkeypatch.setattr(files, "MAX_ENTRY_CHARS", 1024)
+    (data_root / "broken.json").write_text('{"a": 1, "b": "' + "x" * 10_000)
+
+    entries = files.iter_entries("broken.json")
+
+    assert next(entries) == ("a", 1)
+    with pytest.raises(ValueError, match="exceeds 1024 characters"):
+        next(entries)
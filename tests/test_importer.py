@@ -0,0 +1,128 @@
+"""Tests of the import of the JSON data files."""
+
+import json
+import uuid
+from pathlib import Path
+
+from sqlalchemy import Engine, select
+
+from pyphoria.helper.importer import (
+    Importer,
+    ImportStats,
+    import_species,
+    inventory_rows,
+)
+from pyphoria.models import Character, Inventory, InventoryItemLink
+
+
+def _write(root: Path, name: str, data: dict) -> None:
+    path = root / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # the layout the file models wrote before the importer existed
+    path.write_text(json.dumps(data, indent=4))
+
+
+def _legacy_inventory(character_id: str) -> dict:
+    return {
+        "slots": 10,
+        "items": [],
+        "gold": 0,
+        "inventory_id": str(uuid.uuid4()),
+        "character_id": character_id,
+    }
+
+
+def test_inventory_rows_accepts_every_items_layout() -> None:
+    item_id = str(uuid.uuid4())
+    inventory = _legacy_inventory(str(uuid.uuid4()))
+    for items, expected in (
+        ([], 0),
+        (None, 0),
+        ({}, 0),
+        ([{"item_id": item_id, "amount": 2}], 1),
+        ({item_id: {"item_id": item_id, "amount": 2}}, 1),
+    ):
+        _, links = inventory_rows({**inventory, "items": items}, ImportStats())
+        assert len(links) == expected
+        assert all(link["item_id"] == uuid.UUID(item_id) for link in links)
+
+
+def test_import_keeps_legacy_inventories(data_root: Path, engine: Engine) -> None:
+    character_id = str(uuid.uuid4())
+    inventory = _legacy_inventory(character_id)
+    _write(data_root, f"data/inventories/inventory-{character_id}.json", inventory)
+    _write(
+        data_root,
+        "data/characters/characters-account.json",
+        {
+            character_id: {
+                "character_id": character_id,
+                "name": "Ada",
+                "surname": "Lovelace",
+                "inventory": inventory["inventory_id"],
+                "account_id": "account",
+                "level": 1,
+                "experience": 0,
+                "energy": 10,
+                "base_stats": {"strength": 1, "dexterity": 1, "intelligence": 1},
+            },
+        },
+    )
+
+    stats = Importer(engine, import_species(engine, "Human"), batch=10).run()
+
+    assert stats.invalid == 0
+    with engine.connect() as connection:
+        inventories = connection.execute(select(Inventory.id)).scalars().all()
+        links = connection.execute(select(InventoryItemLink.item_id)).all()
+        character = connection.execute(select(Character.inventory_id)).scalar_one()
+    assert inventories == [uuid.UUID(inventory["inventory_id"])]
+    assert links == []
+    assert character == uuid.UUID(inventory["inventory_id"])
+
+
+def test_import_renames_full_names_taken_on_another_account(
+    data_root: Path,
+    engine: Engine,
+) -> None:
+    first, second = sorted(str(uuid.uuid4()) for _ in range(2))
+    for account, character_id in (("one", first), ("two", second)):
+        inventory = _legacy_inventory(character_id)
+        _write(data_root, f"data/inventories/inventory-{character_id}.json", inventory)
+        _write(
+            data_root,
+            f"data/characters/characters-{account}.json",
+            {
+                character_id: {
+                    "character_id": character_id,
+                    "name": "Ada",
+                    "surname": "Lovelace",
+                    "inventory": inventory["inventory_id"],
+                    "account_id": account,
+                    "level": 1,
+                    "experience": 0,
+                    "energy": 10,
+                    "base_stats": {"strength": 1, "dexterity": 1, "intelligence": 1},
+                },
+            },
+        )
+    species = import_species(engine, "Human")
+
+    stats = Importer(engine, species, batch=10).run()
+
+    assert (stats.inserted, stats.skipped, stats.renamed) == (4, 0, 1)
+    with engine.connect() as connection:
+        characters = connection.execute(
+            select(Character.id, Character.surname, Character.inventory_id),
+        ).all()
+    assert len(characters) == 2
+    assert all(inventory_id for _, _, inventory_id in characters)
+    surnames = sorted(surname for _, surname, _ in characters)
+    renamed = next(key for key, surname, _ in characters if surname != "Lovelace")
+    assert surnames == ["Lovelace", f"Lovelace ({renamed.hex[:8]})"]
+
+    # a second run imports nothing and renames nothing again
+    rerun = Importer(engine, species, batch=10)
+    rerun.checkpoint = {"phase": "items", "done": 0}
+    stats = rerun.run()
+    assert (stats.inserted, stats.skipped, stats.renamed) == (0, 4, 0)
@@ -0,0 +1,104 @@
+"""Tests of the stack aware adds of items to inventories."""
+
+import uuid
+from collections.abc import Iterator
+
+import pytest
+from sqlalchemy import Engine
+from sqlmodel import Session
+
+from pyphoria.helper.inventory import add_items
+from pyphoria.models import Inventory, Item
+
+
+@pytest.fixture
+def session(engine: Engine) -> Iterator[Session]:
+    with Session(engine) as session:
+        yield session
+
+
+def _item(
+    session: Session,
+    *,
+    stackable: bool = True,
+    max_stack: int = 10,
+    unique_store: bool = False,
+) -> uuid.UUID:
+    item = Item(
+        name=f"Item {uuid.uuid4().hex[:8]}",
+        type="weapon",
+        description="A test item.",
+        stackable=stackable,
+        max_stack=max_stack,
+        unique_store=unique_store,
+        unique_equipped=False,
+        icon="item.png",
+        damage_fire=1,
+        damage_physical=1,
+        requirement_dexterity=1,
+        requirement_intelligence=1,
+        requirement_level=1,
+        requirement_strength=1,
+    )
+    session.add(item)
+    session.commit()
+    return item.id
+
+
+def _inventory(session: Session, slots: int = 10) -> uuid.UUID:
+    inventory = Inventory(slots=slots)
+    session.add(inventory)
+    session.commit()
+    return inventory.id
+
+
+def _counts(session: Session, inventory_id: uuid.UUID, *pairs: tuple) -> set:
+    links = add_items(session, inventory_id, pairs)
+    session.commit()
+    return {(link.item_id, link.item_count) for link in links}
+
+
+def test_stacks_grow_up_to_max_stack(session: Session) -> None:
+    inventory_id = _inventory(session)
+    arrow = _item(session, max_stack=10)
+
+    assert _counts(session, inventory_id, (arrow, 4)) == {(arrow, 4)}
+    # the counts of an item requested twice are summed up
+    assert _counts(session, inventory_id, (arrow, 2), (arrow, 2)) == {(arrow, 8)}
+    assert _counts(session, inventory_id, (arrow, 4)) == {(arrow, 10)}
+    # a full stack is not added to, nor does it spill into another slot
+    assert _counts(session, inventory_id, (arrow, 1)) == set()
+
+
+def test_new_items_take_the_free_slots_in_order(session: Session) -> None:
+    inventory_id = _inventory(session, slots=2)
+    stored = _item(session)
+    first, second = _item(session), _item(session)
+    _counts(session, inventory_id, (stored, 1))
+
+    added = _counts(session, inventory_id, (first, 1), (second, 1), (stored, 1))
+
+    assert added == {(first, 1), (stored, 2)}
+    # a full inventory still stacks the items it holds
+    assert _counts(session, inventory_id, (second, 1), (stored, 1)) == {(stored, 3)}
+
+
+def test_items_that_do_not_stack_are_stored_once(session: Session) -> None:
+    inventory_id = _inventory(session)
+    sword = _item(session, stackable=False)
+    relic = _item(session, unique_store=True)
+
+    assert _counts(session, inventory_id, (sword, 3), (relic, 3)) == {
+        (sword, 1),
+        (relic, 1),
+    }
+    assert _counts(session, inventory_id, (sword, 1), (relic, 1)) == set()
+
+
+def test_unknown_items_are_left_out(session: Session) -> None:
+    inventory_id = _inventory(session)
+    arrow = _item(session)
+
+    assert _counts(session, inventory_id, (uuid.uuid4(), 1), (arrow, 1)) == {
+        (arrow, 1),
+    }
@@ -0,0 +1,62 @@
+"""Tests of the leaderboard kept up to date from the change log."""
+
+from sqlalchemy import Engine, text
+
+from pyphoria.helper.generator import Counts, generate
+from pyphoria.helper.identifiers import from_db
+from pyphoria.helper.leaderboard import Leaderboard
+
+_AHEAD = text(
+    "SELECT count(*) FROM character WHERE level > :level "
+    "OR (level = :level AND experience > :experience)",
+)
+
+
+def _characters(engine: Engine) -> list[tuple]:
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text("SELECT id, level, experience FROM character ORDER BY id LIMIT 20"),
+        ).all()
+        return [
+            (
+                from_db(key),
+                connection.execute(
+                    _AHEAD,
+                    {"level": level, "experience": experience},
+                ).scalar()
+                + 1,
+            )
+            for key, level, experience in rows
+        ]
+
+
+def test_ranks_follow_the_changes(engine: Engine) -> None:
+    generate(engine, Counts(characters=200, items=10))
+    board = Leaderboard(engine)
+    board.rank(_characters(engine)[0][0])
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "UPDATE character SET experience = experience + 1000000 "
+                "WHERE rowid % 7 = 0",
+            ),
+        )
+
+    for character_id, rank in _characters(engine):
+        assert board.rank(character_id).rank == rank
+    assert board.loads == 1
+    assert board.applied > 0
+
+
+def test_ranks_are_counted_while_another_lookup_loads(engine: Engine) -> None:
+    generate(engine, Counts(characters=50, items=10))
+    board = Leaderboard(engine)
+    character_id, rank = _characters(engine)[0]
+
+    # another thread is loading the scores
+    with board._loading:  # noqa: SLF001
+        assert board.rank(character_id).rank == rank
+
+    assert board.stats() == {"loads": 0, "applied": 0, "counted": 1, "characters": None}
+    assert board.rank(character_id).rank == rank
+    assert board.loads == 1
@@ -0,0 +1,83 @@
+"""Tests of the loot generated for kills."""
+
+import math
+import random
+import uuid
+
+import numpy as np
+import pytest
+
+from pyphoria.mechanics.Loot import DropTable, Loot
+
+KILLS = 20_000
+
+
+def _close(scalar: float, batched: float, trials: int = KILLS) -> bool:
+    """Return whether two rates of the trials are within four standard errors."""
+    rate = (scalar + batched) / 2
+    return abs(scalar - batched) <= 4 * math.sqrt(rate * (1 - rate) * 2 / trials)
+
+
+def test_batches_drop_from_the_merged_loot_pools() -> None:
+    loot = Loot(uuid.uuid4(), uuid.uuid4())
+    kills = 1000
+    monsters = [uuid.uuid4() for _ in range(5)]
+
+    batch = loot.generate_batch(
+        [uuid.uuid4()] * kills,
+        [monsters[kill % len(monsters)] for kill in range(kills)],
+        [1] * kills,
+        np.random.default_rng(0),
+    )
+
+    assert batch.offsets[-1] == batch.counts.sum() == len(batch.items)
+    assert set(batch.base_ids) == {"item", "other item"}
+    drops = [batch.drops(kill) for kill in range(kills)]
+    assert [len(drop) for drop in drops] == batch.counts.tolist()
+
+
+def test_single_kills_use_the_drop_table() -> None:
+    # the loot chance modifier raises every weight but the one of no drop
+    loot = Loot(uuid.uuid4(), uuid.uuid4(), DropTable(weights=(1,)))
+
+    assert loot.generate(uuid.uuid4(), uuid.uuid4(), 1) == []
+
+
+def test_batches_follow_the_distribution_of_single_kills(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # explosions are frequent enough to shape the drop counts
+    table = DropTable(explosion_odds=4)
+    loot = Loot(uuid.uuid4(), uuid.uuid4(), table)
+    character_id, monster_id = uuid.uuid4(), uuid.uuid4()
+    explosion_rolls = []
+    randint = random.randint
+
+    def counted_randint(low: int, high: int) -> int:
+        roll = randint(low, high)
+        if high == table.explosion_odds:
+            explosion_rolls.append(roll == 1)
+        return roll
+
+    monkeypatch.setattr(random, "randint", counted_randint)
+    random.seed(0)
+    drops = [loot.generate(character_id, monster_id, 1) for _ in range(KILLS)]
+    batch = loot.generate_batch(
+        [character_id] * KILLS,
+        [monster_id] * KILLS,
+        [1] * KILLS,
+        np.random.default_rng(0),
+    )
+
+    scalar_counts = np.bincount([len(drop) for drop in drops])
+    batch_counts = np.bincount(batch.counts, minlength=len(scalar_counts))
+    scalar_counts.resize(batch_counts.shape)
+    for scalar, batched in zip(scalar_counts, batch_counts, strict=True):
+        assert _close(scalar / KILLS, batched / KILLS)
+    assert _close(sum(explosion_rolls) / KILLS, batch.exploded.mean())
+    items = [item for drop in drops for item in drop]
+    assert _close(
+        items.count("item") / len(items),
+        np.mean(np.asarray(batch.base_ids)[batch.items] == "item"),
+        len(items),
+    )
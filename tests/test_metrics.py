@@ -0,0 +1,30 @@
+"""Tests of the SQL metrics of the requests."""
+
+import pytest
+from sqlalchemy import Engine, text
+from sqlalchemy.exc import IntegrityError
+
+from pyphoria.helper import metrics
+
+# the id of an inventory must not be NULL
+_INVALID = text("INSERT INTO inventory (id, slots, gold) VALUES (NULL, 1, 1)")
+
+
+def test_failing_statements_are_counted_and_leave_nothing_behind(
+    engine: Engine,
+) -> None:
+    metrics.instrument(engine)
+    stats = metrics.RequestStats()
+    token = metrics._request_stats.set(stats)  # noqa: SLF001
+    try:
+        with engine.connect() as connection:
+            for _ in range(3):
+                with pytest.raises(IntegrityError):
+                    connection.execute(_INVALID)
+            connection.execute(text("SELECT 1"))
+            info = dict(connection.info)
+    finally:
+        metrics._request_stats.reset(token)  # noqa: SLF001
+
+    assert stats.queries == 4
+    assert "query_start" not in info
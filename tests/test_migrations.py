@@ -0,0 +1,104 @@
+"""Tests of the schema migrations on databases created before them."""
+
+import sqlite3
+import uuid
+
+import pytest
+from sqlalchemy import Engine
+
+from pyphoria.helper.migrations import LATEST, MigrationError, migrate
+
+STATS = (
+    "stat_combat",
+    "stat_dodge_rating",
+    "stat_hit_rating",
+    "stat_intelligence",
+    "stat_luck",
+    "stat_vitality",
+    "level",
+    "experience",
+    "energy",
+    "strength",
+    "dexterity",
+    "intelligence",
+)
+
+
+def _connect(engine: Engine) -> sqlite3.Connection:
+    return sqlite3.connect(engine.url.database, isolation_level=None)
+
+
+def _species(connection: sqlite3.Connection) -> str:
+    key = uuid.uuid4().hex
+    connection.execute(
+        "INSERT INTO species VALUES (1, 1, 1, 1, 1, 1, 'Human', '', '', 1, 1, 1, ?)",
+        (key,),
+    )
+    return key
+
+
+def _character(
+    connection: sqlite3.Connection,
+    species: str,
+    name: str,
+    surname: str,
+) -> None:
+    columns = ", ".join(("id", "species", "name", "surname", *STATS))
+    connection.execute(
+        f"INSERT INTO character ({columns}) "  # noqa: S608
+        f"VALUES (?, ?, ?, ?{', 1' * len(STATS)})",
+        (uuid.uuid4().hex, species, name, surname),
+    )
+
+
+def _version(connection: sqlite3.Connection) -> int:
+    return connection.execute("SELECT max(version) FROM schema_version").fetchone()[0]
+
+
+def _downgrade(connection: sqlite3.Connection, version: int) -> None:
+    connection.execute("DELETE FROM schema_version WHERE version > ?", (version,))
+
+
+def test_duplicate_names_are_listed(engine: Engine) -> None:
+    connection = _connect(engine)
+    # before version 2 nothing kept the full names unique
+    connection.execute("DROP INDEX ix_character_name_surname")
+    species = _species(connection)
+    for _ in range(2):
+        _character(connection, species, "Ada", "Lovelace")
+    _character(connection, species, "Alan", "Turing")
+    _downgrade(connection, 1)
+
+    with pytest.raises(MigrationError, match=r"Ada, Lovelace \(2 rows\)") as error:
+        migrate(engine)
+
+    assert "Turing" not in str(error.value)
+    assert _version(connection) == 1
+    # renaming one of them lets the migration through
+    connection.execute(
+        "UPDATE character SET surname = 'Byron' WHERE rowid = "
+        "(SELECT min(rowid) FROM character WHERE name = 'Ada')",
+    )
+    assert migrate(engine) == _version(connection) == LATEST
+
+
+def test_dangling_species_are_listed(engine: Engine) -> None:
+    connection = _connect(engine)
+    connection.execute("PRAGMA foreign_keys = OFF")
+    # the character table of version 2, without the delete action of its inventory
+    ddl = connection.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'character'",
+    ).fetchone()[0]
+    connection.execute("DROP TABLE character")
+    connection.execute(ddl.replace(" ON DELETE SET NULL", ""))
+    species = _species(connection)
+    _character(connection, species, "Ada", "Lovelace")
+    missing = uuid.uuid4().hex
+    _character(connection, missing, "Alan", "Turing")
+    _downgrade(connection, 2)
+
+    with pytest.raises(MigrationError, match=f"species {missing} is not in species"):
+        migrate(engine)
+
+    assert _version(connection) == 2
+    assert connection.execute("SELECT count(*) FROM character").fetchone()[0] == 2
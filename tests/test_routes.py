@@ -0,0 +1,151 @@
+"""Tests of the routes against the database of the app."""
+
+import uuid
+from collections.abc import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from pyphoria import main
+from pyphoria.helper.migrations import migrate
+
+
+@pytest.fixture
+def client() -> Iterator[TestClient]:
+    migrate(main.engine)
+    with TestClient(main.app) as client:
+        yield client
+
+
+def _item(name: str) -> dict:
+    return {
+        "name": name,
+        "type": "weapon",
+        "description": "A test item.",
+        "stackable": True,
+        "max_stack": 10,
+        "unique_store": False,
+        "unique_equipped": False,
+        "icon": "item.png",
+        "damage_fire": 1,
+        "damage_physical": 1,
+        "requirement_dexterity": 1,
+        "requirement_intelligence": 1,
+        "requirement_level": 1,
+        "requirement_strength": 1,
+    }
+
+
+def test_update_item(client: TestClient) -> None:
+    name = f"Sword {uuid.uuid4().hex[:8]}"
+    item_id = client.post("/item/", json=_item(name)).json()["id"]
+    # the catalog holds the item before the update
+    assert client.get(f"/item/{item_id}").json()["name"] == name
+
+    response = client.put(f"/item/{item_id}", json=_item(f"{name} renamed"))
+
+    assert response.status_code == 200
+    assert response.json()["id"] == item_id
+    assert client.get(f"/item/{item_id}").json()["name"] == f"{name} renamed"
+
+
+def test_update_item_errors(client: TestClient) -> None:
+    name = f"Shield {uuid.uuid4().hex[:8]}"
+    client.post("/item/", json=_item(name))
+    other = client.post("/item/", json=_item(f"{name} other")).json()["id"]
+
+    missing = client.put(f"/item/{uuid.uuid4()}", json=_item(f"{name} missing"))
+    taken = client.put(f"/item/{other}", json=_item(name))
+
+    assert missing.status_code == 404
+    assert taken.status_code == 409
+    assert client.get(f"/item/{other}").json()["name"] == f"{name} other"
+
+
+def test_update_inventory(client: TestClient) -> None:
+    inventory_id = client.post("/inventory/", json={}).json()["id"]
+
+    response = client.put(f"/inventory/{inventory_id}", json={"slots": 20, "gold": 5})
+
+    assert response.status_code == 200
+    assert response.json() == {"id": inventory_id, "slots": 20, "gold": 5}
+    assert client.put(f"/inventory/{uuid.uuid4()}", json={}).status_code == 404
+
+
+def test_add_missing_item_to_inventory(client: TestClient) -> None:
+    inventory_id = client.post("/inventory/", json={}).json()["id"]
+    main.catalog.invalidate(main.Item)
+    misses = main.catalog.misses
+
+    # the catalog loads the items through the session of the request
+    response = client.post(f"/inventory/{inventory_id}/item/{uuid.uuid4()}/1")
+
+    assert response.status_code == 404
+    assert main.catalog.misses == misses + 1
+
+
+def test_add_item_to_a_full_stack(client: TestClient) -> None:
+    inventory_id = client.post("/inventory/", json={}).json()["id"]
+    item = {**_item(f"Bow {uuid.uuid4().hex[:8]}"), "stackable": False}
+    item_id = client.post("/item/", json=item).json()["id"]
+
+    added = client.post(f"/inventory/{inventory_id}/item/{item_id}/1")
+    again = client.post(f"/inventory/{inventory_id}/item/{item_id}/1")
+
+    assert added.json()["item_count"] == 1
+    assert again.status_code == 409
+    assert again.json()["detail"] == f"The stack of item {item_id} is full"
+
+
+def _character(species: str, name: str) -> dict:
+    return {
+        "species": species,
+        "name": name,
+        "surname": "Bulk",
+        "level": 1,
+        "experience": 1,
+        "energy": 10,
+        "strength": 1,
+        "dexterity": 1,
+        "intelligence": 1,
+        "stat_combat": 1,
+        "stat_dodge_rating": 1,
+        "stat_hit_rating": 1,
+        "stat_intelligence": 1,
+        "stat_luck": 1,
+        "stat_vitality": 1,
+    }
+
+
+def test_bulk_counts_the_inserted_rows(client: TestClient) -> None:
+    name = f"Axe {uuid.uuid4().hex[:8]}"
+    client.post("/item/", json=_item(name))
+
+    response = client.post(
+        "/item/bulk?on_conflict=ignore",
+        json=[_item(name), _item(f"{name} new")],
+    )
+
+    assert response.json() == {"count": 1}
+
+
+def test_bulk_characters_of_a_missing_species(client: TestClient) -> None:
+    names = [f"Ada {uuid.uuid4().hex[:8]}" for _ in range(2)]
+
+    response = client.post(
+        "/character/bulk",
+        json=[_character(str(uuid.uuid4()), name) for name in names],
+    )
+
+    assert response.status_code == 422
+
+
+def test_export(client: TestClient) -> None:
+    inventory_id = client.post("/inventory/", json={}).json()["id"]
+
+    response = client.get("/export/inventory", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    # the test client decodes the body
+    assert inventory_id.replace("-", "") in response.text.replace("-", "")
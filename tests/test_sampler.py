@@ -0,0 +1,84 @@
+"""Tests of the alias samplers of the loot pools and their cache."""
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from pyphoria.mechanics.Sampler import AliasSampler, LootPoolCache
+
+DRAWS = 50_000
+POOL = (("common", 60), ("rare", 30), ("epic", 10), ("never", 0))
+
+
+def _assert_frequencies(indices: np.ndarray, pool: tuple) -> None:
+    """Check the share of every outcome is within four standard errors."""
+    total = sum(weight for _, weight in pool)
+    counts = np.bincount(indices, minlength=len(pool))
+    for (_, weight), count in zip(pool, counts, strict=True):
+        expected = weight / total
+        error = math.sqrt(expected * (1 - expected) / DRAWS)
+        assert abs(count / DRAWS - expected) <= 4 * error
+
+
+def test_sample_frequencies_follow_the_weights() -> None:
+    sampler = AliasSampler(POOL)
+    rng = random.Random(0)
+
+    _assert_frequencies(
+        np.array([sampler.sample_index(rng) for _ in range(DRAWS)]),
+        POOL,
+    )
+    _assert_frequencies(sampler.sample_indices(DRAWS, np.random.default_rng(0)), POOL)
+
+
+def test_single_entry_pool() -> None:
+    sampler = AliasSampler((("only", 5),))
+
+    assert sampler.choices(10, random.Random(0)) == ["only"] * 10
+    assert not sampler.sample_indices(100, np.random.default_rng(0)).any()
+
+
+def test_pools_without_weight_are_rejected() -> None:
+    with pytest.raises(ValueError, match="empty pool"):
+        AliasSampler(())
+    with pytest.raises(ValueError, match="positive number"):
+        AliasSampler((("never", 0),))
+
+
+def test_cache_hits_on_the_same_and_equal_pools() -> None:
+    cache = LootPoolCache()
+    sampler = cache.get("key", POOL)
+
+    assert cache.get("key", POOL) is sampler
+    assert cache.get("key", list(POOL)) is sampler
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_cache_rebuilds_a_changed_pool() -> None:
+    cache = LootPoolCache()
+    pool = [("common", 1)]
+    sampler = cache.get("key", pool)
+
+    pool.append(("rare", 1))
+    rebuilt = cache.get("key", pool)
+
+    assert rebuilt is not sampler
+    assert rebuilt.outcomes == ("common", "rare")
+    assert cache.misses == 2
+
+
+def test_cache_evicts_the_least_recently_used() -> None:
+    cache = LootPoolCache(maxsize=2)
+    first = cache.get("first", POOL)
+    cache.get("second", POOL)
+    # using the first sampler makes the second the least recently used
+    cache.get("first", POOL)
+    cache.get("third", POOL)
+
+    assert len(cache) == 2
+    assert cache.get("first", POOL) is first
+    misses = cache.misses
+    cache.get("second", POOL)
+    assert cache.misses == misses + 1
@@ -0,0 +1,30 @@
+"""Tests of the loot drop rolls of the balancing simulation."""
+
+import numpy as np
+
+from pyphoria.mechanics.Loot import DropTable, roll_drop_counts
+from pyphoria.mechanics.Simulation import Scenario, simulate_chunk
+
+
+def test_explosions_of_multiplier_one_are_counted() -> None:
+    # every drop explodes, none of them multiplies the items
+    table = DropTable(weights=(0, 1), explosion_odds=1, explosion_max=1)
+
+    tally = simulate_chunk(Scenario(0, 1), 1000, np.random.SeedSequence(0), table)
+
+    assert tally.summary()["explosion_rate"] == 1
+    assert tally.summary()["items_per_kill"] == 1
+
+
+def test_drop_table_is_used() -> None:
+    table = DropTable(weights=(0, 0, 1), explosion_odds=10**9)
+
+    counts, explosions, exploded = roll_drop_counts(
+        np.zeros(100),
+        np.random.default_rng(0),
+        table,
+    )
+
+    assert (counts == 2).all()
+    assert (explosions == 1).all()
+    assert not exploded.any()
@@ -0,0 +1,41 @@
+"""Tests of the snapshots and restores of the database."""
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Engine, text
+
+from pyphoria.helper.generator import Counts, generate
+from pyphoria.helper.sqlite import restore, snapshot
+
+
+def _count(engine: Engine) -> int:
+    with engine.connect() as connection:
+        return connection.execute(text("SELECT count(*) FROM character")).scalar()
+
+
+def test_restore_of_a_snapshot_file(engine: Engine, tmp_path: Path) -> None:
+    generate(engine, Counts(characters=20, items=5))
+    target = tmp_path / "snapshot.db"
+    snapshot(engine, str(target)).close()
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM character"))
+
+    restore(str(target), engine)
+
+    assert _count(engine) == 20
+
+
+def test_restore_of_a_missing_file_keeps_the_database(
+    engine: Engine,
+    tmp_path: Path,
+) -> None:
+    generate(engine, Counts(characters=20, items=5))
+    missing = tmp_path / "mistyped.db"
+
+    with pytest.raises(sqlite3.OperationalError):
+        restore(str(missing), engine)
+
+    assert _count(engine) == 20
+    assert not missing.exists()
@@ -0,0 +1,114 @@
+"""Tests of the write-behind buffer of the JSON file models."""
+
+import threading
+from pathlib import Path
+
+import pytest
+
+from pyphoria.helper import files, serializer
+from pyphoria.helper.writeback import WriteBehind
+
+
+def _buffer() -> WriteBehind:
+    # flushed by the tests only, the timer never fires
+    return WriteBehind(enabled=True, interval=3600, max_pending=100)
+
+
+@pytest.mark.usefixtures("data_root")
+def test_deferred_data_is_copied_when_marked() -> None:
+    buffer = _buffer()
+    files.create_path_and_file("data/a.json")
+    data = {"items": {"sword": 1}}
+    buffer.mark_dirty("data/a.json", data)
+    # a request changes the model while its save waits for the flush
+    data["items"]["shield"] = 1
+
+    assert buffer.flush() == 1
+    files.forget()
+    assert files.read_json("data/a.json") == {"items": {"sword": 1}}
+
+
+@pytest.mark.usefixtures("data_root")
+def test_failed_write_keeps_the_unwritten_files(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    buffer = _buffer()
+    names = [f"data/{name}.json" for name in "abc"]
+    for name in names:
+        files.create_path_and_file(name)
+        buffer.mark_dirty(name, {"name": name})
+    write_json = files.write_json
+
+    def failing(file_name: str, data: dict) -> None:
+        if file_name == names[1]:
+            raise OSError(file_name)
+        write_json(file_name, data)
+
+    monkeypatch.setattr(files, "write_json", failing)
+    with pytest.raises(OSError, match=r"b\.json"):
+        buffer.flush()
+    assert len(buffer) == 2
+    assert buffer.writes == 1
+
+    monkeypatch.setattr(files, "write_json", write_json)
+    assert buffer.flush() == 2
+    files.forget()
+    for name in names:
+        assert files.read_json(name) == {"name": name}
+
+
+@pytest.mark.usefixtures("data_root")
+def test_a_batch_writes_only_its_own_files() -> None:
+    buffer = WriteBehind(enabled=False, interval=3600, max_pending=100)
+    for name in ("data/a.json", "data/b.json"):
+        files.create_path_and_file(name)
+    marked, ended = threading.Event(), threading.Event()
+
+    def other_batch() -> None:
+        with buffer.batch():
+            buffer.mark_dirty("data/a.json", {"step": 1})
+            marked.set()
+            ended.wait(5)
+            buffer.mark_dirty("data/a.json", {"step": 2})
+
+    thread = threading.Thread(target=other_batch)
+    thread.start()
+    marked.wait(5)
+    with buffer.batch():
+        buffer.mark_dirty("data/b.json", {"step": 1})
+    # the flush of all files leaves the other scope's file alone too
+    buffer.flush()
+
+    assert buffer.writes == 1
+    assert len(buffer) == 1
+    ended.set()
+    thread.join(5)
+    assert buffer.writes == 2
+    files.forget()
+    assert files.read_json("data/a.json") == {"step": 2}
+
+
+def test_models_journal_the_paths_they_change(data_root: Path) -> None:
+    # see test_character for why the file models are imported here
+    from pyphoria.models.Inventory import Model as Inventory  # noqa: PLC0415
+    from pyphoria.models.Item import Model as Item  # noqa: PLC0415
+
+    items = Item()
+    items.create("Arrow", "A test item.", {"stackable": True})
+    item_id = next(iter(items.data))
+    inventory = Inventory("character")
+    journal = data_root / f"{inventory.data_file_name}{files.JOURNAL_SUFFIX}"
+
+    inventory.add(item_id)
+    inventory.add(item_id, 2)
+
+    assert [serializer.loads(line) for line in journal.read_bytes().splitlines()] == [
+        {
+            "op": "set",
+            "path": ["items", item_id],
+            "value": {"item_id": item_id, "amount": 1},
+        },
+        {"op": "set", "path": ["items", item_id, "amount"], "value": 3},
+    ]
+    files.forget()
+    assert Inventory("character").data["items"][item_id]["amount"] == 3